@@ -1,14 +1,27 @@
 from django.contrib import admin
-from .models import UserProfile, Historique
+from .models import LeaderboardEntry, PointsEvent, UserProfile, Historique
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'level', 'points', 'created_at']
     list_filter = ['level', 'created_at']
     search_fields = ['user__username', 'user__email']
+    # Total maintenu par le registre des points (PointsEvent)
+    readonly_fields = ['points']
 
 @admin.register(Historique)
 class HistoriqueAdmin(admin.ModelAdmin):
     list_display = ['user', 'content_type', 'content_id', 'progress', 'completed', 'last_accessed']
     list_filter = ['content_type', 'completed', 'last_accessed']
     search_fields = ['user__username']
+
+@admin.register(PointsEvent)
+class PointsEventAdmin(admin.ModelAdmin):
+    list_display = ['user', 'amount', 'reason', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['user__username']
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ['rank', 'user', 'points', 'computed_at']
+    search_fields = ['user__username']
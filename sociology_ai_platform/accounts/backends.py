@@ -0,0 +1,15 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import AuthenticatedUserCache
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend dont get_user (appelé une fois par requête par AuthenticationMiddleware,
+    qui mémorise le résultat dans request.user) charge aussi le profil, depuis le cache
+    ou par une jointure: request.user.profile ne coûte plus de requête.
+    """
+
+    def get_user(self, user_id):
+        user = AuthenticatedUserCache.get(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,53 @@
+"""
+Cache de l'utilisateur authentifié (framework de cache Django)
+- Utilisateur et profil chargés ensemble (une jointure), partagés entre requêtes
+- Invalidé par les signaux de User et UserProfile (accounts.models)
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+
+class AuthenticatedUserCache:
+    """
+    Conserve l'utilisateur et son profil pour AuthenticationMiddleware (voir
+    accounts.backends). USER_PROFILE_CACHE_TIMEOUT = 0 (défaut sans cache partagé entre
+    processus, voir settings) désactive le partage entre requêtes. Les modifications en masse (QuerySet.update) de User ou UserProfile
+    n'émettent pas de signal et doivent appeler invalidate explicitement.
+    """
+
+    KEY_PREFIX = 'auth_user'
+
+    @staticmethod
+    def _key(user_id):
+        return f'{AuthenticatedUserCache.KEY_PREFIX}:{user_id}'
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'USER_PROFILE_CACHE_TIMEOUT', 0)
+
+    @staticmethod
+    def load(user_id):
+        """Utilisateur et profil en une requête (None si l'utilisateur n'existe pas)"""
+        return User.objects.select_related('profile').filter(pk=user_id).first()
+
+    @staticmethod
+    def get(user_id):
+        timeout = AuthenticatedUserCache._timeout()
+        if not timeout:
+            return AuthenticatedUserCache.load(user_id)
+        key = AuthenticatedUserCache._key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = AuthenticatedUserCache.load(user_id)
+            if user is not None:
+                cache.set(key, user, timeout)
+        return user
+
+    @staticmethod
+    def invalidate(user_id):
+        """Retire l'utilisateur tout de suite et après validation de la transaction en cours"""
+        key = AuthenticatedUserCache._key(user_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.contrib.auth import authenticate, login
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit des connexions (authenticate + login, dont la mise à jour de last_login) "
+        "et leur nombre de requêtes, sur un utilisateur temporaire annulé en fin d'exécution"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=500, help="Nombre de connexions mesurées")
+        parser.add_argument(
+            '--real-hasher',
+            action='store_true',
+            help="Conserve le hacheur de mots de passe configuré (par défaut, un hacheur rapide "
+                 "isole le coût base de données de la connexion)",
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0:
+            raise CommandError("--repeat doit être strictement positif.")
+        hashers = {} if options['real_hasher'] else {
+            'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher']
+        }
+        try:
+            with override_settings(**hashers), transaction.atomic():
+                self._run(options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, repeat):
+        user = User.objects.create_user('benchmark_login', password='benchmark')
+        user.profile  # Profil existant, comme pour un utilisateur déjà actif
+        factory = RequestFactory()
+
+        def log_in():
+            request = factory.post('/accounts/login/')
+            request.session = SessionStore()
+            authenticated = authenticate(request, username='benchmark_login', password='benchmark')
+            login(request, authenticated)
+            request.session.save()
+
+        counts = {'queries': 0, 'profile': 0}
+
+        def count_queries(execute, sql, params, many, context):
+            counts['queries'] += 1
+            counts['profile'] += 'accounts_userprofile' in sql
+            return execute(sql, params, many, context)
+
+        log_in()  # préchauffage
+        durations = []
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                begin = time.perf_counter()
+                log_in()
+                durations.append((time.perf_counter() - begin) * 1000)
+            elapsed = time.perf_counter() - started
+
+        durations.sort()
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(
+            f"{repeat} connexions: médiane {statistics.median(durations):.2f}ms, p95 {p95:.2f}ms, "
+            f"{counts['queries'] / repeat:.1f} requêtes par connexion "
+            f"(dont {counts['profile'] / repeat:.1f} sur le profil)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Débit: {repeat / elapsed:.0f} connexions/s"))
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from accounts.models import PointsEvent, UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Regroupe les événements de points anciens en un solde par utilisateur "
+        "(le total des profils est inchangé)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=getattr(settings, 'POINTS_LEDGER_COMPACT_AFTER_DAYS', 30),
+            help="Âge minimal (jours) des événements regroupés",
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Vérifie que le total de chaque profil égale la somme de son registre, sans rien modifier "
+                 "(code de sortie non nul si écart)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre d'utilisateurs compactés par transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0 or options['batch_size'] <= 0:
+            raise CommandError("--older-than doit être positif et --batch-size strictement positif.")
+
+        if options['check']:
+            self._check()
+            return
+
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        # Les nouveaux événements sont datés de leur insertion: aucun n'entre dans la plage compactée
+        old_events = PointsEvent.objects.filter(created_at__lt=cutoff).order_by()
+        user_ids = list(
+            old_events.values('user_id').annotate(count=Count('id')).filter(count__gt=1)
+            .values_list('user_id', flat=True)
+        )
+        removed = 0
+        for start in range(0, len(user_ids), options['batch_size']):
+            batch = user_ids[start:start + options['batch_size']]
+            with transaction.atomic():
+                balances = [
+                    PointsEvent(user_id=user_id, amount=total, reason='compaction', created_at=last)
+                    for user_id, total, last in old_events.filter(user_id__in=batch).values('user_id')
+                    .annotate(total=Sum('amount'), last=Max('created_at'))
+                    .values_list('user_id', 'total', 'last')
+                ]
+                deleted, _ = old_events.filter(user_id__in=batch).delete()
+                PointsEvent.objects.bulk_create(balances)
+            removed += deleted - len(balances)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(user_ids)} utilisateurs compactés, {removed} événements supprimés."
+        ))
+
+    def _check(self):
+        totals = PointsEvent.objects.totals()
+        mismatched = 0
+        profiles = UserProfile.objects.values_list('user_id', 'points').iterator()
+        for user_id, points in profiles:
+            expected = totals.get(user_id, 0)
+            if points != expected:
+                mismatched += 1
+                self.stdout.write(f"Utilisateur #{user_id}: {points} points au lieu de {expected}")
+        if mismatched:
+            raise CommandError(f"{mismatched} totaux de points incohérents.")
+        self.stdout.write(self.style.SUCCESS("Totaux de points cohérents avec le registre."))
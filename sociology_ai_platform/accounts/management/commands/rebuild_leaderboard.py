@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = "Recalcule le classement précalculé des points (à lancer périodiquement)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=getattr(settings, 'LEADERBOARD_SIZE', 100),
+            help="Nombre de rangs conservés",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre d'entrées écrites par requête",
+        )
+
+    def handle(self, *args, **options):
+        if options['size'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError("--size et --batch-size doivent être strictement positifs.")
+        count = LeaderboardEntry.objects.rebuild(options['size'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Classement reconstruit: {count} entrées."))
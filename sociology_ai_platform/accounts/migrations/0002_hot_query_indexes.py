@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historique',
+            index=models.Index(fields=['user', 'content_type', 'completed'], name='hist_user_type_completed_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """Solde d'ouverture: les points existants deviennent un événement du registre"""
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    PointsEvent = apps.get_model('accounts', 'PointsEvent')
+    PointsEvent.objects.bulk_create([
+        PointsEvent(user_id=user_id, amount=points, reason='compaction')
+        for user_id, points in UserProfile.objects.exclude(points=0).values_list('user_id', 'points')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_lazy_profile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('rank', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('points', models.IntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entry', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'leaderboard entries',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PointsEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('reason', models.CharField(choices=[('quiz', 'Quiz réussi'), ('exercise', 'Exercice terminé'), ('course', 'Cours terminé'), ('adjustment', 'Ajustement'), ('compaction', 'Solde reporté')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='points_user_created_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
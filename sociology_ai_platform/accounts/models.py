@@ -1,10 +1,53 @@
-from django.db import models
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F, Q
+from django.db.models.fields.files import FieldFile
+from django.db.models.fields.related_descriptors import ReverseOneToOneDescriptor
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
+from .cache import AuthenticatedUserCache
+from .signals import progress_recorded
+
+
+class ProfileDescriptor(ReverseOneToOneDescriptor):
+    """
+    user.profile: le profil est créé au premier accès s'il n'existe pas encore
+    (création idempotente, sans écriture lors de l'enregistrement de l'utilisateur)
+    """
+
+    def __get__(self, instance, cls=None):
+        try:
+            return super().__get__(instance, cls)
+        except self.RelatedObjectDoesNotExist:
+            if instance.pk is None:
+                raise
+            # L'accès vient d'établir l'absence du profil: création directe, sans SELECT préalable
+            profile = self.related.related_model._default_manager.create_for(instance)
+            self.related.set_cached_value(instance, profile)
+            return profile
+
+
+class ProfileField(models.OneToOneField):
+    """OneToOneField dont l'accès inverse crée l'objet manquant (voir ProfileDescriptor)"""
+    related_accessor_class = ProfileDescriptor
+
+
+class UserProfileManager(models.Manager):
+    def create_for(self, user):
+        """Crée le profil de l'utilisateur, ou retourne celui créé entre-temps par une requête concurrente"""
+        try:
+            with transaction.atomic():
+                return self.create(user=user)
+        except IntegrityError:
+            return self.get(user=user)
+
 
 class UserProfile(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
+    user = ProfileField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, null=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
     level = models.CharField(max_length=50, default='beginner', choices=[
@@ -12,22 +55,113 @@ class UserProfile(models.Model):
         ('intermediate', 'Intermédiaire'),
         ('advanced', 'Avancé'),
     ])
-    points = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)  # Total de PointsEvent, maintenu par PointsEvent.objects.award
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserProfileManager()
+
+    # Un enregistrement sans update_fields n'écrit que les champs modifiés depuis le chargement.
+    # points n'est jamais réécrit ainsi: seul le registre (incréments F()) le modifie.
+    UNTRACKED_FIELDS = ('id', 'created_at', 'updated_at', 'points')
+
     def __str__(self):
         return f"Profile de {self.user.username}"
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._tracked_values()
+        return instance
+
+    def _tracked_values(self):
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.UNTRACKED_FIELDS or field.attname in self.get_deferred_fields():
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(value, FieldFile):
+                # Fichier envoyé mais pas encore stocké: toujours à enregistrer
+                value = value.name if value._committed else object()
+            values[field.attname] = value
+        return values
+
+    def changed_fields(self):
+        """Noms des champs modifiés depuis le chargement (None: inconnu, tout enregistrer)"""
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return None
+        return [
+            name for name, value in self._tracked_values().items()
+            if name not in loaded or loaded[name] != value
+        ]
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not args:
+            changed = self.changed_fields()
+            if changed == []:
+                return  # Aucun champ modifié: pas d'UPDATE
+            if changed is not None:
+                kwargs['update_fields'] = changed + ['updated_at']
+        super().save(*args, **kwargs)
+        self._loaded_values = self._tracked_values()
+
+
+class HistoriqueManager(models.Manager):
+    def record_progress(self, user, updates):
+        """
+        Enregistre un lot de progression [(content_type, content_id, progress, completed), ...]
+        en un seul INSERT ... ON CONFLICT DO UPDATE. Les mises à jour d'un même contenu sont
+        regroupées; la progression ne diminue jamais et un contenu complété le reste
+        (atteindre 100 % le complète). Retourne le nombre d'historiques écrits.
+        """
+        merged = {}
+        for content_type, content_id, progress, completed in updates:
+            key = (content_type, content_id)
+            previous_progress, previous_completed = merged.get(key, (0, False))
+            merged[key] = (max(previous_progress, progress), previous_completed or completed)
+        if not merged:
+            return 0
+
+        by_type = {}
+        for content_type, content_id in merged:
+            by_type.setdefault(content_type, []).append(content_id)
+        lookup = Q()
+        for content_type, content_ids in by_type.items():
+            lookup |= Q(content_type=content_type, content_id__in=content_ids)
+
+        with transaction.atomic():
+            # Verrou des lignes existantes (sans effet sur SQLite, qui sérialise les écritures)
+            existing = {
+                (content_type, content_id): (progress, completed)
+                for content_type, content_id, progress, completed in
+                self.select_for_update().filter(lookup, user=user).order_by()
+                .values_list('content_type', 'content_id', 'progress', 'completed')
+            }
+            rows, created, newly_completed = [], [], []
+            for key, (progress, completed) in merged.items():
+                old_progress, old_completed = existing.get(key, (0, False))
+                progress = max(progress, old_progress)
+                completed = completed or old_completed or progress >= 100
+                if key not in existing:
+                    created.append(key)
+                if completed and not old_completed:
+                    newly_completed.append(key)
+                rows.append(self.model(
+                    user=user, content_type=key[0], content_id=key[1],
+                    progress=progress, completed=completed,
+                ))
+            self.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'content_type', 'content_id'],
+                update_fields=['progress', 'completed', 'last_accessed'],
+            )
+            progress_recorded.send(
+                sender=self.model, user=user, created=created, completed=newly_completed
+            )
+        return len(rows)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
 
 class Historique(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='historique')
@@ -44,9 +178,142 @@ class Historique(models.Model):
     last_accessed = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = HistoriqueManager()
+
     class Meta:
         ordering = ['-last_accessed']
         unique_together = ['user', 'content_type', 'content_id']
+        indexes = [
+            # Contenus complétés d'un utilisateur par type (exclusion des recommandations)
+            models.Index(fields=['user', 'content_type', 'completed'], name='hist_user_type_completed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.content_type} #{self.content_id}"
+
+
+class PointsEventManager(models.Manager):
+    def award(self, user, amount, reason):
+        """
+        Ajoute un événement au registre et l'applique au total du profil par un UPDATE
+        atomique (F()): aucun incrément perdu entre requêtes concurrentes.
+        Le profil déjà chargé sur `user` est mis à jour en mémoire.
+        """
+        with transaction.atomic():
+            event = self.create(user=user, amount=amount, reason=reason)
+            profiles = UserProfile.objects.filter(user=user)
+            update = {'points': F('points') + amount, 'updated_at': timezone.now()}
+            if not profiles.update(**update):
+                UserProfile.objects.create_for(user)
+                profiles.update(**update)
+            # UPDATE sans signal: l'utilisateur en cache porte l'ancien total
+            AuthenticatedUserCache.invalidate(user.pk)
+        profile = User.profile.related.get_cached_value(user, None)
+        if profile is not None:
+            profile.points += amount
+        return event
+
+    def totals(self, user_ids=None):
+        """Retourne {user_id: somme des événements} en une seule requête"""
+        events = self.all() if user_ids is None else self.filter(user_id__in=user_ids)
+        return dict(
+            events.order_by().values('user_id').annotate(total=models.Sum('amount'))
+            .values_list('user_id', 'total')
+        )
+
+
+class PointsEvent(models.Model):
+    """
+    Registre des points (ajout seul): le total de UserProfile.points en est la somme.
+    Les événements anciens sont regroupés par la commande compact_points_ledger.
+    """
+    REASON_CHOICES = [
+        ('quiz', 'Quiz réussi'),
+        ('exercise', 'Exercice terminé'),
+        ('course', 'Cours terminé'),
+        ('adjustment', 'Ajustement'),
+        ('compaction', 'Solde reporté'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_events')
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = PointsEventManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Événements d'un utilisateur par date (historique, compactage)
+            models.Index(fields=['user', 'created_at'], name='points_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.amount:+d} ({self.reason})"
+
+
+class LeaderboardEntryManager(models.Manager):
+    def top(self, limit):
+        """Les `limit` premiers du classement: parcours de la clé primaire (rang), sans tri"""
+        return self.select_related('user').order_by('rank')[:limit]
+
+    def rebuild(self, size, batch_size=500):
+        """
+        Recalcule le classement des `size` meilleurs totaux (égalité: plus ancien compte d'abord)
+        et remplace la table en une transaction. Retourne le nombre d'entrées.
+        """
+        ranking = (
+            UserProfile.objects.filter(points__gt=0)
+            .order_by('-points', 'user_id').values_list('user_id', 'points')[:size]
+        )
+        now = timezone.now()
+        entries = [
+            LeaderboardEntry(rank=rank, user_id=user_id, points=points, computed_at=now)
+            for rank, (user_id, points) in enumerate(ranking, 1)
+        ]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(entries, batch_size=batch_size)
+        return len(entries)
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Classement précalculé des points (commande rebuild_leaderboard): l'affichage lit
+    les premiers rangs par la clé primaire au lieu de trier tous les profils.
+    """
+    rank = models.PositiveIntegerField(primary_key=True)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='leaderboard_entry')
+    points = models.IntegerField()
+    computed_at = models.DateTimeField()
+
+    objects = LeaderboardEntryManager()
+
+    class Meta:
+        ordering = ['rank']
+        verbose_name_plural = 'leaderboard entries'
+
+    def __str__(self):
+        return f"#{self.rank} {self.user.username} ({self.points})"
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    AuthenticatedUserCache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    AuthenticatedUserCache.invalidate(instance.user_id)
+
+
+@receiver(progress_recorded)
+def award_completion_points(sender, user, completed, **kwargs):
+    """Points des contenus complétés par un lot de progression: un événement par motif"""
+    rewards = getattr(settings, 'POINTS_PER_COMPLETION', {})
+    completions = Counter(content_type for content_type, _ in completed if rewards.get(content_type))
+    for content_type, count in completions.items():
+        PointsEvent.objects.award(user, rewards[content_type] * count, content_type)
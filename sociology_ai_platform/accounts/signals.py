@@ -0,0 +1,10 @@
+"""
+Signaux propres aux comptes
+- progress_recorded: émis une fois par lot de progression enregistré par bulk_create
+  (Historique.objects.record_progress), qui n'émet pas post_save.
+  Arguments: user, created (clés (content_type, content_id) des historiques créés),
+  completed (clés passées à completed=True par ce lot)
+"""
+from django.dispatch import Signal
+
+progress_recorded = Signal()
@@ -1,3 +1,372 @@
-from django.test import TestCase
+from datetime import timedelta
+import json
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from sociology_ai.testing import PerformanceTestCase
+from .backends import ProfileModelBackend
+from .cache import AuthenticatedUserCache
+from .models import Historique, LeaderboardEntry, PointsEvent, UserProfile
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN est spécifique à SQLite")
+class HotQueryIndexTests(TestCase):
+    """Les requêtes fréquentes doivent utiliser un index composite, pas un parcours de table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+
+    def test_completed_courses_use_user_type_completed_index(self):
+        plan = Historique.objects.filter(
+            user=self.user, content_type='course', completed=True
+        ).values_list('content_id', flat=True).explain()
+        self.assertIn('hist_user_type_completed_idx', plan)
+        self.assertNotRegex(plan, r'SCAN \w+\s*$')
+
+    def test_leaderboard_top_reads_primary_key_without_sort(self):
+        plan = LeaderboardEntry.objects.top(10).explain()
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ProfilePersistenceTests(TestCase):
+    """Le profil n'est écrit que si ses champs changent, et créé au premier accès"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('learner', password='secret')
+
+    def profile_queries(self, context):
+        return [query['sql'] for query in context.captured_queries if 'accounts_userprofile' in query['sql']]
+
+    def test_profile_is_created_lazily_once(self):
+        self.assertFalse(UserProfile.objects.filter(user=self.user).exists())
+        profile = self.user.profile
+        self.assertEqual(profile.level, 'beginner')
+        # Un autre objet User (autre requête) retrouve le même profil
+        self.assertEqual(User.objects.get(pk=self.user.pk).profile.pk, profile.pk)
+        self.assertEqual(UserProfile.objects.filter(user=self.user).count(), 1)
+        # Profil créé entre-temps par une requête concurrente
+        self.assertEqual(UserProfile.objects.create_for(self.user).pk, profile.pk)
+
+    def test_user_save_does_not_touch_profile(self):
+        self.user.profile
+        with CaptureQueriesContext(connection) as context:
+            self.user.save(update_fields=['last_login'])
+            self.user.save()
+        self.assertEqual(self.profile_queries(context), [])
+
+        self.client.logout()
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(reverse('login'), {'username': 'learner', 'password': 'secret'})
+        self.assertEqual(self.profile_queries(context), [])
+
+    def test_only_changed_fields_are_written(self):
+        self.user.profile
+        profile = UserProfile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            profile.save()
+        profile.level = 'advanced'
+        with CaptureQueriesContext(connection) as context:
+            profile.save()
+        (update,) = self.profile_queries(context)
+        self.assertIn('"level"', update)
+        self.assertNotIn('"bio"', update)
+        with self.assertNumQueries(0):
+            profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.level, 'advanced')
+        # Le total de points n'est écrit que par le registre (PointsEvent)
+        profile.points = 10
+        with self.assertNumQueries(0):
+            profile.save()
+
+    def test_benchmark_login_command(self):
+        out = StringIO()
+        call_command('benchmark_login', repeat=3, stdout=out)
+        self.assertIn('(dont 0.0 sur le profil)', out.getvalue())
+        self.assertFalse(User.objects.filter(username='benchmark_login').exists())
+
+
+@override_settings(USER_PROFILE_CACHE_TIMEOUT=300)
+class AuthenticatedUserCacheTests(TestCase):
+    """Utilisateur et profil chargés en une jointure, partagés entre requêtes jusqu'à modification"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        self.user.profile
+
+    def user_queries(self, context):
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'auth_user' in query['sql'] or 'accounts_userprofile' in query['sql']
+        ]
+
+    def test_user_and_profile_loaded_in_one_query(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('profile'))
+        (query,) = self.user_queries(context)
+        self.assertIn('JOIN "accounts_userprofile"', query)
+        self.assertEqual(response.context['user'].profile.level, 'beginner')
+
+        # Requête suivante: servi par le cache
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('profile'))
+        self.assertEqual(self.user_queries(context), [])
+
+    def test_profile_save_invalidates_cache(self):
+        backend = ProfileModelBackend()
+        self.assertEqual(backend.get_user(self.user.pk).profile.points, 0)
+        profile = UserProfile.objects.get(user=self.user)
+        profile.bio = 'Étudiant'
+        profile.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_user(self.user.pk).profile.bio, 'Étudiant')
+        with self.assertNumQueries(0):
+            backend.get_user(self.user.pk)
+
+    def test_user_save_and_delete_invalidate_cache(self):
+        backend = ProfileModelBackend()
+        self.assertIsNotNone(backend.get_user(self.user.pk))
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+        other = User.objects.create_user('other')
+        self.assertIsNotNone(backend.get_user(other.pk))
+        other_id = other.pk
+        other.delete()
+        self.assertIsNone(backend.get_user(other_id))
+
+    def test_cache_is_off_by_default_with_a_per_process_backend(self):
+        from sociology_ai import settings as project_settings
+        # LocMemCache: une invalidation ne serait visible que du processus qui l'émet
+        self.assertIn(project_settings.CACHES['default']['BACKEND'], project_settings.LOCAL_CACHE_BACKENDS)
+        self.assertEqual(project_settings.USER_PROFILE_CACHE_TIMEOUT, 0)
+
+    def test_cache_can_be_disabled(self):
+        with self.settings(USER_PROFILE_CACHE_TIMEOUT=0):
+            AuthenticatedUserCache.get(self.user.pk)
+            with self.assertNumQueries(1):
+                self.assertEqual(AuthenticatedUserCache.get(self.user.pk).profile.pk, self.user.profile.pk)
+
+
+class PointsLedgerTests(TestCase):
+    """Points attribués par le registre: incréments atomiques, compactage et classement précalculé"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+
+    def test_award_increments_atomically(self):
+        stale = self.user.profile
+        PointsEvent.objects.award(User.objects.get(pk=self.user.pk), 10, 'quiz')
+        PointsEvent.objects.award(self.user, 5, 'exercise')
+        # Profil chargé sur l'utilisateur: mis à jour en mémoire par le seul incrément connu
+        self.assertEqual(stale.points, 5)
+        # Un profil chargé avant les incréments ne réécrit pas l'ancien total
+        stale.bio = 'Étudiant'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual((stale.points, stale.bio), (15, 'Étudiant'))
+        self.assertEqual(PointsEvent.objects.totals(), {self.user.pk: 15})
+
+    def test_award_creates_missing_profile_and_invalidates_cached_user(self):
+        backend = ProfileModelBackend()
+        PointsEvent.objects.award(self.user, 7, 'course')
+        self.assertEqual(backend.get_user(self.user.pk).profile.points, 7)
+        PointsEvent.objects.award(self.user, 3, 'quiz')
+        self.assertEqual(backend.get_user(self.user.pk).profile.points, 10)
+
+    def test_compaction_keeps_totals(self):
+        PointsEvent.objects.award(self.user, 10, 'quiz')
+        PointsEvent.objects.award(self.user, -2, 'adjustment')
+        PointsEvent.objects.award(self.user, 4, 'exercise')
+        PointsEvent.objects.update(created_at=timezone.now() - timedelta(days=60))
+        PointsEvent.objects.award(self.user, 1, 'quiz')
+
+        out = StringIO()
+        call_command('compact_points_ledger', stdout=out)
+        self.assertIn('1 utilisateurs compactés, 2 événements supprimés', out.getvalue())
+        self.assertEqual(
+            sorted(PointsEvent.objects.values_list('reason', 'amount')),
+            [('compaction', 12), ('quiz', 1)]
+        )
+        call_command('compact_points_ledger', check=True, stdout=StringIO())
+        self.assertEqual(UserProfile.objects.get(user=self.user).points, 13)
+
+    def test_check_reports_drift(self):
+        PointsEvent.objects.award(self.user, 10, 'quiz')
+        UserProfile.objects.filter(user=self.user).update(points=3)
+        with self.assertRaisesMessage(CommandError, '1 totaux de points incohérents'):
+            call_command('compact_points_ledger', check=True, stdout=StringIO())
+
+    def test_rebuild_leaderboard(self):
+        for i, points in enumerate([30, 50, 0, 50]):
+            PointsEvent.objects.award(User.objects.create_user(f'player{i}'), points, 'quiz')
+        call_command('rebuild_leaderboard', size=2, stdout=StringIO())
+        self.assertEqual(
+            [(entry.rank, entry.user.username, entry.points) for entry in LeaderboardEntry.objects.top(10)],
+            [(1, 'player1', 50), (2, 'player3', 50)]
+        )
+        call_command('rebuild_leaderboard', stdout=StringIO())
+        self.assertEqual(LeaderboardEntry.objects.count(), 3)
+
+
+class ProgressRecordingTests(TestCase):
+    """Progression enregistrée par lot: regroupée, jamais diminuée, en un seul upsert"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('learner', password='secret')
+
+    def progress(self):
+        return set(Historique.objects.filter(user=self.user).values_list(
+            'content_type', 'content_id', 'progress', 'completed'
+        ))
+
+    def test_batch_is_coalesced_and_upserted_once(self):
+        Historique.objects.create(user=self.user, content_type='video', content_id=1, progress=80)
+        with CaptureQueriesContext(connection) as context:
+            count = Historique.objects.record_progress(self.user, [
+                ('video', 1, 30, False),
+                ('quiz', 2, 40, False),
+                ('quiz', 2, 20, True),
+                ('exercise', 3, 100, False),
+            ])
+        self.assertEqual(count, 3)
+        inserts = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "accounts_historique"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('ON CONFLICT', inserts[0])
+        self.assertEqual(self.progress(), {
+            ('video', 1, 80, False),
+            ('quiz', 2, 40, True),
+            ('exercise', 3, 100, True),
+        })
+
+    def test_completed_content_stays_completed(self):
+        Historique.objects.record_progress(self.user, [('course', 5, 100, True)])
+        Historique.objects.record_progress(self.user, [('course', 5, 10, False)])
+        self.assertEqual(self.progress(), {('course', 5, 100, True)})
+
+    @override_settings(POINTS_PER_COMPLETION={'quiz': 20, 'exercise': 10, 'course': 50})
+    def test_completions_award_points_through_the_ledger(self):
+        Historique.objects.record_progress(self.user, [
+            ('quiz', 2, 100, False), ('quiz', 3, 50, True), ('exercise', 4, 100, True),
+            ('video', 5, 100, True), ('quiz', 6, 40, False),
+        ])
+        # Déjà complétés: aucun nouveau point
+        Historique.objects.record_progress(self.user, [('quiz', 2, 100, True), ('exercise', 4, 100, True)])
+        Historique.objects.record_progress(self.user, [('quiz', 6, 100, False)])
+        self.assertEqual(
+            sorted(PointsEvent.objects.filter(user=self.user).values_list('reason', 'amount')),
+            [('exercise', 10), ('quiz', 20), ('quiz', 40)],
+        )
+        self.assertEqual(UserProfile.objects.get(user=self.user).points, 70)
+        LeaderboardEntry.objects.rebuild(size=10)
+        self.assertEqual(LeaderboardEntry.objects.get(user=self.user).points, 70)
+
+    def test_api_reports_invalid_events(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('record_progress_api'), json.dumps({'events': [
+            {'content_type': 'video', 'content_id': 1, 'progress': 50},
+            {'content_type': 'forum', 'content_id': 1, 'progress': 50},
+            {'content_type': 'quiz', 'content_id': 2, 'progress': 150},
+            {'content_type': 'quiz', 'content_id': 'abc'},
+            {'content_type': 'quiz', 'content_id': float('inf')},
+            {'content_type': 'quiz', 'content_id': 2 ** 63},
+            {'content_type': 'quiz', 'content_id': True},
+            {'content_type': 'quiz', 'content_id': 2, 'progress': 50.5},
+            {'content_type': 'quiz', 'content_id': 2, 'progress': float('inf')},
+        ]}), content_type='application/json')
+        data = response.json()
+        self.assertEqual(
+            (data['count'], [error['index'] for error in data['errors']]), (1, [1, 2, 3, 4, 5, 6, 7, 8])
+        )
+        self.assertEqual(self.progress(), {('video', 1, 50, False)})
+
+        response = self.client.post(
+            reverse('record_progress_api'), json.dumps({'events': []}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class AccountViewPerformanceTests(PerformanceTestCase):
+    """Budgets de requêtes de l'inscription, de la connexion et du profil"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+        cls.user.profile  # Profil créé au premier accès: mesures hors création
+        Historique.objects.bulk_create([
+            Historique(user=cls.user, content_type='video', content_id=i, progress=i % 100, completed=i % 2 == 0)
+            for i in range(3000)
+        ])
+        players = User.objects.bulk_create([User(username=f'player{i}') for i in range(300)])
+        UserProfile.objects.bulk_create([UserProfile(user=player, points=i) for i, player in enumerate(players)])
+        LeaderboardEntry.objects.rebuild(100)
+
+    def test_register(self):
+        self.assertWithinBudget('get', reverse('register'), max_queries=2)
+        self.assertWithinBudget(
+            'post', reverse('register'), max_queries=11, status_code=302,
+            data={'username': 'newcomer', 'password1': 'Un-mot-de-passe-42', 'password2': 'Un-mot-de-passe-42'}
+        )
+
+    def test_login(self):
+        self.assertWithinBudget('get', reverse('login'), max_queries=2)
+        self.assertWithinBudget(
+            'post', reverse('login'), max_queries=9, status_code=302,
+            data={'username': 'learner', 'password': 'secret'}
+        )
+
+    def test_logout(self):
+        self.client.force_login(self.user)
+        self.assertWithinBudget('get', reverse('logout'), max_queries=4, status_code=302)
+
+    def test_profile(self):
+        self.client.force_login(self.user)
+        self.assertWithinBudget('get', reverse('profile'), max_queries=4)
+
+    def test_edit_profile(self):
+        self.client.force_login(self.user)
+        self.assertWithinBudget('get', reverse('edit_profile'), max_queries=3)
+        self.assertWithinBudget(
+            'post', reverse('edit_profile'), max_queries=2, status_code=302,
+            data={'bio': 'Étudiant en sociologie', 'level': 'intermediate'}
+        )
+
+    def test_record_progress_api(self):
+        self.client.force_login(self.user)
+        events = [
+            {'content_type': 'video', 'content_id': i % 250, 'progress': i % 100, 'completed': i % 7 == 0}
+            for i in range(1, 501)
+        ]
+        # Lecture des historiques existants puis upsert (250 contenus: deux INSERT sous la
+        # limite de paramètres de SQLite), sans requête par événement
+        self.assertWithinBudget(
+            'post', reverse('record_progress_api'), max_queries=7,
+            data=json.dumps({'events': events}), content_type='application/json'
+        )
+
+    def test_leaderboard(self):
+        self.client.force_login(User.objects.get(username='player250'))
+        response = self.assertWithinBudget('get', reverse('leaderboard'), max_queries=4)
+        self.assertEqual(len(response.context['entries']), 100)
+        self.assertEqual(response.context['own_entry'].rank, 50)
+        # Utilisateur absent des premiers rangs: une requête sur l'index unique de user
+        self.client.force_login(self.user)
+        response = self.assertWithinBudget('get', reverse('leaderboard'), max_queries=5)
+        self.assertIsNone(response.context['own_entry'])
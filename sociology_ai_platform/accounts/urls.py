@@ -7,5 +7,7 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('progress/api/', views.record_progress_api, name='record_progress_api'),
 ]
 
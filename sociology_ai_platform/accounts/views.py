@@ -3,7 +3,11 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import UserProfile, Historique
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+import json
+from .models import LeaderboardEntry, UserProfile, Historique
 from content.models import Course
 
 def register(request):
@@ -54,6 +58,82 @@ def edit_profile(request):
         return redirect('profile')
     return render(request, 'accounts/edit_profile.html', {'profile': profile})
 
+@login_required
+def leaderboard(request):
+    """Classement précalculé (rebuild_leaderboard): lecture des premiers rangs, sans tri des profils"""
+    entries = list(LeaderboardEntry.objects.top(getattr(settings, 'LEADERBOARD_SIZE', 100)))
+    own_entry = next((entry for entry in entries if entry.user_id == request.user.id), None)
+    if own_entry is None:
+        own_entry = LeaderboardEntry.objects.filter(user=request.user).first()
+    return render(request, 'accounts/leaderboard.html', {
+        'entries': entries,
+        'own_entry': own_entry,
+    })
+
+# Plus grand identifiant accepté par Historique.content_id (IntegerField)
+MAX_CONTENT_ID = 2147483647
+
+@login_required
+@require_http_methods(["POST"])
+def record_progress_api(request):
+    """
+    API d'envoi par lot de la progression (pages vidéo, quiz et exercice)
+    Corps attendu: {"events": [{"content_type", "content_id", "progress", "completed"}, ...]}
+    Les événements invalides sont ignorés et signalés dans "errors".
+    """
+    try:
+        data = json.loads(request.body)
+        events = data.get('events')
+        if not isinstance(events, list) or not events:
+            raise ValueError('Le champ "events" doit être une liste non vide.')
+        max_events = getattr(settings, 'PROGRESS_BATCH_MAX_EVENTS', 500)
+        if len(events) > max_events:
+            raise ValueError(f'Un lot ne peut pas contenir plus de {max_events} événements.')
+    except (ValueError, TypeError, AttributeError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    valid_types = {choice for choice, _ in Historique._meta.get_field('content_type').choices}
+    updates = []
+    errors = []
+    for index, event in enumerate(events):
+        try:
+            if not isinstance(event, dict):
+                raise ValueError('Événement invalide.')
+            content_type = event.get('content_type')
+            if content_type not in valid_types:
+                raise ValueError(f'Type de contenu invalide: {content_type}')
+            # Entiers JSON uniquement (ni booléen ni flottant), dans la plage des colonnes
+            content_id = event.get('content_id')
+            if type(content_id) is not int or not 0 < content_id <= MAX_CONTENT_ID:
+                raise ValueError(f'Identifiant de contenu invalide: {content_id}')
+            progress = event.get('progress', 0)
+            if type(progress) is not int or not 0 <= progress <= 100:
+                raise ValueError('La progression doit être un entier compris entre 0 et 100.')
+            completed = event.get('completed', False)
+            if not isinstance(completed, bool):
+                raise ValueError('"completed" doit être un booléen.')
+        except (ValueError, TypeError, OverflowError) as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        updates.append((content_type, content_id, progress, completed))
+
+    if not updates:
+        return JsonResponse({
+            'success': False,
+            'error': 'Aucun événement valide.',
+            'errors': errors
+        }, status=400)
+
+    count = Historique.objects.record_progress(request.user, updates)
+    return JsonResponse({
+        'success': True,
+        'count': count,
+        'errors': errors,
+    })
+
 def logout_view(request):
     """Vue personnalisée pour la déconnexion avec message de confirmation"""
     logout(request)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Recommendation, EmotionData
+from .models import Recommendation, EmotionData, CoursePopularity, EmotionRollup
 
 @admin.register(Recommendation)
 class RecommendationAdmin(admin.ModelAdmin):
@@ -12,3 +12,14 @@ class EmotionDataAdmin(admin.ModelAdmin):
     list_display = ['user', 'emotion_type', 'intensity', 'context', 'recorded_at']
     list_filter = ['emotion_type', 'recorded_at']
     search_fields = ['user__username', 'context']
+
+@admin.register(CoursePopularity)
+class CoursePopularityAdmin(admin.ModelAdmin):
+    list_display = ['course', 'learner_count', 'updated_at']
+    search_fields = ['course__title']
+
+@admin.register(EmotionRollup)
+class EmotionRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'granularity', 'bucket_start', 'emotion_type', 'count', 'intensity_sum']
+    list_filter = ['granularity', 'emotion_type', 'bucket_start']
+    search_fields = ['user__username']
@@ -4,11 +4,17 @@ Services d'intelligence artificielle pour la plateforme
 - Recommandations personnalisées
 - Analyse de l'état d'apprentissage
 """
+import heapq
 import random
+from operator import itemgetter
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Avg, Count, Q
-from .models import Recommendation, EmotionData
+from .models import Recommendation, EmotionData, CoursePopularity
+from .cache import CompletedCourseCache, LearningStateCache
 from content.models import Course
-from accounts.models import Historique, UserProfile
+from accounts.models import UserProfile
+from social.notifications import NotificationService
 
 
 class EmotionRecognitionService:
@@ -19,10 +25,13 @@ class EmotionRecognitionService:
         """
         Analyse l'état d'apprentissage de l'utilisateur basé sur ses émotions récentes
         Retourne un dictionnaire avec l'état d'apprentissage
+        
+        Les 10 dernières émotions sont lues depuis LearningStateCache (fenêtre
+        glissante mise à jour à chaque nouvelle émotion).
         """
-        recent_emotions = EmotionData.objects.filter(user=user).order_by('-recorded_at')[:10]
+        recent_emotions = LearningStateCache.get_window(user)
         
-        if not recent_emotions.exists():
+        if not recent_emotions:
             return {
                 'state': 'unknown',
                 'optimal_time': False,
@@ -31,12 +40,12 @@ class EmotionRecognitionService:
             }
         
         # Calculer la moyenne des intensités
-        avg_intensity = recent_emotions.aggregate(Avg('intensity'))['intensity__avg'] or 0.5
+        avg_intensity = sum(intensity for _, intensity in recent_emotions) / len(recent_emotions) or 0.5
         
         # Analyser les types d'émotions les plus fréquents
         emotion_counts = {}
-        for emotion in recent_emotions:
-            emotion_counts[emotion.emotion_type] = emotion_counts.get(emotion.emotion_type, 0) + 1
+        for emotion_type, _ in recent_emotions:
+            emotion_counts[emotion_type] = emotion_counts.get(emotion_type, 0) + 1
         
         dominant_emotion = max(emotion_counts.items(), key=lambda x: x[1])[0] if emotion_counts else 'neutral'
         
@@ -60,7 +69,7 @@ class EmotionRecognitionService:
             'suggested_action': suggestions.get(dominant_emotion, 'Continuez votre apprentissage'),
             'mood': dominant_emotion,
             'intensity': avg_intensity,
-            'recent_count': recent_emotions.count()
+            'recent_count': len(recent_emotions)
         }
     
     @staticmethod
@@ -86,7 +95,7 @@ class AIRecommendationService:
     """Service de recommandation basé sur l'IA"""
     
     @staticmethod
-    def generate_recommendations(user, limit=5):
+    def generate_recommendations(user, limit=5, top_k=None):
         """
         Génère des recommandations personnalisées pour l'utilisateur
         Basé sur:
@@ -94,51 +103,113 @@ class AIRecommendationService:
         - Niveau de l'utilisateur
         - Émotions récentes
         - Cours non complétés
+        
+        Si `top_k` (ou settings.RECOMMENDATION_TOP_K) est défini, seules les
+        `top_k` meilleures recommandations sont conservées: elles remplacent
+        atomiquement les recommandations non vues précédentes de l'utilisateur.
         """
+        if top_k is None:
+            top_k = getattr(settings, 'RECOMMENDATION_TOP_K', None)
+        
         profile = user.profile
-        completed_courses = Historique.objects.filter(
-            user=user, 
-            content_type='course', 
-            completed=True
-        ).values_list('content_id', flat=True)
+        completed_courses = CompletedCourseCache.get(user.id)
         
-        # Obtenir les cours non complétés
-        available_courses = Course.objects.exclude(id__in=completed_courses)
+        # Obtenir les cours non complétés (filtrés en mémoire, sans anti-jointure NOT IN)
+        available_courses = [course for course in Course.objects.all() if course.id not in completed_courses]
         
-        if not available_courses.exists():
+        if not available_courses:
             return []
         
         # Analyser l'état d'apprentissage
         learning_state = EmotionRecognitionService.analyze_learning_state(user)
         
-        recommendations = []
-        for course in available_courses:
-            score = AIRecommendationService._calculate_recommendation_score(
-                user, course, profile, learning_state
-            )
-            
-            # Créer ou mettre à jour la recommandation
-            recommendation, created = Recommendation.objects.update_or_create(
+        # Calculer tous les scores en mémoire à partir des compteurs de popularité.
+        # Popularité = apprenants du cours: en mode top-K, seuls les cours retenus ont une
+        # recommandation, et un bonus lié à ce nombre figerait les mêmes K cours pour tous.
+        popularity = CoursePopularity.objects.learner_map()
+        scored_courses = [
+            (AIRecommendationService._calculate_recommendation_score(
+                user, course, profile, learning_state, popularity=popularity.get(course.id, 0)
+            ), course)
+            for course in available_courses
+        ]
+        
+        # Sélection des K meilleurs par tas (O(n log k)) plutôt qu'un tri complet
+        if top_k:
+            scored_courses = heapq.nlargest(top_k, scored_courses, key=itemgetter(0))
+        
+        recommendations = [
+            Recommendation(
                 user=user,
                 course=course,
-                defaults={
-                    'score': score,
-                    'reason': AIRecommendationService._generate_reason(
-                        course, profile, learning_state, score
-                    ),
-                    'viewed': False
-                }
+                score=score,
+                reason=AIRecommendationService._generate_reason(
+                    course, profile, learning_state, score
+                ),
+                viewed=False
             )
-            recommendations.append(recommendation)
+            for score, course in scored_courses
+        ]
+        
+        # Créer ou mettre à jour toutes les recommandations en un seul lot;
+        # en mode top-K, l'ensemble non vu précédent est remplacé atomiquement
+        AIRecommendationService._persist_recommendations(
+            user, recommendations, replace_unviewed=bool(top_k)
+        )
         
         # Trier par score et retourner les meilleures
         recommendations.sort(key=lambda x: x.score, reverse=True)
         return recommendations[:limit]
     
     @staticmethod
-    def _calculate_recommendation_score(user, course, profile, learning_state):
+    def _persist_recommendations(user, recommendations, replace_unviewed=False):
+        """
+        Enregistre un lot de recommandations et notifie les nouveaux cours
+        Si `replace_unviewed`, les recommandations non vues absentes du lot sont supprimées
+        """
+        selected = {rec.course_id for rec in recommendations}
+        with transaction.atomic():
+            rows = list(
+                Recommendation.objects.filter(user=user).values_list('course_id', 'viewed', 'created_at')
+            )
+            existing = {course_id: viewed for course_id, viewed, _ in rows}
+            last_generated = max((created_at for _, _, created_at in rows), default=None)
+            if replace_unviewed:
+                stale = [course_id for course_id, viewed in existing.items()
+                         if not viewed and course_id not in selected]
+                if stale:
+                    Recommendation.objects.filter(
+                        user=user, viewed=False, course_id__in=stale
+                    ).delete()
+            AIRecommendationService._bulk_upsert_recommendations(recommendations)
+            # Le top-K est remanié à chaque rafraîchissement: un cours absent des lignes
+            # existantes a souvent déjà été recommandé. Seuls les cours publiés depuis le
+            # dernier calcul (ou le premier calcul) donnent lieu à une notification.
+            NotificationService.notify_new_recommendations(user, [
+                rec for rec in recommendations
+                if rec.course_id not in existing
+                and (last_generated is None or rec.course.created_at > last_generated)
+            ])
+    
+    @staticmethod
+    def _bulk_upsert_recommendations(recommendations):
+        """
+        Insère ou met à jour des recommandations avec un seul INSERT ... ON CONFLICT
+        """
+        return Recommendation.objects.bulk_create(
+            recommendations,
+            update_conflicts=True,
+            unique_fields=['user', 'course'],
+            update_fields=['score', 'reason', 'viewed']
+        )
+    
+    @staticmethod
+    def _calculate_recommendation_score(user, course, profile, learning_state, popularity=None):
         """
         Calcule un score de recommandation (0-1) pour un cours
+        
+        `popularity` est le nombre d'apprenants du cours; s'il n'est pas
+        fourni (appel unitaire), il est lu dans le compteur CoursePopularity.
         """
         score = 0.5  # Score de base
         
@@ -154,9 +225,12 @@ class AIRecommendationService:
         if learning_state.get('optimal_time', False):
             score += 0.2
         
-        # Facteur 3: Popularité du cours (basé sur le nombre de recommandations)
-        course_recommendations = Recommendation.objects.filter(course=course).count()
-        popularity_factor = min(course_recommendations / 10, 0.1)  # Max 0.1
+        # Facteur 3: Popularité du cours (basé sur le nombre d'apprenants)
+        if popularity is None:
+            popularity = CoursePopularity.objects.filter(course=course).values_list(
+                'learner_count', flat=True
+            ).first() or 0
+        popularity_factor = min(popularity / 10, 0.1)  # Max 0.1
         score += popularity_factor
         
         # Facteur 4: Nouveauté (cours récents)
@@ -229,17 +303,7 @@ class AIRecommendationService:
         """
         Retourne des cours recommandés basés sur l'émotion détectée
         """
-        completed_courses = Historique.objects.filter(
-            user=user, 
-            content_type='course', 
-            completed=True
-        ).values_list('content_id', flat=True)
-        
-        # Obtenir les cours non complétés
-        available_courses = Course.objects.exclude(id__in=completed_courses)
-        
-        if not available_courses.exists():
-            return []
+        completed_courses = CompletedCourseCache.get(user.id)
         
         # Mapping émotion -> difficulté recommandée
         emotion_to_difficulty = {
@@ -254,36 +318,50 @@ class AIRecommendationService:
         # Obtenir les difficultés recommandées pour cette émotion
         recommended_difficulties = emotion_to_difficulty.get(emotion_type, ['beginner', 'intermediate'])
         
-        # Filtrer les cours par difficulté recommandée
-        recommended_courses = available_courses.filter(difficulty__in=recommended_difficulties)
+        # Filtrer les cours (non complétés) par difficulté recommandée
+        recommended_courses = AIRecommendationService._first_available(
+            Course.objects.filter(difficulty__in=recommended_difficulties), completed_courses, limit * 2
+        )
         
         # Si pas assez de cours, inclure tous les cours disponibles
-        if recommended_courses.count() < limit:
-            recommended_courses = available_courses
+        if len(recommended_courses) < limit:
+            recommended_courses = AIRecommendationService._first_available(
+                Course.objects.all(), completed_courses, limit * 2
+            )
+        
+        if not recommended_courses:
+            return []
         
         # Générer des recommandations avec scores
         recommendations = []
-        for course in recommended_courses[:limit * 2]:  # Prendre plus pour trier
+        for course in recommended_courses:  # Prendre plus pour trier
             score = AIRecommendationService._calculate_emotion_based_score(
                 course, emotion_type, recommended_difficulties
             )
-            
-            # Créer ou mettre à jour la recommandation
-            recommendation, created = Recommendation.objects.update_or_create(
+            recommendations.append(Recommendation(
                 user=user,
                 course=course,
-                defaults={
-                    'score': score,
-                    'reason': AIRecommendationService._generate_emotion_reason(emotion_type, course),
-                    'viewed': False
-                }
-            )
-            recommendations.append(recommendation)
+                score=score,
+                reason=AIRecommendationService._generate_emotion_reason(emotion_type, course),
+                viewed=False
+            ))
+        
+        # Créer ou mettre à jour les recommandations en un seul lot
+        AIRecommendationService._persist_recommendations(user, recommendations)
         
         # Trier par score et retourner les meilleures
         recommendations.sort(key=lambda x: x.score, reverse=True)
         return recommendations[:limit]
     
+    @staticmethod
+    def _first_available(courses, completed_courses, count):
+        """
+        Les `count` premiers cours non complétés: une requête bornée par le nombre de
+        cours complétés, filtrée en mémoire
+        """
+        candidates = courses[:count + len(completed_courses)]
+        return [course for course in candidates if course.id not in completed_courses][:count]
+    
     @staticmethod
     def _calculate_emotion_based_score(course, emotion_type, recommended_difficulties):
         """
@@ -0,0 +1,153 @@
+"""
+Caches applicatifs de l'analytique (framework de cache Django)
+- Fenêtre glissante des émotions récentes par utilisateur
+- Cours complétés par utilisateur (exclusion des recommandations)
+"""
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from accounts.models import Historique
+from .models import EmotionData
+
+
+class LearningStateCache:
+    """
+    Conserve, par utilisateur, les dernières émotions (type, intensité) du plus
+    récent au plus ancien. La fenêtre est chargée en une requête lors d'un défaut
+    de cache puis mise à jour incrémentalement à chaque nouvelle émotion.
+    """
+
+    WINDOW_SIZE = 10
+    KEY_PREFIX = 'learning_state'
+    HITS_KEY = f'{KEY_PREFIX}:hits'
+    MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+    @staticmethod
+    def _key(user_id):
+        return f'{LearningStateCache.KEY_PREFIX}:window:{user_id}'
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'LEARNING_STATE_CACHE_TIMEOUT', 3600)
+
+    @staticmethod
+    def _incr(key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    @staticmethod
+    def get_window(user):
+        """Retourne la fenêtre d'émotions récentes [(emotion_type, intensity), ...]"""
+        key = LearningStateCache._key(user.pk)
+        window = cache.get(key)
+        if window is not None:
+            LearningStateCache._incr(LearningStateCache.HITS_KEY)
+            return window
+
+        LearningStateCache._incr(LearningStateCache.MISSES_KEY)
+        window = list(
+            EmotionData.objects.filter(user=user).order_by('-recorded_at')
+            .values_list('emotion_type', 'intensity')[:LearningStateCache.WINDOW_SIZE]
+        )
+        cache.set(key, window, LearningStateCache._timeout())
+        return window
+
+    @staticmethod
+    def push(user_id, samples):
+        """
+        Ajoute des émotions (du plus ancien au plus récent) à la fenêtre en cache.
+        Si la fenêtre n'est pas en cache, elle sera chargée à la prochaine lecture.
+        """
+        key = LearningStateCache._key(user_id)
+        window = cache.get(key)
+        if window is None:
+            return
+        window = [(emotion_type, intensity) for emotion_type, intensity in reversed(samples)] + window
+        cache.set(key, window[:LearningStateCache.WINDOW_SIZE], LearningStateCache._timeout())
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(LearningStateCache._key(user_id))
+
+    @staticmethod
+    def stats():
+        """Retourne les compteurs de succès/défauts du cache"""
+        hits = cache.get(LearningStateCache.HITS_KEY, 0)
+        misses = cache.get(LearningStateCache.MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+    @staticmethod
+    def reset_stats():
+        cache.delete_many([LearningStateCache.HITS_KEY, LearningStateCache.MISSES_KEY])
+
+
+class CompletedCourseCache:
+    """
+    Identifiants des cours complétés par un utilisateur, conservés en tableau trié
+    d'entiers (array, compact une fois sérialisé). Chargé en une requête lors d'un
+    défaut de cache puis mis à jour incrémentalement quand un historique de cours passe
+    à completed (voir les récepteurs d'analytics.models), après validation de la transaction.
+    """
+
+    KEY_PREFIX = 'completed_courses'
+
+    @staticmethod
+    def _key(user_id):
+        return f'{CompletedCourseCache.KEY_PREFIX}:{user_id}'
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'COMPLETED_COURSES_CACHE_TIMEOUT', 3600)
+
+    @staticmethod
+    def _ids(user_id):
+        key = CompletedCourseCache._key(user_id)
+        ids = cache.get(key)
+        if ids is None:
+            ids = array('q', sorted(
+                Historique.objects.filter(user_id=user_id, content_type='course', completed=True)
+                .values_list('content_id', flat=True)
+            ))
+            cache.set(key, ids, CompletedCourseCache._timeout())
+        return ids
+
+    @staticmethod
+    def get(user_id):
+        """Ensemble des id de cours complétés (pour filtrer les candidats en mémoire)"""
+        return frozenset(CompletedCourseCache._ids(user_id))
+
+    @staticmethod
+    def count(user_id):
+        return len(CompletedCourseCache._ids(user_id))
+
+    @staticmethod
+    def update(user_id, completed=(), uncompleted=()):
+        """
+        Applique des changements d'état après validation de la transaction en cours.
+        Si l'ensemble n'est pas en cache, il sera chargé à la prochaine lecture.
+        """
+        def apply():
+            key = CompletedCourseCache._key(user_id)
+            ids = cache.get(key)
+            if ids is None:
+                return
+            ids = set(ids).union(completed).difference(uncompleted)
+            cache.set(key, array('q', sorted(ids)), CompletedCourseCache._timeout())
+
+        if completed or uncompleted:
+            transaction.on_commit(apply)
+
+    @staticmethod
+    def invalidate(user_id):
+        key = CompletedCourseCache._key(user_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
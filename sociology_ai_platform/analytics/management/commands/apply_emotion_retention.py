@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.cache import LearningStateCache
+from analytics.models import EmotionData, EmotionRollup
+from analytics.rollups import EmotionRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Applique la politique de rétention des données émotionnelles: les données brutes "
+        "plus anciennes que N jours sont agrégées puis supprimées par lots"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'EMOTION_RAW_RETENTION_DAYS', 30),
+            help="Nombre de jours de données brutes conservées",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Nombre maximal de lignes supprimées par transaction",
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help="Pause (secondes) entre deux lots pour laisser passer les autres écritures",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche le nombre de lignes concernées sans rien modifier",
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] <= 0:
+            raise CommandError("--days doit être >= 1 et --batch-size strictement positif.")
+
+        started = time.monotonic()
+        # Limite alignée sur un début de jour pour que les agrégats journaliers restent complets
+        cutoff = EmotionRollupService.truncate(timezone.now() - timedelta(days=options['days']), 'day')
+        expired = EmotionData.objects.filter(recorded_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} données brutes antérieures au {cutoff:%Y-%m-%d} à supprimer.")
+            return
+
+        # Sous-échantillonnage: garantir que les agrégats couvrent les données supprimées.
+        # Maintenus à l'insertion, ils ne sont recalculés que pour les jours incomplets,
+        # un jour par transaction.
+        days_rebuilt, rollups_written = EmotionRollupService.rebuild_missing(
+            cutoff, batch_size=options['batch_size'], pause=options['pause']
+        )
+
+        raw_deleted = 0
+        affected_users = set()
+        while True:
+            batch = list(expired.order_by('id').values_list('id', 'user_id')[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                deleted, _ = EmotionData.objects.filter(id__in=[row[0] for row in batch]).delete()
+            raw_deleted += deleted
+            affected_users.update(row[1] for row in batch)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        for user_id in affected_users:
+            LearningStateCache.invalidate(user_id)
+
+        rollups_deleted = self._prune_rollups(options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{raw_deleted} données brutes supprimées (avant le {cutoff:%Y-%m-%d}), "
+            f"{rollups_written} agrégats recalculés ({days_rebuilt} jours), {rollups_deleted} agrégats expirés supprimés "
+            f"en {time.monotonic() - started:.2f}s."
+        ))
+
+    @staticmethod
+    def _prune_rollups(batch_size):
+        """Supprime les agrégats fins au-delà de leur durée de conservation"""
+        retention = getattr(settings, 'EMOTION_ROLLUP_RETENTION_DAYS', {})
+        deleted_total = 0
+        for granularity, days in retention.items():
+            if days is None:
+                continue
+            expired = EmotionRollup.objects.filter(
+                granularity=granularity,
+                bucket_start__lt=timezone.now() - timedelta(days=days),
+            )
+            while True:
+                ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    deleted, _ = EmotionRollup.objects.filter(id__in=ids).delete()
+                deleted_total += deleted
+        return deleted_total
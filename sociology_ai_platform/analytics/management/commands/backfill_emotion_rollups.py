@@ -0,0 +1,37 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import EmotionRollupService
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les agrégats EmotionRollup à partir des données émotionnelles brutes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help="Date de début (AAAA-MM-JJ); par défaut, la plus ancienne donnée brute",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Nombre d'agrégats écrits par requête",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError("--since doit être au format AAAA-MM-JJ.")
+
+        started = time.monotonic()
+        written = EmotionRollupService.rebuild(since=since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} agrégats reconstruits en {time.monotonic() - started:.2f}s."
+        ))
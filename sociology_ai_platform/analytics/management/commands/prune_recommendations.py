@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+
+from analytics.models import Recommendation
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime par lots les recommandations non vues au-delà des K meilleures "
+        "de chaque utilisateur"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=getattr(settings, 'RECOMMENDATION_TOP_K', None) or 20,
+            help="Nombre de recommandations non vues à conserver par utilisateur",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre maximal de lignes supprimées par transaction",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche le nombre de lignes à supprimer sans rien modifier",
+        )
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        batch_size = options['batch_size']
+        if keep < 0 or batch_size <= 0:
+            raise CommandError("--keep doit être positif et --batch-size strictement positif.")
+
+        oversized_users = list(
+            Recommendation.objects.values('user')
+            .annotate(unviewed=Count('id', filter=Q(viewed=False)))
+            .filter(unviewed__gt=keep)
+            .values_list('user', flat=True)
+        )
+
+        total_deleted = 0
+        pending_ids = []
+        for user_id in oversized_users:
+            pending_ids.extend(
+                Recommendation.objects.filter(user_id=user_id, viewed=False)
+                .order_by('-score', '-created_at')
+                .values_list('id', flat=True)[keep:]
+            )
+            while len(pending_ids) >= batch_size:
+                total_deleted += self._delete_batch(pending_ids[:batch_size], options['dry_run'])
+                pending_ids = pending_ids[batch_size:]
+        if pending_ids:
+            total_deleted += self._delete_batch(pending_ids, options['dry_run'])
+
+        verb = "à supprimer" if options['dry_run'] else "supprimées"
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_deleted} recommandations {verb} (conservées: {keep} par utilisateur)."
+        ))
+
+    @staticmethod
+    def _delete_batch(ids, dry_run):
+        if dry_run:
+            return len(ids)
+        deleted, _ = Recommendation.objects.filter(id__in=ids).delete()
+        return deleted
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from accounts.models import Historique
+from analytics.models import CoursePopularity
+from content.models import Course
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement les compteurs de popularité des cours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Vérifie la cohérence des compteurs sans les modifier (code de sortie non nul si écart)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre de compteurs écrits par requête",
+        )
+
+    def handle(self, *args, **options):
+        learner_counts = dict(
+            Historique.objects.filter(content_type='course').values('content_id')
+            .annotate(count=Count('id')).values_list('content_id', 'count')
+        )
+        current = dict(CoursePopularity.objects.values_list('course_id', 'learner_count'))
+
+        counters = []
+        mismatched = 0
+        for course_id in Course.objects.values_list('id', flat=True).iterator():
+            expected = learner_counts.get(course_id, 0)
+            if current.get(course_id, 0) != expected:
+                mismatched += 1
+                if options['check']:
+                    self.stdout.write(
+                        f"Cours #{course_id}: {current.get(course_id, 0)} apprenants au lieu de {expected}"
+                    )
+            counters.append(CoursePopularity(course_id=course_id, learner_count=expected))
+
+        if options['check']:
+            if mismatched:
+                raise CommandError(f"{mismatched} compteurs de popularité incohérents.")
+            self.stdout.write(self.style.SUCCESS(f"{len(counters)} compteurs cohérents."))
+            return
+
+        with transaction.atomic():
+            CoursePopularity.objects.bulk_create(
+                counters,
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['course'],
+                update_fields=['learner_count', 'updated_at'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(counters)} compteurs reconstruits ({mismatched} corrigés)."
+        ))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_popularity(apps, schema_editor):
+    Course = apps.get_model('content', 'Course')
+    Recommendation = apps.get_model('analytics', 'Recommendation')
+    Historique = apps.get_model('accounts', 'Historique')
+    CoursePopularity = apps.get_model('analytics', 'CoursePopularity')
+
+    recommendation_counts = dict(
+        Recommendation.objects.values('course_id')
+        .annotate(count=Count('id')).values_list('course_id', 'count')
+    )
+    learner_counts = dict(
+        Historique.objects.filter(content_type='course').values('content_id')
+        .annotate(count=Count('id')).values_list('content_id', 'count')
+    )
+    CoursePopularity.objects.bulk_create([
+        CoursePopularity(
+            course_id=course_id,
+            recommendation_count=recommendation_counts.get(course_id, 0),
+            learner_count=learner_counts.get(course_id, 0),
+        )
+        for course_id in Course.objects.values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('analytics', '0001_initial'),
+        ('content', '0003_course_subject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoursePopularity',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='content.course')),
+                ('recommendation_count', models.IntegerField(default=0)),
+                ('learner_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'course popularities',
+            },
+        ),
+        migrations.RunPython(populate_popularity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_emotiondata_recorded_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmotionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Heure'), ('day', 'Jour')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('emotion_type', models.CharField(choices=[('happy', 'Heureux'), ('sad', 'Triste'), ('neutral', 'Neutre'), ('focused', 'Concentré'), ('confused', 'Confus'), ('excited', 'Excité')], max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('intensity_sum', models.FloatField(default=0.0)),
+                ('intensity_min', models.FloatField(default=1.0)),
+                ('intensity_max', models.FloatField(default=0.0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emotion_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-bucket_start'],
+                'unique_together': {('user', 'granularity', 'bucket_start', 'emotion_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_emotionrollup'),
+        ('content', '0003_course_subject'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emotiondata',
+            index=models.Index(fields=['user', '-recorded_at'], name='emotion_user_recorded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(condition=models.Q(('viewed', False)), fields=['user', '-score', '-created_at'], name='rec_user_unviewed_score_idx'),
+        ),
+    ]
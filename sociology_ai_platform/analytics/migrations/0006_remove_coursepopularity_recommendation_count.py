@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='coursepopularity',
+            name='recommendation_count',
+        ),
+    ]
@@ -1,6 +1,13 @@
+from collections import defaultdict
 from django.db import models
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from content.models import Course
+from accounts.models import Historique
+from accounts.signals import progress_recorded
 
 class Recommendation(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
@@ -13,26 +20,182 @@ class Recommendation(models.Model):
     class Meta:
         ordering = ['-score', '-created_at']
         unique_together = ['user', 'course']
+        indexes = [
+            # Recommandations non vues d'un utilisateur, par score décroissant.
+            # Index partiel: Django traduit viewed=False en "NOT viewed", que SQLite
+            # ne sait pas résoudre avec une colonne d'index composite.
+            models.Index(
+                fields=['user', '-score', '-created_at'],
+                condition=Q(viewed=False),
+                name='rec_user_unviewed_score_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Recommandation pour {self.user.username}: {self.course.title}"
 
 class EmotionData(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='emotion_data')
-    emotion_type = models.CharField(max_length=50, choices=[
+    EMOTION_CHOICES = [
         ('happy', 'Heureux'),
         ('sad', 'Triste'),
         ('neutral', 'Neutre'),
         ('focused', 'Concentré'),
         ('confused', 'Confus'),
         ('excited', 'Excité'),
-    ])
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='emotion_data')
+    emotion_type = models.CharField(max_length=50, choices=EMOTION_CHOICES)
     intensity = models.FloatField(default=0.5)  # Intensité de l'émotion (0-1)
     context = models.CharField(max_length=200, blank=True, null=True)  # Contexte (ex: "pendant un quiz")
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # Horodatage fourni par le client pour les envois par lot, sinon l'instant d'insertion
+    recorded_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [
+            # Dernières émotions d'un utilisateur
+            models.Index(fields=['user', '-recorded_at'], name='emotion_user_recorded_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.emotion_type} ({self.intensity})"
+
+
+class CoursePopularityManager(models.Manager):
+    def apply_deltas(self, field, deltas):
+        """
+        Applique des variations {course_id: delta} au compteur `field`
+        avec une requête UPDATE atomique (F()) par valeur de delta distincte
+        """
+        by_delta = defaultdict(list)
+        for course_id, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(course_id)
+        if not by_delta:
+            return
+
+        # Créer les compteurs manquants (uniquement pour des cours existants)
+        course_ids = {course_id for ids in by_delta.values() for course_id in ids}
+        missing = course_ids.difference(
+            self.filter(course_id__in=course_ids).values_list('course_id', flat=True)
+        )
+        if missing:
+            self.bulk_create(
+                [CoursePopularity(course_id=course_id) for course_id in
+                 Course.objects.filter(id__in=missing).values_list('id', flat=True)],
+                ignore_conflicts=True
+            )
+        now = timezone.now()
+        for delta, ids in by_delta.items():
+            self.filter(course_id__in=ids).update(**{
+                field: F(field) + delta,
+                'updated_at': now,
+            })
+
+    def learner_map(self):
+        """Retourne {course_id: nombre d'apprenants} en une seule requête"""
+        return dict(self.values_list('course_id', 'learner_count'))
+
+class CoursePopularity(models.Model):
+    """
+    Compteurs de popularité dénormalisés par cours, maintenus lors des écritures
+    d'Historique (voir la commande rebuild_popularity)
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    learner_count = models.IntegerField(default=0)  # Nombre d'historiques de suivi du cours
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CoursePopularityManager()
+
+    class Meta:
+        verbose_name_plural = 'course popularities'
+
+    def __str__(self):
+        return f"Popularité de {self.course.title}: {self.learner_count}"
+
+@receiver(post_save, sender=Historique)
+def increment_learner_count(sender, instance, created, **kwargs):
+    if created and instance.content_type == 'course':
+        CoursePopularity.objects.apply_deltas('learner_count', {instance.content_id: 1})
+
+@receiver(progress_recorded)
+def count_recorded_learners(sender, created, **kwargs):
+    """Historiques de cours créés par un lot de progression (bulk_create, sans post_save)"""
+    CoursePopularity.objects.apply_deltas('learner_count', {
+        content_id: 1 for content_type, content_id in created if content_type == 'course'
+    })
+
+@receiver(post_save, sender=Historique)
+def update_completed_courses(sender, instance, **kwargs):
+    if instance.content_type == 'course':
+        from .cache import CompletedCourseCache
+        if instance.completed:
+            CompletedCourseCache.update(instance.user_id, completed=[instance.content_id])
+        else:
+            CompletedCourseCache.update(instance.user_id, uncompleted=[instance.content_id])
+
+@receiver(post_delete, sender=User)
+def forget_completed_courses(sender, instance, **kwargs):
+    from .cache import CompletedCourseCache
+    CompletedCourseCache.invalidate(instance.pk)
+
+@receiver(progress_recorded)
+def add_recorded_completed_courses(sender, user, completed, **kwargs):
+    """Cours passés à completed par un lot de progression (la complétion n'est jamais annulée)"""
+    from .cache import CompletedCourseCache
+    CompletedCourseCache.update(user.pk, completed=[
+        content_id for content_type, content_id in completed if content_type == 'course'
+    ])
+
+@receiver(pre_delete, sender=User)
+def release_user_popularity(sender, instance, **kwargs):
+    """Retire les contributions d'un utilisateur supprimé (suppression en cascade)"""
+    CoursePopularity.objects.apply_deltas('learner_count', {
+        course_id: -count for course_id, count in
+        Historique.objects.filter(user=instance, content_type='course').values('content_id')
+        .annotate(count=Count('id')).values_list('content_id', 'count')
+    })
+
+class EmotionRollup(models.Model):
+    """
+    Agrégats des émotions par utilisateur, intervalle de temps et type d'émotion,
+    maintenus à chaque insertion d'EmotionData (voir analytics/rollups.py)
+    """
+    GRANULARITY_CHOICES = [
+        ('minute', 'Minute'),
+        ('hour', 'Heure'),
+        ('day', 'Jour'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='emotion_rollups')
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()  # Début de l'intervalle (fuseau TIME_ZONE)
+    emotion_type = models.CharField(max_length=50, choices=EmotionData.EMOTION_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    intensity_sum = models.FloatField(default=0.0)
+    intensity_min = models.FloatField(default=1.0)
+    intensity_max = models.FloatField(default=0.0)
+
+    class Meta:
+        ordering = ['-bucket_start']
+        unique_together = ['user', 'granularity', 'bucket_start', 'emotion_type']
+
+    @property
+    def intensity_avg(self):
+        return self.intensity_sum / self.count if self.count else 0.0
+
+    def __str__(self):
+        return f"{self.user.username} - {self.emotion_type} ({self.granularity} {self.bucket_start:%Y-%m-%d %H:%M})"
+
+@receiver(post_save, sender=EmotionData)
+def push_learning_state(sender, instance, created, **kwargs):
+    if created:
+        from .cache import LearningStateCache
+        LearningStateCache.push(instance.user_id, [(instance.emotion_type, instance.intensity)])
+
+@receiver(post_save, sender=EmotionData)
+def update_emotion_rollups(sender, instance, created, **kwargs):
+    if created:
+        from .rollups import EmotionRollupService
+        EmotionRollupService.record([instance])
@@ -0,0 +1,231 @@
+"""
+Agrégation des données émotionnelles par intervalles de temps
+- Mise à jour incrémentale des agrégats à chaque insertion
+- Reconstruction depuis les données brutes
+- Requêtes agrégées (émotion dominante sur une période) sans lire EmotionData
+"""
+import time
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+from .models import EmotionData, EmotionRollup
+
+
+class EmotionRollupService:
+    """Service de maintenance et de lecture des agrégats EmotionRollup"""
+
+    TRUNC_FUNCTIONS = {
+        'minute': TruncMinute,
+        'hour': TruncHour,
+        'day': TruncDay,
+    }
+
+    @staticmethod
+    def truncate(moment, granularity):
+        """Début de l'intervalle contenant `moment`, dans le fuseau courant"""
+        local = timezone.localtime(moment)
+        if granularity == 'minute':
+            return local.replace(second=0, microsecond=0)
+        if granularity == 'hour':
+            return local.replace(minute=0, second=0, microsecond=0)
+        return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def record(emotions):
+        """
+        Ajoute des émotions insérées aux agrégats (toutes granularités)
+        en une lecture et un INSERT ... ON CONFLICT
+        """
+        buckets = {}
+        for emotion in emotions:
+            for granularity in EmotionRollupService.TRUNC_FUNCTIONS:
+                key = (
+                    emotion.user_id,
+                    granularity,
+                    EmotionRollupService.truncate(emotion.recorded_at, granularity),
+                    emotion.emotion_type,
+                )
+                EmotionRollupService._merge(buckets, key, 1, emotion.intensity, emotion.intensity, emotion.intensity)
+        if not buckets:
+            return
+
+        with transaction.atomic():
+            existing = EmotionRollup.objects.select_for_update().filter(
+                user_id__in={key[0] for key in buckets},
+                granularity__in={key[1] for key in buckets},
+                bucket_start__in={key[2] for key in buckets},
+                emotion_type__in={key[3] for key in buckets},
+            )
+            for rollup in existing:
+                key = (rollup.user_id, rollup.granularity, rollup.bucket_start, rollup.emotion_type)
+                if key in buckets:
+                    EmotionRollupService._merge(
+                        buckets, key, rollup.count, rollup.intensity_sum,
+                        rollup.intensity_min, rollup.intensity_max
+                    )
+            EmotionRollupService._upsert(buckets)
+
+    @staticmethod
+    def _merge(buckets, key, count, intensity_sum, intensity_min, intensity_max):
+        current = buckets.get(key)
+        if current is None:
+            buckets[key] = [count, intensity_sum, intensity_min, intensity_max]
+            return
+        current[0] += count
+        current[1] += intensity_sum
+        current[2] = min(current[2], intensity_min)
+        current[3] = max(current[3], intensity_max)
+
+    @staticmethod
+    def _upsert(buckets, batch_size=None):
+        EmotionRollup.objects.bulk_create(
+            [
+                EmotionRollup(
+                    user_id=user_id,
+                    granularity=granularity,
+                    bucket_start=bucket_start,
+                    emotion_type=emotion_type,
+                    count=count,
+                    intensity_sum=intensity_sum,
+                    intensity_min=intensity_min,
+                    intensity_max=intensity_max,
+                )
+                for (user_id, granularity, bucket_start, emotion_type),
+                    (count, intensity_sum, intensity_min, intensity_max) in buckets.items()
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'granularity', 'bucket_start', 'emotion_type'],
+            update_fields=['count', 'intensity_sum', 'intensity_min', 'intensity_max'],
+        )
+
+    @staticmethod
+    def rebuild(since=None, until=None, batch_size=1000):
+        """
+        Recalcule les agrégats depuis les données brutes entre le jour de `since`
+        (par défaut, le jour de la plus ancienne émotion brute conservée) et le
+        jour de `until` exclu (par défaut, sans limite).
+        Les agrégats antérieurs, issus de données brutes purgées, sont conservés.
+        Retourne le nombre d'agrégats écrits.
+        """
+        raw = EmotionData.objects.all()
+        if since is None:
+            since = raw.order_by('recorded_at').values_list('recorded_at', flat=True).first()
+            if since is None:
+                return 0
+        since = EmotionRollupService.truncate(since, 'day')
+        raw = raw.filter(recorded_at__gte=since)
+        rollups = EmotionRollup.objects.filter(bucket_start__gte=since)
+        if until is not None:
+            until = EmotionRollupService.truncate(until, 'day')
+            if until <= since:
+                return 0
+            raw = raw.filter(recorded_at__lt=until)
+            rollups = rollups.filter(bucket_start__lt=until)
+
+        written = 0
+        with transaction.atomic():
+            rollups.delete()
+            for granularity, trunc in EmotionRollupService.TRUNC_FUNCTIONS.items():
+                rows = (
+                    raw.annotate(bucket_start=trunc('recorded_at'))
+                    .values('user_id', 'bucket_start', 'emotion_type')
+                    .annotate(
+                        count=Count('id'),
+                        intensity_sum=Sum('intensity'),
+                        intensity_min=Min('intensity'),
+                        intensity_max=Max('intensity'),
+                    )
+                    .order_by()
+                )
+                buckets = {}
+                for row in rows.iterator():
+                    buckets[(row['user_id'], granularity, row['bucket_start'], row['emotion_type'])] = [
+                        row['count'], row['intensity_sum'], row['intensity_min'], row['intensity_max']
+                    ]
+                    if len(buckets) >= batch_size:
+                        EmotionRollupService._upsert(buckets)
+                        written += len(buckets)
+                        buckets = {}
+                if buckets:
+                    EmotionRollupService._upsert(buckets)
+                    written += len(buckets)
+        return written
+
+    @staticmethod
+    def rebuild_missing(until, batch_size=1000, pause=0.0):
+        """
+        Reconstruit, un jour par transaction, les seuls jours antérieurs à `until` dont les
+        agrégats journaliers comptent moins d'émotions que les données brutes (agrégats
+        absents ou incomplets: données insérées sans passer par record).
+        Retourne (jours reconstruits, agrégats écrits).
+        """
+        until = EmotionRollupService.truncate(until, 'day')
+        raw_counts = (
+            EmotionData.objects.filter(recorded_at__lt=until)
+            .annotate(day=TruncDay('recorded_at')).values('user_id', 'day')
+            .annotate(count=Count('id')).values_list('user_id', 'day', 'count').order_by()
+        )
+        rollup_counts = {
+            (user_id, day): total
+            for user_id, day, total in EmotionRollup.objects
+            .filter(granularity='day', bucket_start__lt=until)
+            .values('user_id', 'bucket_start').annotate(total=Sum('count'))
+            .values_list('user_id', 'bucket_start', 'total').order_by()
+        }
+        # Un agrégat plus fourni que les données brutes couvre des données déjà purgées: conservé
+        days = sorted({
+            day for user_id, day, count in raw_counts
+            if rollup_counts.get((user_id, day), 0) < count
+        })
+        written = 0
+        for day in days:
+            written += EmotionRollupService.rebuild(
+                since=day, until=day + timedelta(days=1, hours=12), batch_size=batch_size
+            )
+            if pause:
+                time.sleep(pause)
+        return len(days), written
+
+    @staticmethod
+    def granularity_for(period):
+        """Granularité la plus grossière gardant une précision suffisante sur `period`"""
+        if period <= timedelta(hours=2):
+            return 'minute'
+        if period <= timedelta(days=2):
+            return 'hour'
+        return 'day'
+
+    @staticmethod
+    def summary(user, period=timedelta(hours=1), granularity=None):
+        """
+        Résumé des émotions de l'utilisateur sur la période écoulée, lu dans les agrégats:
+        {'counts': {emotion: n}, 'total', 'dominant_emotion', 'avg_intensity'}
+        """
+        granularity = granularity or EmotionRollupService.granularity_for(period)
+        start = EmotionRollupService.truncate(timezone.now() - period, granularity)
+        rows = (
+            EmotionRollup.objects.filter(user=user, granularity=granularity, bucket_start__gte=start)
+            .values('emotion_type')
+            .annotate(total=Sum('count'), intensity_sum=Sum('intensity_sum'))
+            .order_by('-total')
+        )
+        counts = {}
+        intensity_sum = 0.0
+        for row in rows:
+            counts[row['emotion_type']] = row['total']
+            intensity_sum += row['intensity_sum']
+        total = sum(counts.values())
+        return {
+            'counts': counts,
+            'total': total,
+            'dominant_emotion': next(iter(counts), None),
+            'avg_intensity': intensity_sum / total if total else None,
+        }
+
+    @staticmethod
+    def dominant_emotion(user, period=timedelta(hours=1)):
+        """Émotion la plus fréquente sur la période (None si aucune donnée)"""
+        return EmotionRollupService.summary(user, period)['dominant_emotion']
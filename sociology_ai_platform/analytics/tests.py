@@ -1,3 +1,684 @@
-from django.test import TestCase
+import json
+import random
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Historique
+from content.models import Course
+from sociology_ai.testing import PerformanceTestCase
+from .ai_service import AIRecommendationService, EmotionRecognitionService
+from .cache import CompletedCourseCache, LearningStateCache
+from .models import CoursePopularity, EmotionData, EmotionRollup, Recommendation
+from .rollups import EmotionRollupService
+from .worker import RecommendationRefreshWorker
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN est spécifique à SQLite")
+class HotQueryIndexTests(TestCase):
+    """Les requêtes fréquentes doivent utiliser un index composite, pas un parcours de table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotRegex(plan, r'SCAN \w+\s*$')
+
+    def test_recent_emotions_use_user_recorded_index(self):
+        self.assertUsesIndex(
+            EmotionData.objects.filter(user=self.user).order_by('-recorded_at')[:10],
+            'emotion_user_recorded_idx',
+        )
+
+    def test_unviewed_recommendations_use_user_unviewed_score_index(self):
+        self.assertUsesIndex(
+            Recommendation.objects.filter(user=self.user, viewed=False)[:5],
+            'rec_user_unviewed_score_idx',
+        )
+
+
+@override_settings(RECOMMENDATION_REFRESH_ASYNC=False)
+class EmotionBatchApiTests(TestCase):
+    """Envoi par lot des émotions: validation par échantillon, plafond, horodatages du client"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        self.client.force_login(self.user)
+
+    def post(self, samples):
+        return self.client.post(
+            reverse('record_emotion_batch_api'), json.dumps({'samples': samples}), content_type='application/json'
+        )
+
+    def test_invalid_samples_are_reported_by_index(self):
+        now_ms = timezone.now().timestamp() * 1000
+        response = self.post([
+            {'emotion_type': 'focused', 'intensity': 0.6},
+            {'emotion_type': 'bored', 'intensity': 0.6},
+            {'emotion_type': 'happy', 'intensity': 1.5},
+            {'emotion_type': 'happy', 'recorded_at': 'hier'},
+            {'emotion_type': 'happy', 'recorded_at': 1e20},
+            {'emotion_type': 'happy', 'recorded_at': float('inf')},
+            {'emotion_type': 'happy', 'recorded_at': now_ms - 2 * 86400 * 1000},
+            'focused',
+            {'emotion_type': 'happy', 'context': 42},
+            {'emotion_type': 'happy', 'context': {'page': 'quiz'}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(EmotionData.objects.filter(user=self.user).count(), 1)
+
+        response = self.post([{'emotion_type': 'bored'}])
+        self.assertEqual((response.status_code, response.json()['errors'][0]['index']), (400, 0))
+
+    def test_csrf_token_is_required(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        url = reverse('record_emotion_batch_api')
+        body = json.dumps({'samples': [{'emotion_type': 'happy'}]})
+        self.assertEqual(client.post(url, body, content_type='application/json').status_code, 403)
+        client.get(reverse('emotion_recognition'))
+        response = client.post(
+            url, body, content_type='application/json', headers={'X-CSRFToken': client.cookies['csrftoken'].value}
+        )
+        self.assertEqual(response.json()['count'], 1)
+
+    @override_settings(EMOTION_BATCH_MAX_SAMPLES=3)
+    def test_batch_size_is_capped(self):
+        response = self.post([{'emotion_type': 'happy'}] * 4)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EmotionData.objects.exists())
+        self.assertEqual(self.post([{'emotion_type': 'happy'}] * 3).json()['count'], 3)
+
+    def test_client_timestamps_are_kept(self):
+        now = timezone.now().replace(microsecond=0)
+        first = now - timedelta(minutes=10)
+        second = now - timedelta(minutes=5)
+        self.post([
+            {'emotion_type': 'sad', 'recorded_at': second.isoformat()},
+            {'emotion_type': 'happy', 'recorded_at': first.timestamp() * 1000},
+            {'emotion_type': 'focused', 'recorded_at': (now + timedelta(hours=1)).isoformat()},
+        ])
+        recorded = dict(EmotionData.objects.values_list('emotion_type', 'recorded_at'))
+        self.assertEqual((recorded['happy'], recorded['sad']), (first, second))
+        # Horodatage dans le futur ramené à l'instant d'envoi
+        self.assertLessEqual(recorded['focused'], timezone.now())
+
+
+class EmotionRollupTests(TestCase):
+    """Agrégats maintenus à l'insertion, lus par summary et reconstruits par backfill_emotion_rollups"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner')
+
+    def setUp(self):
+        cache.clear()
+        self.minute = EmotionRollupService.truncate(timezone.now() - timedelta(minutes=30), 'minute')
+
+    def rollups(self, granularity):
+        return {
+            (rollup.bucket_start, rollup.emotion_type): (
+                rollup.count, round(rollup.intensity_sum, 6), rollup.intensity_min, rollup.intensity_max
+            )
+            for rollup in EmotionRollup.objects.filter(user=self.user, granularity=granularity)
+        }
+
+    def create(self, emotion_type, intensity, seconds):
+        return EmotionData.objects.create(
+            user=self.user, emotion_type=emotion_type, intensity=intensity,
+            recorded_at=self.minute + timedelta(seconds=seconds)
+        )
+
+    def test_record_merges_into_existing_buckets(self):
+        self.create('happy', 0.2, 10)
+        self.create('happy', 0.8, 20)
+        self.create('sad', 0.4, 70)
+        self.assertEqual(self.rollups('minute'), {
+            (self.minute, 'happy'): (2, 1.0, 0.2, 0.8),
+            (self.minute + timedelta(minutes=1), 'sad'): (1, 0.4, 0.4, 0.4),
+        })
+        # Lot inséré sans post_save (API par lot)
+        emotions = EmotionData.objects.bulk_create([
+            EmotionData(user=self.user, emotion_type='happy', intensity=0.6,
+                        recorded_at=self.minute + timedelta(seconds=30)),
+            EmotionData(user=self.user, emotion_type='happy', intensity=0.1,
+                        recorded_at=self.minute + timedelta(seconds=40)),
+        ])
+        EmotionRollupService.record(emotions)
+        self.assertEqual(self.rollups('minute')[(self.minute, 'happy')], (4, 1.7, 0.1, 0.8))
+        day = EmotionRollupService.truncate(self.minute, 'day')
+        self.assertEqual(self.rollups('day')[(day, 'happy')], (4, 1.7, 0.1, 0.8))
+        self.assertEqual(sum(count for count, *_ in self.rollups('hour').values()), 5)
+
+    def test_summary_reads_recent_rollups(self):
+        self.create('focused', 0.9, 0)
+        self.create('focused', 0.5, 5)
+        self.create('confused', 0.1, 10)
+        EmotionData.objects.create(
+            user=self.user, emotion_type='sad', intensity=0.3, recorded_at=timezone.now() - timedelta(hours=3)
+        )
+        with self.assertNumQueries(1):
+            summary = EmotionRollupService.summary(self.user, timedelta(hours=1))
+        self.assertEqual(summary['counts'], {'focused': 2, 'confused': 1})
+        self.assertEqual((summary['total'], summary['dominant_emotion']), (3, 'focused'))
+        self.assertAlmostEqual(summary['avg_intensity'], 0.5)
+        self.assertEqual(EmotionRollupService.summary(self.user, timedelta(days=1))['total'], 4)
+        self.assertEqual(EmotionRollupService.dominant_emotion(User.objects.create_user('other')), None)
+
+    def test_backfill_rebuilds_incremental_rollups(self):
+        self.create('happy', 0.2, 10)
+        self.create('happy', 0.8, 20)
+        self.create('sad', 0.4, 3700)
+        expected = {granularity: self.rollups(granularity) for granularity in ('minute', 'hour', 'day')}
+        EmotionRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_emotion_rollups', '--batch-size', '2', stdout=out)
+        self.assertIn(f'{sum(map(len, expected.values()))} agrégats reconstruits', out.getvalue())
+        self.assertEqual({granularity: self.rollups(granularity) for granularity in expected}, expected)
+
+        # --since: seuls les jours suivants sont recalculés
+        tomorrow = (self.minute + timedelta(days=1)).strftime('%Y-%m-%d')
+        call_command('backfill_emotion_rollups', '--since', tomorrow, stdout=StringIO())
+        self.assertEqual(self.rollups('day'), expected['day'])
+        with self.assertRaises(CommandError):
+            call_command('backfill_emotion_rollups', '--since', 'hier', stdout=StringIO())
+
+
+class EmotionRetentionTests(TestCase):
+    """Rétention des émotions: seuls les jours sans agrégats complets sont recalculés avant la purge"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        today = EmotionRollupService.truncate(timezone.now(), 'day')
+        self.recorded_day = today - timedelta(days=40)
+        self.imported_day = today - timedelta(days=45)
+        # Insertion unitaire: agrégats maintenus par record
+        EmotionData.objects.create(
+            user=self.user, emotion_type='happy', recorded_at=self.recorded_day + timedelta(hours=12)
+        )
+        # Import en masse: aucun agrégat
+        EmotionData.objects.bulk_create([
+            EmotionData(user=self.user, emotion_type='bored', intensity=0.2,
+                        recorded_at=self.imported_day + timedelta(hours=9)),
+            EmotionData(user=self.user, emotion_type='bored', intensity=0.4,
+                        recorded_at=self.imported_day + timedelta(hours=15)),
+        ])
+        self.recent = EmotionData.objects.create(user=self.user, emotion_type='focused')
+
+    def day_rollups(self, day):
+        return EmotionRollup.objects.filter(user=self.user, granularity='day', bucket_start=day)
+
+    def test_only_days_missing_rollups_are_rebuilt(self):
+        recorded_rollup = self.day_rollups(self.recorded_day).get()
+        self.assertEqual(
+            EmotionRollupService.rebuild_missing(timezone.now() - timedelta(days=30)), (1, 5)
+        )
+        self.assertEqual(self.day_rollups(self.recorded_day).get().pk, recorded_rollup.pk)
+        imported = self.day_rollups(self.imported_day).get()
+        self.assertEqual((imported.emotion_type, imported.count), ('bored', 2))
+        self.assertAlmostEqual(imported.intensity_avg, 0.3)
+        # Second passage: plus rien à recalculer
+        self.assertEqual(EmotionRollupService.rebuild_missing(timezone.now() - timedelta(days=30)), (0, 0))
+
+    def test_command_purges_raw_data_after_rollups(self):
+        out = StringIO()
+        call_command('apply_emotion_retention', '--days', '30', '--batch-size', '1', stdout=out)
+        self.assertIn('3 données brutes supprimées', out.getvalue())
+        self.assertIn('(1 jours)', out.getvalue())
+        self.assertEqual(list(EmotionData.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertEqual(
+            sorted(EmotionRollup.objects.filter(granularity='day', user=self.user)
+                   .values_list('emotion_type', 'count')),
+            [('bored', 2), ('focused', 1), ('happy', 1)],
+        )
+        # Agrégats à la minute des jours purgés expirés (rétention de 30 jours)
+        self.assertFalse(EmotionRollup.objects.filter(
+            granularity='minute', bucket_start__lt=timezone.now() - timedelta(days=30)
+        ).exists())
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('apply_emotion_retention', '--dry-run', stdout=out)
+        self.assertIn('3 données brutes', out.getvalue())
+        self.assertEqual(EmotionData.objects.count(), 4)
+        self.assertFalse(self.day_rollups(self.imported_day).exists())
+
+
+class RecommendationScoringTests(TestCase):
+    """Scores calculés en lot: identiques au calcul unitaire, requêtes indépendantes du catalogue"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner')
+        cls.courses = Course.objects.bulk_create([
+            Course(title=f'Cours {i}', description='Description', difficulty='beginner') for i in range(12)
+        ])
+        Course.objects.filter(id__in=[course.id for course in cls.courses[:6]]).update(
+            created_at=timezone.now() - timedelta(days=60)
+        )
+        for i, course in enumerate(cls.courses[:4]):
+            for learner in range(i + 1):
+                Historique.objects.create(
+                    user=User.objects.get_or_create(username=f'other{learner}')[0],
+                    content_type='course', content_id=course.id
+                )
+        EmotionData.objects.create(user=cls.user, emotion_type='focused', intensity=0.9)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bulk_scores_match_per_course_scoring(self):
+        random.seed(1)
+        generated = AIRecommendationService.generate_recommendations(self.user, limit=20, top_k=0)
+        random.seed(1)
+        learning_state = EmotionRecognitionService.analyze_learning_state(self.user)
+        expected = {
+            course.id: AIRecommendationService._calculate_recommendation_score(
+                self.user, course, self.user.profile, learning_state
+            )
+            for course in Course.objects.all()
+        }
+        self.assertEqual({rec.course_id: rec.score for rec in generated}, expected)
+        self.assertEqual(dict(Recommendation.objects.filter(user=self.user).values_list('course_id', 'score')), expected)
+
+        # Nouveau calcul: mise à jour des lignes existantes, sans doublon
+        AIRecommendationService.generate_recommendations(self.user, top_k=0)
+        self.assertEqual(Recommendation.objects.filter(user=self.user).count(), len(self.courses))
+
+    def test_query_count_does_not_grow_with_catalogue(self):
+        def count_queries(user):
+            with CaptureQueriesContext(connection) as context:
+                AIRecommendationService.generate_recommendations(user, top_k=0)
+            return len(context)
+
+        baseline = count_queries(User.objects.create_user('first'))
+        Course.objects.bulk_create([
+            Course(title=f'Nouveau cours {i}', description='Description') for i in range(50)
+        ])
+        self.assertEqual(count_queries(User.objects.create_user('second')), baseline)
+
+
+class RecommendationTopKTests(TestCase):
+    """Sélection des K meilleures recommandations, remplacement de l'ensemble non vu et purge"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = Course.objects.bulk_create([
+            Course(title=f'Cours {i}', description='Description', difficulty='beginner') for i in range(300)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        random.seed(0)
+
+    def test_users_do_not_share_the_same_top_k(self):
+        selections = []
+        for i in range(4):
+            user = User.objects.create_user(f'learner{i}')
+            AIRecommendationService.generate_recommendations(user, top_k=20)
+            selections.append(set(Recommendation.objects.filter(user=user).values_list('course_id', flat=True)))
+        self.assertTrue(all(len(selection) == 20 for selection in selections))
+        # Les cours déjà retenus pour un utilisateur ne sont pas favorisés pour les suivants
+        self.assertTrue(all(selection != selections[0] for selection in selections[1:]))
+        self.assertGreater(len(set().union(*selections)), 60)
+
+    def scores_by_id(self):
+        """Score déterministe et distinct par cours: les K meilleurs sont les K derniers créés"""
+        return mock.patch.object(
+            AIRecommendationService, '_calculate_recommendation_score',
+            side_effect=lambda user, course, *args, **kwargs: course.id / 1000,
+        )
+
+    def test_only_top_k_scores_are_kept(self):
+        user = User.objects.create_user('learner')
+        with self.scores_by_id():
+            top = AIRecommendationService.generate_recommendations(user, limit=3, top_k=10)
+        best = sorted(course.id for course in self.courses)[-10:]
+        self.assertEqual([rec.course_id for rec in top], best[::-1][:3])
+        self.assertEqual(sorted(Recommendation.objects.filter(user=user).values_list('course_id', flat=True)), best)
+
+    def test_unviewed_set_is_replaced_atomically(self):
+        user = User.objects.create_user('learner')
+        viewed, stale = self.courses[0], self.courses[1]
+        Recommendation.objects.create(user=user, course=viewed, score=0.1, viewed=True)
+        Recommendation.objects.create(user=user, course=stale, score=0.9)
+
+        # Échec de l'écriture: l'ensemble non vu précédent est conservé
+        with self.scores_by_id(), mock.patch.object(
+            AIRecommendationService, '_bulk_upsert_recommendations', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                AIRecommendationService.generate_recommendations(user, top_k=5)
+        self.assertTrue(Recommendation.objects.filter(user=user, course=stale).exists())
+
+        with self.scores_by_id():
+            AIRecommendationService.generate_recommendations(user, top_k=5)
+        best = sorted(course.id for course in self.courses)[-5:]
+        self.assertEqual(
+            sorted(Recommendation.objects.filter(user=user, viewed=False).values_list('course_id', flat=True)), best
+        )
+        self.assertTrue(Recommendation.objects.filter(user=user, course=viewed, viewed=True).exists())
+
+    def test_prune_recommendations_keeps_best_unviewed(self):
+        user = User.objects.create_user('learner')
+        with self.scores_by_id():
+            AIRecommendationService.generate_recommendations(user, top_k=0)
+        Recommendation.objects.filter(user=user, course=self.courses[0]).update(viewed=True)
+        out = StringIO()
+        call_command('prune_recommendations', '--keep', '3', '--batch-size', '7', '--dry-run', stdout=out)
+        self.assertIn('296 recommandations à supprimer', out.getvalue())
+        self.assertEqual(Recommendation.objects.filter(user=user).count(), 300)
+
+        call_command('prune_recommendations', '--keep', '3', '--batch-size', '7', stdout=StringIO())
+        best = sorted(course.id for course in self.courses)[-3:]
+        self.assertEqual(
+            sorted(Recommendation.objects.filter(user=user, viewed=False).values_list('course_id', flat=True)), best
+        )
+        self.assertTrue(Recommendation.objects.filter(user=user, course=self.courses[0], viewed=True).exists())
+
+
+class RecordedProgressPopularityTests(TestCase):
+    """Les historiques de cours créés par lot (sans post_save) comptent dans learner_count"""
+
+    def test_new_course_progress_counts_learners(self):
+        course = Course.objects.create(title='Cours', description='Description')
+        users = [User.objects.create_user(f'learner{i}') for i in range(2)]
+        Historique.objects.record_progress(users[0], [('course', course.id, 10, False), ('video', 1, 10, False)])
+        Historique.objects.record_progress(users[0], [('course', course.id, 60, False)])
+        Historique.objects.record_progress(users[1], [('course', course.id, 100, True)])
+        self.assertEqual(CoursePopularity.objects.get(course=course).learner_count, 2)
+
+
+class CoursePopularityCounterTests(TestCase):
+    """Compteurs de popularité maintenus à l'écriture et vérifiés par rebuild_popularity"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = Course.objects.bulk_create([
+            Course(title=f'Cours {i}', description='Description') for i in range(3)
+        ])
+
+    def counters(self):
+        return dict(CoursePopularity.objects.values_list('course_id', 'learner_count'))
+
+    def test_writes_and_user_deletion_update_counters(self):
+        first, second, _ = self.courses
+        users = [User.objects.create_user(f'learner{i}') for i in range(2)]
+        for user in users:
+            Recommendation.objects.create(user=user, course=first, score=0.5)
+            Historique.objects.create(user=user, content_type='course', content_id=first.id)
+        Historique.objects.create(user=users[0], content_type='course', content_id=second.id)
+        Historique.objects.create(user=users[1], content_type='quiz', content_id=second.id)
+        self.assertEqual(self.counters(), {first.id: 2, second.id: 1})
+
+        users[0].delete()
+        self.assertEqual(self.counters(), {first.id: 1, second.id: 0})
+        call_command('rebuild_popularity', '--check', stdout=StringIO())
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        user = User.objects.create_user('learner')
+        Historique.objects.create(user=user, content_type='course', content_id=self.courses[1].id)
+        CoursePopularity.objects.filter(course=self.courses[1]).update(learner_count=5)
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_popularity', '--check', stdout=out)
+        self.assertIn(f'Cours #{self.courses[1].id}: 5 apprenants au lieu de 1', out.getvalue())
+        self.assertEqual(self.counters()[self.courses[1].id], 5)
+
+        call_command('rebuild_popularity', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(self.counters(), {self.courses[0].id: 0, self.courses[1].id: 1, self.courses[2].id: 0})
+        call_command('rebuild_popularity', '--check', stdout=StringIO())
+
+
+class LearningStateCacheTests(TestCase):
+    """Fenêtre des émotions récentes chargée une fois puis mise à jour à chaque insertion"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner')
+
+    def setUp(self):
+        cache.clear()
+
+    def db_window(self):
+        return list(
+            EmotionData.objects.filter(user=self.user).order_by('-recorded_at')
+            .values_list('emotion_type', 'intensity')[:LearningStateCache.WINDOW_SIZE]
+        )
+
+    def test_window_is_updated_incrementally(self):
+        EmotionData.objects.create(user=self.user, emotion_type='sad', intensity=0.2)
+        with self.assertNumQueries(1):
+            self.assertEqual(LearningStateCache.get_window(self.user), [('sad', 0.2)])
+
+        start = timezone.now()
+        for i in range(12):
+            EmotionData.objects.create(
+                user=self.user, emotion_type='focused' if i % 2 else 'happy', intensity=i / 20,
+                recorded_at=start + timedelta(seconds=i)
+            )
+        LearningStateCache.push(self.user.pk, [('excited', 0.9)])
+        with self.assertNumQueries(0):
+            window = LearningStateCache.get_window(self.user)
+        self.assertEqual(window[0], ('excited', 0.9))
+        self.assertEqual(window[1:], self.db_window()[:LearningStateCache.WINDOW_SIZE - 1])
+
+        LearningStateCache.invalidate(self.user.pk)
+        expected = self.db_window()
+        with self.assertNumQueries(1):
+            self.assertEqual(LearningStateCache.get_window(self.user), expected)
+
+    def test_push_without_cached_window_is_ignored(self):
+        LearningStateCache.push(self.user.pk, [('happy', 0.5)])
+        self.assertEqual(LearningStateCache.get_window(self.user), [])
+
+    def test_stats_count_hits_and_misses(self):
+        LearningStateCache.reset_stats()
+        self.assertEqual(LearningStateCache.stats(), {'hits': 0, 'misses': 0, 'hit_rate': 0.0})
+        for _ in range(4):
+            EmotionRecognitionService.analyze_learning_state(self.user)
+        self.assertEqual(LearningStateCache.stats(), {'hits': 3, 'misses': 1, 'hit_rate': 0.75})
+        LearningStateCache.reset_stats()
+        self.assertEqual(LearningStateCache.stats()['hits'], 0)
+
+
+class RecommendationRefreshWorkerTests(TestCase):
+    """Rafraîchissements différés regroupés par utilisateur"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner')
+        Course.objects.bulk_create([
+            Course(title=f'Cours {i}', description='Description', difficulty='beginner') for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.worker = RecommendationRefreshWorker()
+        self.addCleanup(self.worker.shutdown)
+
+    @override_settings(RECOMMENDATION_REFRESH_ASYNC=True)
+    def test_pending_refreshes_are_coalesced(self):
+        with mock.patch('analytics.worker.threading.Timer') as timer, \
+                mock.patch.object(self.worker, 'refresh') as refresh, \
+                mock.patch('analytics.worker.connection'):
+            self.assertTrue(self.worker.schedule(self.user.pk, 'happy'))
+            self.assertFalse(self.worker.schedule(self.user.pk, 'confused'))
+            self.assertFalse(self.worker.schedule(self.user.pk, 'sad'))
+            self.assertEqual(timer.call_count, 1)
+            self.assertEqual(self.worker.stats(), {'pending': 1, 'scheduled': 1, 'coalesced': 2, 'completed': 0})
+
+            # Le minuteur exécute un seul rafraîchissement, avec l'émotion la plus récente
+            self.worker._run(self.user.pk)
+            refresh.assert_called_once_with(self.user.pk, 'sad')
+            self.worker._run(self.user.pk)
+            self.assertEqual(refresh.call_count, 1)
+
+            self.assertTrue(self.worker.schedule(self.user.pk, 'happy'))
+            self.assertEqual(timer.call_count, 2)
+
+    @override_settings(RECOMMENDATION_REFRESH_ASYNC=True, RECOMMENDATION_REFRESH_DEBOUNCE=60)
+    def test_drain_runs_pending_refreshes_and_cancels_timers(self):
+        self.worker.schedule(self.user.pk, 'happy')
+        self.worker.schedule(self.user.pk, 'sad')
+        timer = self.worker._timers[self.user.pk]
+        self.assertEqual(self.worker.drain(), 1)
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+        self.assertEqual(len(self.worker.get_cached_recommendations(self.user.pk)), 3)
+        self.assertEqual(self.worker.stats()['pending'], 0)
+        # Un minuteur déjà déclenché ne soumet plus rien
+        self.worker._submit(self.user.pk)
+        self.assertIsNone(self.worker._executor)
+
+    @override_settings(RECOMMENDATION_REFRESH_ASYNC=True, RECOMMENDATION_REFRESH_DEBOUNCE=60)
+    def test_shutdown_drops_pending_refreshes(self):
+        self.worker.schedule(self.user.pk, 'happy')
+        timer = self.worker._timers[self.user.pk]
+        self.worker.shutdown()
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+        self.assertEqual(self.worker.stats()['pending'], 0)
+        self.assertEqual(self.worker.get_cached_recommendations(self.user.pk), [])
+
+    def test_refresh_is_synchronous_under_test_runner(self):
+        self.assertFalse(settings.RECOMMENDATION_REFRESH_ASYNC)
+
+    @override_settings(RECOMMENDATION_REFRESH_ASYNC=False)
+    def test_synchronous_refresh_fills_cache(self):
+        self.assertEqual(self.worker.get_cached_recommendations(self.user.pk), [])
+        self.assertTrue(self.worker.schedule(self.user.pk, 'sad'))
+        cached = self.worker.get_cached_recommendations(self.user.pk)
+        self.assertEqual(len(cached), 3)
+        self.assertEqual(self.worker.stats()['completed'], 1)
+
+
+class CompletedCourseCacheTests(TestCase):
+    """Cours complétés chargés une fois puis mis à jour incrémentalement"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner')
+        cls.courses = Course.objects.bulk_create([
+            Course(title=f'Cours {i}', description='Description', difficulty='beginner') for i in range(6)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_completion_updates_cached_set_without_reload(self):
+        first, second = self.courses[:2]
+        Historique.objects.create(user=self.user, content_type='course', content_id=first.id, completed=True)
+        self.assertEqual(CompletedCourseCache.get(self.user.id), {first.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            Historique.objects.record_progress(self.user, [
+                ('course', second.id, 100, False), ('quiz', 99, 100, True)
+            ])
+        with self.assertNumQueries(0):
+            self.assertEqual(CompletedCourseCache.get(self.user.id), {first.id, second.id})
+
+        row = Historique.objects.get(user=self.user, content_id=first.id)
+        row.completed = False
+        with self.captureOnCommitCallbacks(execute=True):
+            row.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(CompletedCourseCache.count(self.user.id), 1)
+
+    def test_recommendations_exclude_completed_courses(self):
+        completed = {course.id for course in self.courses[:4]}
+        Historique.objects.record_progress(self.user, [('course', course_id, 100, True) for course_id in completed])
+        recommended = AIRecommendationService.generate_recommendations(self.user, limit=10)
+        self.assertEqual({rec.course_id for rec in recommended}, {course.id for course in self.courses[4:]})
+        recommended = AIRecommendationService.get_courses_by_emotion(self.user, 'sad', limit=2)
+        self.assertEqual({rec.course_id for rec in recommended}, {course.id for course in self.courses[4:]})
+
+
+class AnalyticsViewPerformanceTests(PerformanceTestCase):
+    """Budgets de requêtes du tableau de bord, des recommandations et des émotions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+        cls.user.profile  # Profil créé au premier accès: mesures hors création
+        others = [User.objects.create_user(f'learner{i}', password='secret') for i in range(5)]
+        difficulties = [choice for choice, _ in Course.DIFFICULTY_CHOICES]
+        courses = Course.objects.bulk_create([
+            Course(title=f'Cours {i}', description='Description du cours.', difficulty=difficulties[i % 3])
+            for i in range(2000)
+        ])
+        Historique.objects.bulk_create([
+            Historique(user=cls.user, content_type='course', content_id=course.id, progress=100, completed=True)
+            for course in courses[:300]
+        ])
+        emotions = [choice for choice, _ in EmotionData.EMOTION_CHOICES]
+        EmotionData.objects.bulk_create([
+            EmotionData(user=user, emotion_type=emotions[i % len(emotions)], intensity=(i % 10) / 10)
+            for user in [cls.user] + others for i in range(1000)
+        ])
+        for user in others:
+            AIRecommendationService.generate_recommendations(user, top_k=0)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_dashboard(self):
+        # Premier affichage: génération des recommandations incluse
+        self.assertWithinBudget('get', reverse('dashboard'), max_queries=21)
+        self.assertWithinBudget('get', reverse('dashboard'), max_queries=6)
+
+    def test_recommendations(self):
+        # Premier affichage: chargement des cours complétés inclus
+        self.assertWithinBudget('get', reverse('recommendations'), max_queries=17)
+        self.assertWithinBudget('get', reverse('recommendations'), max_queries=15)
+
+    def test_generate_ai_recommendations(self):
+        self.assertWithinBudget('get', reverse('generate_ai_recommendations'), max_queries=15, status_code=302)
+        self.assertWithinBudget('get', reverse('generate_ai_recommendations'), max_queries=14, status_code=302)
+
+    def test_record_emotion(self):
+        self.assertWithinBudget('get', reverse('record_emotion'), max_queries=3)
+        self.assertWithinBudget(
+            'post', reverse('record_emotion'), max_queries=17, status_code=302,
+            data={'emotion_type': 'confused', 'intensity': '0.4', 'context': 'pendant un quiz'}
+        )
+
+    def test_emotion_recognition(self):
+        self.assertWithinBudget('get', reverse('emotion_recognition'), max_queries=3)
+
+    def test_recognize_emotion_api(self):
+        # Le rafraîchissement des recommandations est exécuté en ligne dans les tests
+        self.assertWithinBudget(
+            'post', reverse('recognize_emotion_api'), max_queries=20,
+            data=json.dumps({'emotion_type': 'happy', 'intensity': 0.7}),
+            content_type='application/json'
+        )
+
+    def test_record_emotion_batch_api(self):
+        samples = [{'emotion_type': 'focused', 'intensity': 0.6} for _ in range(200)]
+        # Dont SAVEPOINT / RELEASE de la transaction du lot (le test s'exécute dans une transaction)
+        self.assertWithinBudget(
+            'post', reverse('record_emotion_batch_api'), max_queries=23,
+            data=json.dumps({'samples': samples}),
+            content_type='application/json'
+        )
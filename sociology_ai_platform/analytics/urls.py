@@ -8,4 +8,5 @@ urlpatterns = [
     path('emotion/record/', views.record_emotion, name='record_emotion'),
     path('emotion/recognize/', views.emotion_recognition, name='emotion_recognition'),
     path('emotion/api/recognize/', views.recognize_emotion_api, name='recognize_emotion_api'),
+    path('emotion/api/batch/', views.record_emotion_batch_api, name='record_emotion_batch_api'),
 ]
@@ -1,22 +1,29 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Avg, Count
 from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .models import Recommendation, EmotionData
 from .ai_service import AIRecommendationService, EmotionRecognitionService
+from .cache import CompletedCourseCache, LearningStateCache
+from .rollups import EmotionRollupService
+from .worker import refresh_worker
 from content.models import Course
-from accounts.models import Historique
 
 @login_required
 def dashboard(request):
     user = request.user
     # Statistiques de l'utilisateur
     total_courses = Course.objects.count()
-    completed_courses = Historique.objects.filter(user=user, content_type='course', completed=True).count()
+    completed_courses = CompletedCourseCache.count(user.id)
     total_points = user.profile.points
     
     # Générer des recommandations IA si nécessaire
@@ -24,7 +31,7 @@ def dashboard(request):
         AIRecommendationService.generate_recommendations(user)
     
     # Recommandations
-    recommendations = Recommendation.objects.filter(user=user, viewed=False)[:5]
+    recommendations = Recommendation.objects.filter(user=user, viewed=False).select_related('course')[:5]
     
     # Données émotionnelles récentes
     recent_emotions = EmotionData.objects.filter(user=user)[:10]
@@ -32,6 +39,11 @@ def dashboard(request):
     # Analyser l'état d'apprentissage
     learning_state = EmotionRecognitionService.analyze_learning_state(user)
     
+    # Résumé de la dernière heure, lu dans les agrégats
+    hourly_summary = EmotionRollupService.summary(user, timedelta(hours=1))
+    emotion_labels = dict(EmotionData.EMOTION_CHOICES)
+    hourly_summary['dominant_label'] = emotion_labels.get(hourly_summary['dominant_emotion'])
+    
     # Progression globale
     progress = (completed_courses / total_courses * 100) if total_courses > 0 else 0
     
@@ -43,6 +55,7 @@ def dashboard(request):
         'recent_emotions': recent_emotions,
         'progress': progress,
         'learning_state': learning_state,
+        'hourly_summary': hourly_summary,
     }
     return render(request, 'analytics/dashboard.html', context)
 
@@ -51,7 +64,7 @@ def recommendations(request):
     # Générer de nouvelles recommandations IA
     AIRecommendationService.generate_recommendations(request.user)
     
-    recommendations = Recommendation.objects.filter(user=request.user).order_by('-score')
+    recommendations = Recommendation.objects.filter(user=request.user).select_related('course').order_by('-score')
     return render(request, 'analytics/recommendations.html', {'recommendations': recommendations})
 
 @login_required
@@ -109,28 +122,17 @@ def recognize_emotion_api(request):
             context=context
         )
         
-        # Analyser l'état d'apprentissage
+        # Analyser l'état d'apprentissage (fenêtre en cache, sans requête)
         learning_state = EmotionRecognitionService.analyze_learning_state(request.user)
         
-        # Générer des recommandations de cours basées sur l'émotion
-        recommended_courses = AIRecommendationService.get_courses_by_emotion(
-            request.user, 
-            emotion_type, 
-            limit=5
-        )
+        # Le calcul des recommandations est différé et regroupé par utilisateur;
+        # on renvoie les dernières recommandations déjà calculées
+        refresh_scheduled = refresh_worker.schedule(request.user.id, emotion_type)
+        courses_data = refresh_worker.get_cached_recommendations(request.user.id)
         
-        # Préparer les données des cours pour la réponse JSON
-        courses_data = []
-        for rec in recommended_courses:
-            courses_data.append({
-                'id': rec.course.id,
-                'title': rec.course.title,
-                'description': rec.course.description[:100] + '...' if len(rec.course.description) > 100 else rec.course.description,
-                'difficulty': rec.course.get_difficulty_display(),
-                'score': rec.score,
-                'reason': rec.reason,
-                'url': f'/content/{rec.course.id}/'
-            })
+        message = f'Émotion "{emotion.get_emotion_type_display()}" détectée !'
+        if courses_data:
+            message += f' {len(courses_data)} cours recommandés.'
         
         return JsonResponse({
             'success': True,
@@ -138,7 +140,8 @@ def recognize_emotion_api(request):
             'emotion_type': emotion_type,
             'learning_state': learning_state,
             'recommended_courses': courses_data,
-            'message': f'Émotion "{emotion.get_emotion_type_display()}" détectée ! {len(courses_data)} cours recommandés.'
+            'refresh_scheduled': refresh_scheduled,
+            'message': message
         })
     except Exception as e:
         return JsonResponse({
@@ -147,6 +150,111 @@ def recognize_emotion_api(request):
         }, status=400)
 
 @login_required
+@require_http_methods(["POST"])
+def record_emotion_batch_api(request):
+    """
+    API d'envoi par lot des émotions détectées via webcam
+    Corps attendu: {"samples": [{"emotion_type", "intensity", "context", "recorded_at"}, ...]}
+    Les échantillons invalides sont ignorés et signalés dans "errors".
+    """
+    try:
+        data = json.loads(request.body)
+        samples = data.get('samples')
+        if not isinstance(samples, list) or not samples:
+            raise ValueError('Le champ "samples" doit être une liste non vide.')
+        max_samples = getattr(settings, 'EMOTION_BATCH_MAX_SAMPLES', 500)
+        if len(samples) > max_samples:
+            raise ValueError(f'Un lot ne peut pas contenir plus de {max_samples} échantillons.')
+    except (ValueError, TypeError, AttributeError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    valid_emotions = {choice for choice, _ in EmotionData.EMOTION_CHOICES}
+    now = timezone.now()
+    emotions = []
+    errors = []
+    for index, sample in enumerate(samples):
+        try:
+            if not isinstance(sample, dict):
+                raise ValueError('Échantillon invalide.')
+            emotion_type = sample.get('emotion_type')
+            if emotion_type not in valid_emotions:
+                raise ValueError(f'Type d\'émotion invalide: {emotion_type}')
+            intensity = float(sample.get('intensity', 0.5))
+            if not 0.0 <= intensity <= 1.0:
+                raise ValueError('L\'intensité doit être comprise entre 0 et 1.')
+            recorded_at = _parse_sample_timestamp(sample.get('recorded_at'), now)
+            context = sample.get('context') or 'Reconnaissance via webcam'
+            if not isinstance(context, str):
+                raise ValueError('Le contexte doit être une chaîne de caractères.')
+        except (ValueError, TypeError, AttributeError, OverflowError, OSError) as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        emotions.append(EmotionData(
+            user=request.user,
+            emotion_type=emotion_type,
+            intensity=intensity,
+            context=context[:200],
+            recorded_at=recorded_at
+        ))
+    
+    if not emotions:
+        return JsonResponse({
+            'success': False,
+            'error': 'Aucun échantillon valide.',
+            'errors': errors
+        }, status=400)
+    
+    # Une seule transaction pour tout le lot (émotions et agrégats)
+    emotions.sort(key=lambda emotion: emotion.recorded_at)
+    with transaction.atomic():
+        EmotionData.objects.bulk_create(emotions)
+        EmotionRollupService.record(emotions)
+    LearningStateCache.push(
+        request.user.id,
+        [(emotion.emotion_type, emotion.intensity) for emotion in emotions]
+    )
+    
+    learning_state = EmotionRecognitionService.analyze_learning_state(request.user)
+    latest_emotion = emotions[-1].emotion_type
+    refresh_scheduled = refresh_worker.schedule(request.user.id, latest_emotion)
+    
+    return JsonResponse({
+        'success': True,
+        'count': len(emotions),
+        'errors': errors,
+        'emotion_type': latest_emotion,
+        'learning_state': learning_state,
+        'recommended_courses': refresh_worker.get_cached_recommendations(request.user.id),
+        'refresh_scheduled': refresh_scheduled,
+    })
+
+def _parse_sample_timestamp(value, now):
+    """
+    Convertit l'horodatage d'un échantillon (ISO 8601 ou millisecondes epoch)
+    Les horodatages absents ou dans le futur sont ramenés à `now`; ceux antérieurs
+    de plus de EMOTION_SAMPLE_MAX_AGE secondes sont refusés (ils entreraient dans la
+    fenêtre en cache comme les émotions les plus récentes).
+    """
+    if value in (None, ''):
+        return now
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        recorded_at = datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
+    else:
+        recorded_at = parse_datetime(value)
+        if recorded_at is None:
+            raise ValueError(f'Horodatage invalide: {value}')
+        if timezone.is_naive(recorded_at):
+            recorded_at = timezone.make_aware(recorded_at)
+    max_age = timedelta(seconds=getattr(settings, 'EMOTION_SAMPLE_MAX_AGE', 3600))
+    if recorded_at < now - max_age:
+        raise ValueError(f'Horodatage trop ancien: {value}')
+    return min(recorded_at, now)
+
+@login_required
+@ensure_csrf_cookie  # Jeton lu par le JavaScript de la page (envoi par lot)
 def emotion_recognition(request):
     """Page pour la reconnaissance d'émotion en temps réel"""
     return render(request, 'analytics/emotion_recognition.html')
@@ -0,0 +1,173 @@
+"""
+Rafraîchissement différé des recommandations basées sur l'émotion
+- Pool de threads local (aucun broker externe)
+- Regroupement (debounce) des rafraîchissements répétés d'un même utilisateur
+"""
+import atexit
+import logging
+import threading
+from concurrent import futures
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_recommendations(recommendations):
+    """Prépare les recommandations pour une réponse JSON"""
+    return [{
+        'id': rec.course.id,
+        'title': rec.course.title,
+        'description': rec.course.description[:100] + '...' if len(rec.course.description) > 100 else rec.course.description,
+        'difficulty': rec.course.get_difficulty_display(),
+        'score': rec.score,
+        'reason': rec.reason,
+        'url': f'/content/{rec.course.id}/'
+    } for rec in recommendations]
+
+
+class RecommendationRefreshWorker:
+    """
+    Exécute AIRecommendationService.get_courses_by_emotion hors de la requête.
+    Tant qu'un rafraîchissement est en attente pour un utilisateur, les demandes
+    suivantes ne font que mettre à jour l'émotion à utiliser.
+    """
+
+    CACHE_KEY = 'emotion_recommendations:{user_id}'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id -> émotion la plus récente
+        self._timers = {}  # user_id -> minuteur du rafraîchissement en attente
+        self._running = set()  # Rafraîchissements soumis au pool, non terminés
+        self._executor = None
+        self.scheduled = 0
+        self.coalesced = 0
+        self.completed = 0
+
+    @staticmethod
+    def get_cached_recommendations(user_id):
+        """Dernières recommandations calculées pour l'utilisateur (liste sérialisée)"""
+        return cache.get(RecommendationRefreshWorker.CACHE_KEY.format(user_id=user_id), [])
+
+    def schedule(self, user_id, emotion_type):
+        """
+        Programme un rafraîchissement; retourne False si la demande a été
+        regroupée avec un rafraîchissement déjà en attente
+        """
+        if not getattr(settings, 'RECOMMENDATION_REFRESH_ASYNC', True):
+            self.refresh(user_id, emotion_type)
+            return True
+
+        with self._lock:
+            if user_id in self._pending:
+                self._pending[user_id] = emotion_type
+                self.coalesced += 1
+                return False
+            self._pending[user_id] = emotion_type
+            self.scheduled += 1
+
+            timer = threading.Timer(
+                getattr(settings, 'RECOMMENDATION_REFRESH_DEBOUNCE', 5),
+                self._submit,
+                args=(user_id,)
+            )
+            timer.daemon = True
+            self._timers[user_id] = timer
+        timer.start()
+        return True
+
+    def refresh(self, user_id, emotion_type):
+        """Recalcule et met en cache les recommandations de l'utilisateur"""
+        from .ai_service import AIRecommendationService
+
+        user = User.objects.get(pk=user_id)
+        recommendations = AIRecommendationService.get_courses_by_emotion(user, emotion_type, limit=5)
+        cache.set(
+            RecommendationRefreshWorker.CACHE_KEY.format(user_id=user_id),
+            serialize_recommendations(recommendations),
+            getattr(settings, 'LEARNING_STATE_CACHE_TIMEOUT', 3600)
+        )
+        self.completed += 1
+        return recommendations
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'scheduled': self.scheduled,
+                'coalesced': self.coalesced,
+                'completed': self.completed,
+            }
+
+    def drain(self):
+        """
+        Exécute immédiatement, dans le thread appelant, les rafraîchissements en
+        attente et attend la fin de ceux déjà lancés. Retourne le nombre exécuté.
+        """
+        with self._lock:
+            timers, self._timers = self._timers, {}
+            pending, self._pending = self._pending, {}
+            running = set(self._running)
+        for timer in timers.values():
+            timer.cancel()
+        for user_id, emotion_type in pending.items():
+            try:
+                self.refresh(user_id, emotion_type)
+            except Exception:
+                logger.exception("Échec du rafraîchissement des recommandations (utilisateur %s)", user_id)
+        futures.wait(running)
+        return len(pending)
+
+    def shutdown(self, wait=True):
+        """Annule les rafraîchissements en attente et arrête le pool (fin de processus, tests)"""
+        with self._lock:
+            timers, self._timers = self._timers, {}
+            self._pending.clear()
+            executor, self._executor = self._executor, None
+        for timer in timers.values():
+            timer.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'RECOMMENDATION_REFRESH_WORKERS', 2),
+                    thread_name_prefix='recommendation-refresh'
+                )
+            return self._executor
+
+    def _submit(self, user_id):
+        with self._lock:
+            if self._timers.pop(user_id, None) is None:
+                return  # Annulé par drain() ou shutdown()
+        future = self._get_executor().submit(self._run, user_id)
+        with self._lock:
+            self._running.add(future)
+        future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self._lock:
+            self._running.discard(future)
+
+    def _run(self, user_id):
+        with self._lock:
+            emotion_type = self._pending.pop(user_id, None)
+        if emotion_type is None:
+            return
+        try:
+            self.refresh(user_id, emotion_type)
+        except Exception:
+            logger.exception("Échec du rafraîchissement des recommandations (utilisateur %s)", user_id)
+        finally:
+            # Chaque thread du pool possède sa propre connexion
+            connection.close()
+
+
+refresh_worker = RecommendationRefreshWorker()
+atexit.register(refresh_worker.shutdown, wait=False)
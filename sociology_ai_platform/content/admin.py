@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Video, Document, Quiz, Exercise
+from .models import Course, Video, Document, Quiz, Exercise, GenerationJob
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -30,3 +30,10 @@ class ExerciseAdmin(admin.ModelAdmin):
     list_display = ['title', 'course', 'difficulty']
     list_filter = ['course', 'difficulty']
     search_fields = ['title']
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['dedup_key', 'course_ids', 'error', 'started_at', 'finished_at']
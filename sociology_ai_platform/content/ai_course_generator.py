@@ -1,225 +1,26 @@
 """
 Service d'IA pour générer automatiquement des cours dans toutes les matières
+Les cours et leurs ressources sont construits en mémoire puis enregistrés par
+lots (un bulk_create par modèle) dans une seule transaction.
 """
+import hashlib
+import json
 import random
+from django.db import IntegrityError, transaction
+from .course_templates import get_catalogue
 from .models import Course, Video, Quiz, Exercise
+from .signals import courses_generated
 
 class AICourseGenerator:
     """Générateur de cours basé sur l'IA pour toutes les matières"""
     
-    # Mapping émotion -> matières recommandées
-    EMOTION_TO_SUBJECTS = {
-        'happy': ['sociology', 'literature', 'arts', 'history', 'philosophy'],
-        'excited': ['mathematics', 'science', 'computer_science', 'psychology'],
-        'focused': ['mathematics', 'science', 'philosophy', 'economics', 'computer_science'],
-        'neutral': ['sociology', 'history', 'geography', 'languages', 'literature'],
-        'confused': ['sociology', 'history', 'languages', 'arts'],
-        'sad': ['literature', 'arts', 'philosophy', 'psychology', 'history']
-    }
-    
-    # Templates de cours par matière
-    COURSE_TEMPLATES = {
-        'sociology': {
-            'beginner': [
-                {'topics': ['Introduction à la sociologie', 'Les fondements de la société', 'Les concepts de base'], 
-                 'descriptions': ['Un cours d\'introduction complet pour comprendre les bases de la sociologie moderne.']},
-            ],
-            'intermediate': [
-                {'topics': ['Théories sociologiques contemporaines', 'Stratification sociale', 'Sociologie des organisations'], 
-                 'descriptions': ['Approfondissez votre compréhension des théories sociologiques modernes.']},
-            ],
-            'advanced': [
-                {'topics': ['Théories critiques en sociologie', 'Sociologie postmoderne', 'Méthodologies avancées'], 
-                 'descriptions': ['Plongez dans les théories critiques et leurs applications contemporaines.']},
-            ]
-        },
-        'mathematics': {
-            'beginner': [
-                {'topics': ['Algèbre de base', 'Géométrie élémentaire', 'Arithmétique'], 
-                 'descriptions': ['Maîtrisez les fondamentaux des mathématiques.']},
-            ],
-            'intermediate': [
-                {'topics': ['Calcul différentiel', 'Statistiques', 'Probabilités'], 
-                 'descriptions': ['Approfondissez vos connaissances mathématiques.']},
-            ],
-            'advanced': [
-                {'topics': ['Analyse avancée', 'Algèbre linéaire', 'Topologie'], 
-                 'descriptions': ['Explorez les concepts mathématiques avancés.']},
-            ]
-        },
-        'science': {
-            'beginner': [
-                {'topics': ['Introduction à la physique', 'Chimie de base', 'Biologie cellulaire'], 
-                 'descriptions': ['Découvrez les principes fondamentaux des sciences.']},
-            ],
-            'intermediate': [
-                {'topics': ['Mécanique quantique', 'Chimie organique', 'Génétique'], 
-                 'descriptions': ['Approfondissez votre compréhension des sciences.']},
-            ],
-            'advanced': [
-                {'topics': ['Physique théorique', 'Biochimie avancée', 'Évolution'], 
-                 'descriptions': ['Explorez les frontières de la science moderne.']},
-            ]
-        },
-        'history': {
-            'beginner': [
-                {'topics': ['Histoire ancienne', 'Histoire médiévale', 'Histoire moderne'], 
-                 'descriptions': ['Découvrez les grandes périodes de l\'histoire.']},
-            ],
-            'intermediate': [
-                {'topics': ['Histoire contemporaine', 'Histoire des civilisations', 'Histoire économique'], 
-                 'descriptions': ['Analysez les événements historiques majeurs.']},
-            ],
-            'advanced': [
-                {'topics': ['Historiographie', 'Histoire comparée', 'Méthodologie historique'], 
-                 'descriptions': ['Maîtrisez les méthodes de recherche historique.']},
-            ]
-        },
-        'literature': {
-            'beginner': [
-                {'topics': ['Introduction à la littérature', 'Genres littéraires', 'Analyse de texte'], 
-                 'descriptions': ['Découvrez les bases de l\'analyse littéraire.']},
-            ],
-            'intermediate': [
-                {'topics': ['Littérature classique', 'Mouvements littéraires', 'Critique littéraire'], 
-                 'descriptions': ['Explorez les grands courants littéraires.']},
-            ],
-            'advanced': [
-                {'topics': ['Théorie littéraire', 'Littérature comparée', 'Écriture créative'], 
-                 'descriptions': ['Approfondissez votre compréhension de la littérature.']},
-            ]
-        },
-        'philosophy': {
-            'beginner': [
-                {'topics': ['Introduction à la philosophie', 'Logique de base', 'Éthique fondamentale'], 
-                 'descriptions': ['Découvrez les concepts fondamentaux de la philosophie.']},
-            ],
-            'intermediate': [
-                {'topics': ['Philosophie antique', 'Philosophie moderne', 'Épistémologie'], 
-                 'descriptions': ['Explorez les grandes traditions philosophiques.']},
-            ],
-            'advanced': [
-                {'topics': ['Philosophie contemporaine', 'Métaphysique', 'Philosophie du langage'], 
-                 'descriptions': ['Plongez dans les débats philosophiques contemporains.']},
-            ]
-        },
-        'psychology': {
-            'beginner': [
-                {'topics': ['Introduction à la psychologie', 'Psychologie cognitive', 'Développement humain'], 
-                 'descriptions': ['Découvrez les bases de la psychologie.']},
-            ],
-            'intermediate': [
-                {'topics': ['Psychologie sociale', 'Psychologie clinique', 'Neurosciences'], 
-                 'descriptions': ['Approfondissez votre compréhension de l\'esprit humain.']},
-            ],
-            'advanced': [
-                {'topics': ['Psychologie expérimentale', 'Thérapies avancées', 'Neuropsychologie'], 
-                 'descriptions': ['Explorez les recherches avancées en psychologie.']},
-            ]
-        },
-        'economics': {
-            'beginner': [
-                {'topics': ['Économie de base', 'Microéconomie', 'Macroéconomie'], 
-                 'descriptions': ['Comprenez les principes fondamentaux de l\'économie.']},
-            ],
-            'intermediate': [
-                {'topics': ['Économie internationale', 'Économie du développement', 'Finance'], 
-                 'descriptions': ['Analysez les mécanismes économiques complexes.']},
-            ],
-            'advanced': [
-                {'topics': ['Économétrie', 'Théorie économique avancée', 'Politique économique'], 
-                 'descriptions': ['Maîtrisez les modèles économiques avancés.']},
-            ]
-        },
-        'languages': {
-            'beginner': [
-                {'topics': ['Grammaire de base', 'Vocabulaire essentiel', 'Communication orale'], 
-                 'descriptions': ['Apprenez les bases d\'une nouvelle langue.']},
-            ],
-            'intermediate': [
-                {'topics': ['Grammaire avancée', 'Expression écrite', 'Compréhension orale'], 
-                 'descriptions': ['Améliorez votre maîtrise de la langue.']},
-            ],
-            'advanced': [
-                {'topics': ['Littérature en langue étrangère', 'Traduction', 'Linguistique'], 
-                 'descriptions': ['Maîtrisez la langue à un niveau avancé.']},
-            ]
-        },
-        'arts': {
-            'beginner': [
-                {'topics': ['Histoire de l\'art', 'Techniques de base', 'Analyse d\'œuvres'], 
-                 'descriptions': ['Découvrez les fondamentaux de l\'art.']},
-            ],
-            'intermediate': [
-                {'topics': ['Mouvements artistiques', 'Création artistique', 'Critique d\'art'], 
-                 'descriptions': ['Explorez les différents courants artistiques.']},
-            ],
-            'advanced': [
-                {'topics': ['Théorie de l\'art', 'Art contemporain', 'Conservation et restauration'], 
-                 'descriptions': ['Approfondissez votre compréhension de l\'art.']},
-            ]
-        },
-        'geography': {
-            'beginner': [
-                {'topics': ['Géographie physique', 'Géographie humaine', 'Cartographie'], 
-                 'descriptions': ['Découvrez les bases de la géographie.']},
-            ],
-            'intermediate': [
-                {'topics': ['Géographie régionale', 'Géopolitique', 'Environnement'], 
-                 'descriptions': ['Analysez les enjeux géographiques contemporains.']},
-            ],
-            'advanced': [
-                {'topics': ['Géographie économique', 'Aménagement du territoire', 'Géographie urbaine'], 
-                 'descriptions': ['Maîtrisez les concepts géographiques avancés.']},
-            ]
-        },
-        'computer_science': {
-            'beginner': [
-                {'topics': ['Programmation de base', 'Algorithmes simples', 'Structures de données'], 
-                 'descriptions': ['Apprenez les bases de la programmation.']},
-            ],
-            'intermediate': [
-                {'topics': ['Programmation orientée objet', 'Bases de données', 'Réseaux'], 
-                 'descriptions': ['Développez vos compétences en programmation.']},
-            ],
-            'advanced': [
-                {'topics': ['Intelligence artificielle', 'Architecture logicielle', 'Sécurité informatique'], 
-                 'descriptions': ['Maîtrisez les technologies avancées.']},
-            ]
-        }
-    }
-    
-    QUIZ_QUESTIONS_TEMPLATES = {
-        'beginner': [
-            {'question': 'Quel est le concept fondamental de cette matière ?', 
-             'options': ['Option A', 'Option B', 'Option C', 'Option D'], 'correct': 0},
-        ],
-        'intermediate': [
-            {'question': 'Comment appliquer ce concept dans un contexte réel ?', 
-             'options': ['Méthode 1', 'Méthode 2', 'Méthode 3', 'Méthode 4'], 'correct': 0},
-        ],
-        'advanced': [
-            {'question': 'Quelle est l\'approche théorique la plus appropriée ?', 
-             'options': ['Théorie A', 'Théorie B', 'Théorie C', 'Théorie D'], 'correct': 0},
-        ]
-    }
-    
-    EXERCISE_TEMPLATES = {
-        'beginner': [
-            {'title': 'Exercice pratique de base', 'content': 'Appliquez les concepts fondamentaux à un cas concret.', 'difficulty': 'easy'},
-        ],
-        'intermediate': [
-            {'title': 'Analyse approfondie', 'content': 'Réalisez une analyse détaillée en utilisant les concepts appris.', 'difficulty': 'medium'},
-        ],
-        'advanced': [
-            {'title': 'Projet de recherche', 'content': 'Développez un projet complet intégrant les concepts avancés.', 'difficulty': 'hard'},
-        ]
-    }
+    # Templates (matières, niveaux, quiz, exercices, émotions): content/data/course_templates.json,
+    # chargés une fois par content.course_templates
     
     @staticmethod
     def get_subjects_by_emotion(emotion_type):
         """Retourne les matières recommandées selon l'émotion"""
-        return AICourseGenerator.EMOTION_TO_SUBJECTS.get(emotion_type, ['sociology', 'history', 'literature'])
+        return list(get_catalogue().emotion(emotion_type).subjects)
     
     @staticmethod
     def generate_course(topic=None, difficulty='intermediate', subject='sociology', user_preferences=None):
@@ -232,148 +33,171 @@ class AICourseGenerator:
             subject: Matière du cours
             user_preferences: Préférences de l'utilisateur (optionnel)
         """
-        # Obtenir les templates pour la matière
-        subject_templates = AICourseGenerator.COURSE_TEMPLATES.get(
-            subject, 
-            AICourseGenerator.COURSE_TEMPLATES['sociology']
-        )
-        
-        difficulty_templates = subject_templates.get(
-            difficulty,
-            subject_templates.get('intermediate', subject_templates.get('beginner', [{}]))
-        )
+        return AICourseGenerator.generate_courses([
+            {'topic': topic, 'difficulty': difficulty, 'subject': subject}
+        ])[0]
+    
+    @staticmethod
+    def generate_courses(specs, batch_size=None):
+        """
+        Génère plusieurs cours en une transaction: tous les objets sont construits en
+        mémoire puis insérés avec un bulk_create par modèle (Course, Video, Quiz, Exercise).
         
-        if not difficulty_templates:
-            difficulty_templates = [{'topics': [f'Cours de {subject}'], 'descriptions': ['Cours généré automatiquement.']}]
+        Args:
+            specs: Liste de dicts {'topic', 'difficulty', 'subject'} (clés optionnelles)
+            batch_size: Nombre maximal de lignes par INSERT (par défaut, le maximum de la base)
         
-        template = random.choice(difficulty_templates) if difficulty_templates else {}
+        Un cours dont le contenu existe déjà (même content_hash) n'est pas recréé: le cours
+        existant est retourné à sa place. Les signaux post_save ne sont pas émis;
+        courses_generated l'est une fois par lot, pour les seuls cours créés.
+        """
+        plans = []
+        for spec in specs:
+            course = AICourseGenerator._build_course(
+                spec.get('topic'),
+                spec.get('difficulty', 'intermediate'),
+                spec.get('subject', 'sociology'),
+            )
+            videos = AICourseGenerator._generate_videos(course, course.difficulty, course.subject)
+            quiz = AICourseGenerator._generate_quiz(course, course.difficulty)
+            exercises = AICourseGenerator._generate_exercises(course, course.difficulty)
+            course.content_hash = AICourseGenerator.content_hash(course, videos, [quiz], exercises)
+            plans.append((course, videos, quiz, exercises))
+        if not plans:
+            return []
+        
+        for attempt in range(2):
+            existing = Course.objects.in_bulk(
+                {course.content_hash for course, *_ in plans}, field_name='content_hash'
+            )
+            courses, new_plans = [], {}
+            for plan in plans:
+                content_hash = plan[0].content_hash
+                if content_hash not in existing and content_hash not in new_plans:
+                    new_plans[content_hash] = plan
+                courses.append(existing.get(content_hash) or new_plans[content_hash][0])
+            try:
+                with transaction.atomic():
+                    AICourseGenerator._insert(list(new_plans.values()), batch_size)
+            except IntegrityError:
+                # Même contenu inséré entre-temps par une génération concurrente
+                if attempt:
+                    raise
+                for course, *_ in plans:
+                    course.pk = None
+            else:
+                return courses
+    
+    @staticmethod
+    def _insert(plans, batch_size):
+        """Un bulk_create par modèle pour des cours construits en mémoire"""
+        if not plans:
+            return
+        courses = [course for course, *_ in plans]
+        # Les id des cours (renvoyés par l'INSERT) sont nécessaires aux ressources
+        Course.objects.bulk_create(courses, batch_size=batch_size)
+        videos, quizzes, exercises = [], [], []
+        for course, course_videos, quiz, course_exercises in plans:
+            for position, video in enumerate(course_videos, 1):
+                video.url = f"https://example.com/video/{course.id}/{position}"
+            videos.extend(course_videos)
+            quizzes.append(quiz)
+            exercises.extend(course_exercises)
+        Video.objects.bulk_create(videos, batch_size=batch_size)
+        Quiz.objects.bulk_create(quizzes, batch_size=batch_size)
+        Exercise.objects.bulk_create(exercises, batch_size=batch_size)
+        courses_generated.send(sender=AICourseGenerator, courses=courses)
+    
+    @staticmethod
+    def content_hash(course, videos, quizzes, exercises, documents=()):
+        """
+        Empreinte SHA-256 du contenu d'un cours et de ses ressources, dans leur ordre.
+        La durée des vidéos (tirée au hasard) et leur URL (dérivée de l'id) n'en font pas partie.
+        """
+        content = [
+            course.subject, course.difficulty, course.title, course.description,
+            [video.title for video in videos],
+            [[quiz.title, quiz.questions] for quiz in quizzes],
+            [[exercise.title, exercise.difficulty, exercise.content] for exercise in exercises],
+        ]
+        if documents:
+            content.append([[document.title, document.file.name] for document in documents])
+        payload = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    @staticmethod
+    def _build_course(topic, difficulty, subject):
+        """Construit (sans l'enregistrer) un cours à partir des templates de la matière"""
+        templates = get_catalogue().level(subject, difficulty)
+        template = random.choice(templates.courses)
         
         # Générer le titre
         if topic:
             title = topic
         else:
-            topics = template.get('topics', [f'Cours de {subject}'])
-            title = random.choice(topics) if topics else f'Cours de {subject}'
+            title = random.choice(template.topics) if template.topics else f'Cours de {subject}'
         
         # Générer la description
-        descriptions = template.get('descriptions', ['Cours généré automatiquement.'])
-        description = random.choice(descriptions) if descriptions else 'Cours généré automatiquement.'
-        description += f" Ce cours de niveau {AICourseGenerator._get_difficulty_label(difficulty)} vous permettra d'approfondir vos connaissances en {AICourseGenerator._get_subject_label(subject)}."
+        description = random.choice(template.descriptions) if template.descriptions else 'Cours généré automatiquement.'
+        description += f" Ce cours de niveau {templates.difficulty_label} vous permettra d'approfondir vos connaissances en {templates.subject_label}."
         
-        # Créer le cours
-        course = Course.objects.create(
+        return Course(
             title=title,
             description=description,
             difficulty=difficulty,
             subject=subject
         )
-        
-        # Générer des vidéos
-        AICourseGenerator._generate_videos(course, difficulty, subject)
-        
-        # Générer un quiz
-        AICourseGenerator._generate_quiz(course, difficulty)
-        
-        # Générer des exercices
-        AICourseGenerator._generate_exercises(course, difficulty)
-        
-        return course
     
     @staticmethod
     def _generate_videos(course, difficulty, subject):
-        """Génère des vidéos pour le cours"""
-        video_count = {'beginner': 3, 'intermediate': 4, 'advanced': 5}.get(difficulty, 4)
-        
-        video_titles_base = {
-            'beginner': ['Introduction et concepts de base', 'Applications pratiques', 'Conclusion et synthèse'],
-            'intermediate': ['Introduction théorique', 'Analyse approfondie', 'Cas pratiques', 'Conclusion et perspectives'],
-            'advanced': ['Cadre théorique avancé', 'Méthodologies complexes', 'Analyses critiques', 'Débats contemporains', 'Synthèse et réflexions']
-        }
-        
-        titles = video_titles_base.get(difficulty, video_titles_base['intermediate'])
-        
-        for i, title in enumerate(titles[:video_count]):
-            Video.objects.create(
+        """Construit (sans les enregistrer) les vidéos d'un cours; l'URL est fixée à l'insertion"""
+        return [
+            Video(
                 course=course,
                 title=f"{course.title} - {title}",
-                url=f"https://example.com/video/{course.id}/{i+1}",
                 duration=f"{random.randint(10, 30)}:00"
             )
+            for title in get_catalogue().level(subject, difficulty).video_titles
+        ]
     
     @staticmethod
     def _generate_quiz(course, difficulty):
-        """Génère un quiz pour le cours"""
-        questions_template = AICourseGenerator.QUIZ_QUESTIONS_TEMPLATES.get(
-            difficulty, 
-            AICourseGenerator.QUIZ_QUESTIONS_TEMPLATES['intermediate']
-        )
+        """Construit (sans l'enregistrer) le quiz d'un cours"""
+        questions_template = get_catalogue().level(course.subject, difficulty).quiz_questions
         
         selected_questions = random.sample(
             questions_template, 
             min(len(questions_template), random.randint(3, 5))
         )
         
-        questions = []
-        for q in selected_questions:
-            questions.append({
-                'question': q['question'],
-                'options': q['options'],
-                'correct': q['correct']
-            })
-        
-        Quiz.objects.create(
+        return Quiz(
             course=course,
             title=f"Quiz - {course.title}",
-            questions=questions
+            questions=[
+                {'question': q.question, 'options': list(q.options), 'correct': q.correct}
+                for q in selected_questions
+            ]
         )
     
     @staticmethod
     def _generate_exercises(course, difficulty):
-        """Génère des exercices pour le cours"""
-        exercise_template = AICourseGenerator.EXERCISE_TEMPLATES.get(
-            difficulty,
-            AICourseGenerator.EXERCISE_TEMPLATES['intermediate']
-        )
-        
-        exercise_count = {'beginner': 2, 'intermediate': 3, 'advanced': 4}.get(difficulty, 3)
+        """Construit (sans les enregistrer) les exercices d'un cours"""
+        templates = get_catalogue().level(course.subject, difficulty)
         
         selected_exercises = random.sample(
-            exercise_template,
-            min(len(exercise_template), exercise_count)
+            templates.exercises,
+            min(len(templates.exercises), templates.exercise_count)
         )
         
-        for ex in selected_exercises:
-            Exercise.objects.create(
+        return [
+            Exercise(
                 course=course,
-                title=f"{ex['title']} - {course.title}",
-                content=ex['content'],
-                difficulty=ex['difficulty']
+                title=f"{ex.title} - {course.title}",
+                content=ex.content,
+                difficulty=ex.difficulty
             )
-    
-    @staticmethod
-    def _get_difficulty_label(difficulty):
-        """Retourne le label de difficulté"""
-        labels = {'beginner': 'débutant', 'intermediate': 'intermédiaire', 'advanced': 'avancé'}
-        return labels.get(difficulty, 'intermédiaire')
-    
-    @staticmethod
-    def _get_subject_label(subject):
-        """Retourne le label de la matière"""
-        labels = {
-            'sociology': 'sociologie',
-            'mathematics': 'mathématiques',
-            'science': 'sciences',
-            'history': 'histoire',
-            'literature': 'littérature',
-            'philosophy': 'philosophie',
-            'psychology': 'psychologie',
-            'economics': 'économie',
-            'languages': 'langues',
-            'arts': 'arts',
-            'geography': 'géographie',
-            'computer_science': 'informatique'
-        }
-        return labels.get(subject, subject)
+            for ex in selected_exercises
+        ]
     
     @staticmethod
     def generate_course_based_on_emotion(user, emotion_type):
@@ -384,17 +208,8 @@ class AICourseGenerator:
         recommended_subjects = AICourseGenerator.get_subjects_by_emotion(emotion_type)
         subject = random.choice(recommended_subjects)
         
-        # Mapping émotion -> difficulté
-        emotion_to_difficulty = {
-            'happy': 'intermediate',
-            'excited': 'advanced',
-            'focused': 'advanced',
-            'neutral': 'intermediate',
-            'confused': 'beginner',
-            'sad': 'beginner'
-        }
-        
-        difficulty = emotion_to_difficulty.get(emotion_type, 'intermediate')
+        # Difficulté associée à l'émotion
+        difficulty = get_catalogue().emotion(emotion_type).difficulty
         
         # Générer le cours
         course = AICourseGenerator.generate_course(
@@ -409,29 +224,16 @@ class AICourseGenerator:
         """
         Génère plusieurs cours dans différentes matières selon l'émotion
         """
-        recommended_subjects = AICourseGenerator.get_subjects_by_emotion(emotion_type)
-        emotion_to_difficulty = {
-            'happy': 'intermediate',
-            'excited': 'advanced',
-            'focused': 'advanced',
-            'neutral': 'intermediate',
-            'confused': 'beginner',
-            'sad': 'beginner'
-        }
-        difficulty = emotion_to_difficulty.get(emotion_type, 'intermediate')
+        profile = get_catalogue().emotion(emotion_type)
+        recommended_subjects = list(profile.subjects)
+        difficulty = profile.difficulty
         
-        courses = []
-        # Générer un cours par matière recommandée (jusqu'à count)
+        # Générer un cours par matière recommandée (jusqu'à count), en un seul lot
         subjects_to_use = recommended_subjects[:count] if len(recommended_subjects) >= count else recommended_subjects
         
-        for subject in subjects_to_use:
-            course = AICourseGenerator.generate_course(
-                difficulty=difficulty,
-                subject=subject
-            )
-            courses.append(course)
-        
-        return courses
+        return AICourseGenerator.generate_courses([
+            {'difficulty': difficulty, 'subject': subject} for subject in subjects_to_use
+        ])
     
     @staticmethod
     def generate_course_based_on_profile(user):
@@ -442,8 +244,7 @@ class AICourseGenerator:
         difficulty = profile.level
         
         # Sélectionner une matière aléatoire
-        all_subjects = list(AICourseGenerator.COURSE_TEMPLATES.keys())
-        subject = random.choice(all_subjects)
+        subject = random.choice(get_catalogue().subjects)
         
         course = AICourseGenerator.generate_course(
             difficulty=difficulty,
@@ -0,0 +1,126 @@
+"""
+Caches applicatifs du contenu pédagogique (framework de cache Django)
+- Fragment HTML rendu des ressources d'un cours (vidéos, documents, quiz, exercices)
+- Nombre de cours par couple (matière, difficulté) pour les filtres du catalogue
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+class CourseContentCache:
+    """
+    Conserve, par cours, la section « ressources » déjà rendue de course_detail.
+    Le contenu d'un cours change rarement après sa génération: le fragment est
+    invalidé par les signaux de Video, Document, Quiz et Exercise (content.models).
+    Les modifications en masse (QuerySet.update) n'émettent pas de signal et
+    doivent appeler invalidate explicitement.
+    """
+
+    KEY_PREFIX = 'course_content'
+    TEMPLATE = 'content/_course_content.html'
+
+    @staticmethod
+    def _key(course_id):
+        return f'{CourseContentCache.KEY_PREFIX}:{course_id}'
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'COURSE_CONTENT_CACHE_TIMEOUT', 86400)
+
+    @staticmethod
+    def get(course_id):
+        fragment = cache.get(CourseContentCache._key(course_id))
+        return mark_safe(fragment) if fragment is not None else None
+
+    @staticmethod
+    def render(course, request=None):
+        """
+        Rend et met en cache le fragment d'un cours chargé avec
+        prefetch_related('video_set', 'document_set', 'quiz_set', 'exercise_set')
+        """
+        fragment = render_to_string(CourseContentCache.TEMPLATE, {
+            'videos': course.video_set.all(),
+            'documents': course.document_set.all(),
+            'quizzes': course.quiz_set.all(),
+            'exercises': course.exercise_set.all(),
+        }, request=request)
+        cache.set(CourseContentCache._key(course.id), str(fragment), CourseContentCache._timeout())
+        return fragment
+
+    @staticmethod
+    def invalidate(course_id):
+        cache.delete(CourseContentCache._key(course_id))
+
+
+class CourseFacetCache:
+    """
+    Nombre de cours par couple (matière, difficulté), une clé de cache par couple.
+    Calculé en une requête GROUP BY lors d'un défaut de cache, puis incrémenté ou
+    décrémenté (cache.incr/decr, atomiques) à la création ou la suppression d'un cours.
+    La durée de vie borne l'écart éventuel dû à des écritures concurrentes.
+    """
+
+    KEY_PREFIX = 'course_facets'
+
+    @staticmethod
+    def _key(subject, difficulty):
+        return f'{CourseFacetCache.KEY_PREFIX}:{subject}:{difficulty}'
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'COURSE_FACETS_CACHE_TIMEOUT', 3600)
+
+    @staticmethod
+    def _pairs():
+        from .models import Course
+        return [
+            (subject, difficulty)
+            for subject, _ in Course.SUBJECT_CHOICES
+            for difficulty, _ in Course.DIFFICULTY_CHOICES
+        ]
+
+    @staticmethod
+    def get_counts():
+        """Retourne {(matière, difficulté): nombre de cours}"""
+        from .models import Course
+
+        pairs = CourseFacetCache._pairs()
+        keys = {CourseFacetCache._key(*pair): pair for pair in pairs}
+        cached = cache.get_many(keys)
+        if len(cached) == len(keys):
+            return {keys[key]: count for key, count in cached.items()}
+
+        counts = dict.fromkeys(pairs, 0)
+        for row in Course.objects.values('subject', 'difficulty').annotate(count=Count('id')).order_by():
+            pair = (row['subject'], row['difficulty'])
+            if pair in counts:
+                counts[pair] = row['count']
+        cache.set_many(
+            {CourseFacetCache._key(*pair): count for pair, count in counts.items()},
+            CourseFacetCache._timeout()
+        )
+        return counts
+
+    @staticmethod
+    def apply(deltas):
+        """
+        Reporte des créations/suppressions {(matière, difficulté): variation} après
+        validation de la transaction. Une clé absente sera recalculée à la lecture.
+        """
+        def update():
+            for (subject, difficulty), delta in deltas.items():
+                if not delta:
+                    continue
+                try:
+                    cache.incr(CourseFacetCache._key(subject, difficulty), delta)
+                except ValueError:
+                    pass
+        transaction.on_commit(update)
+
+    @staticmethod
+    def invalidate():
+        cache.delete_many([CourseFacetCache._key(*pair) for pair in CourseFacetCache._pairs()])
@@ -0,0 +1,210 @@
+"""
+Catalogue des templates de génération de cours (AICourseGenerator)
+- Chargé une fois depuis un fichier JSON versionné (settings.COURSE_TEMPLATES_FILE)
+- Structure immuable indexée par (matière, difficulté), replis résolus au chargement
+- Rechargé à chaud quand le fichier change (vérification au plus toutes les
+  COURSE_TEMPLATES_RELOAD_INTERVAL secondes); un fichier invalide garde l'ancien catalogue
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+DEFAULT_FILE = Path(__file__).resolve().parent / 'data' / 'course_templates.json'
+
+
+class CourseTemplate(NamedTuple):
+    topics: tuple
+    descriptions: tuple
+
+
+class QuizQuestion(NamedTuple):
+    question: str
+    options: tuple
+    correct: int
+
+
+class ExerciseTemplate(NamedTuple):
+    title: str
+    content: str
+    difficulty: str
+
+
+class LevelTemplates(NamedTuple):
+    """Tout ce que la génération d'un cours (matière, difficulté) lit, replis compris"""
+    subject_label: str
+    difficulty_label: str
+    courses: tuple  # CourseTemplate
+    video_titles: tuple
+    quiz_questions: tuple  # QuizQuestion
+    exercises: tuple  # ExerciseTemplate
+    exercise_count: int
+
+
+class EmotionProfile(NamedTuple):
+    subjects: tuple
+    difficulty: str
+
+
+# Matière sans template: titre et description génériques (voir AICourseGenerator._build_course)
+FALLBACK_COURSE = CourseTemplate((), ())
+
+
+class TemplateCatalogue:
+    """Catalogue en lecture seule; construit par TemplateCatalogue.from_data"""
+
+    __slots__ = ('version', 'subjects', 'default_subject', 'default_difficulty', '_levels', '_emotions',
+                 '_default_emotion', '_data')
+
+    def __init__(self, version, levels, emotions, default_emotion, default_subject, default_difficulty, data):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'subjects', tuple(dict.fromkeys(subject for subject, _ in levels)))
+        object.__setattr__(self, 'default_subject', default_subject)
+        object.__setattr__(self, 'default_difficulty', default_difficulty)
+        object.__setattr__(self, '_levels', MappingProxyType(levels))
+        object.__setattr__(self, '_emotions', MappingProxyType(emotions))
+        object.__setattr__(self, '_default_emotion', default_emotion)
+        object.__setattr__(self, '_data', data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Le catalogue de templates est immuable")
+
+    def level(self, subject, difficulty):
+        """Templates de (matière, difficulté); une clé inconnue est résolue par les replis"""
+        templates = self._levels.get((subject, difficulty))
+        if templates is None:
+            templates = _resolve_level(self._data, subject, difficulty)
+        return templates
+
+    def emotion(self, emotion_type):
+        return self._emotions.get(emotion_type, self._default_emotion)
+
+    @classmethod
+    def from_data(cls, data):
+        """Valide le contenu du fichier et précalcule chaque couple (matière, difficulté)"""
+        version = data.get('version')
+        if version != SCHEMA_VERSION:
+            raise ImproperlyConfigured(
+                f"Version {version!r} du catalogue de templates non prise en charge (attendue: {SCHEMA_VERSION})"
+            )
+        try:
+            levels = {
+                (subject, difficulty): _resolve_level(data, subject, difficulty)
+                for subject in data['courses']
+                for difficulty in data['difficulty_labels']
+            }
+            emotions = {
+                emotion: EmotionProfile(tuple(profile['subjects']), profile['difficulty'])
+                for emotion, profile in data['emotions'].items()
+            }
+            default_emotion = EmotionProfile(tuple(data['default_emotion_subjects']), data['default_difficulty'])
+            return cls(
+                version, levels, emotions, default_emotion,
+                data['default_subject'], data['default_difficulty'], data
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ImproperlyConfigured(f"Catalogue de templates invalide: {e!r}") from e
+
+
+def _resolve_level(data, subject, difficulty):
+    """Replis: matière inconnue -> matière par défaut; difficulté absente -> intermédiaire -> débutant"""
+    default_difficulty = data['default_difficulty']
+    subject_templates = data['courses'].get(subject) or data['courses'][data['default_subject']]
+    courses = subject_templates.get(difficulty)
+    if courses is None:
+        courses = subject_templates.get(default_difficulty, subject_templates.get('beginner', []))
+    courses = tuple(
+        CourseTemplate(
+            tuple(template.get('topics') or ()),
+            tuple(template.get('descriptions') or ()),
+        )
+        for template in courses
+    ) or (FALLBACK_COURSE,)
+
+    quiz_questions = data['quiz_questions'].get(difficulty) or data['quiz_questions'][default_difficulty]
+    exercises = data['exercises'].get(difficulty) or data['exercises'][default_difficulty]
+    return LevelTemplates(
+        subject_label=data['subject_labels'].get(subject, subject),
+        difficulty_label=data['difficulty_labels'].get(difficulty, data['difficulty_labels'][default_difficulty]),
+        courses=courses,
+        video_titles=tuple(data['videos'].get(difficulty) or data['videos'][default_difficulty]),
+        quiz_questions=tuple(
+            QuizQuestion(q['question'], tuple(q['options']), q['correct']) for q in quiz_questions
+        ),
+        exercises=tuple(
+            ExerciseTemplate(ex['title'], ex['content'], ex['difficulty']) for ex in exercises
+        ),
+        exercise_count=data['exercise_counts'].get(difficulty, data['exercise_counts'][default_difficulty]),
+    )
+
+
+class _CatalogueLoader:
+    """Catalogue courant du processus, rechargé quand la date de modification du fichier change"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalogue = None
+        self._path = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self.reloads = 0
+
+    @staticmethod
+    def path():
+        return Path(getattr(settings, 'COURSE_TEMPLATES_FILE', DEFAULT_FILE))
+
+    def get(self):
+        catalogue = self._catalogue
+        now = time.monotonic()
+        if catalogue is not None and now - self._checked_at < getattr(settings, 'COURSE_TEMPLATES_RELOAD_INTERVAL', 2):
+            return catalogue
+        with self._lock:
+            self._checked_at = now
+            path = self.path()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError as e:
+                if self._catalogue is None:
+                    raise ImproperlyConfigured(f"Catalogue de templates introuvable: {path}") from e
+                return self._catalogue
+            if self._catalogue is None or (path, mtime) != (self._path, self._mtime):
+                self._load(path, mtime)
+            return self._catalogue
+
+    def _load(self, path, mtime):
+        try:
+            with open(path, encoding='utf-8') as f:
+                catalogue = TemplateCatalogue.from_data(json.load(f))
+        except (OSError, ValueError, ImproperlyConfigured):
+            if self._catalogue is None:
+                raise
+            logger.exception("Catalogue de templates %s invalide: version %s conservée", path, self._catalogue.version)
+        else:
+            self._catalogue = catalogue
+            self.reloads += 1
+        # Pas de nouvelle tentative tant que le fichier ne change pas
+        self._path, self._mtime = path, mtime
+
+    def reset(self):
+        """Oublie le catalogue courant (tests, changement de COURSE_TEMPLATES_FILE)"""
+        with self._lock:
+            self._catalogue = self._path = self._mtime = None
+            self._checked_at = 0.0
+
+
+catalogue_loader = _CatalogueLoader()
+
+
+def get_catalogue():
+    """Catalogue de templates courant"""
+    return catalogue_loader.get()
@@ -0,0 +1,60 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from content.cache import CourseContentCache
+from content.models import Course
+from content.views import course_detail
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence de course_detail sans fragment en cache (premier affichage) "
+        "et avec fragment en cache (affichages suivants)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help="Id du cours mesuré (par défaut, le premier cours)")
+        parser.add_argument('--repeat', type=int, default=200, help="Nombre d'affichages par scénario")
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0:
+            raise CommandError("--repeat doit être strictement positif.")
+        course = Course.objects.filter(id=options['course']) if options['course'] else Course.objects.order_by('id')
+        course = course.first()
+        user = User.objects.order_by('id').first()
+        if course is None or user is None:
+            raise CommandError("Il faut au moins un cours et un utilisateur.")
+
+        request = RequestFactory().get(reverse('course_detail', args=[course.id]))
+        request.user = user
+
+        results = {}
+        for label, cold in (('sans cache', True), ('avec cache', False)):
+            CourseContentCache.invalidate(course.id)
+            course_detail(request, course.id)  # préchauffage (gabarits, cache)
+            durations = []
+            for _ in range(options['repeat']):
+                if cold:
+                    CourseContentCache.invalidate(course.id)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    course_detail(request, course.id)
+                    durations.append((time.perf_counter() - started) * 1000)
+            durations.sort()
+            results[label] = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            self.stdout.write(
+                f"{label:<11} médiane {statistics.median(durations):7.2f}ms  "
+                f"p95 {results[label]:7.2f}ms  {len(queries)} requêtes"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"p95 divisé par {results['sans cache'] / results['avec cache']:.1f} grâce au fragment en cache "
+            f"(cours #{course.id})."
+        ))
@@ -0,0 +1,88 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from content.ai_course_generator import AICourseGenerator
+from content.course_templates import TemplateCatalogue, catalogue_loader, get_catalogue
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark du coût de génération d'un cours: chargement du catalogue de templates, "
+        "construction en mémoire d'un cours et de ses ressources, puis insertion par lots annulée"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=2000, help="Nombre de cours construits par mesure")
+        parser.add_argument(
+            '--insert',
+            type=int,
+            default=500,
+            help="Nombre de cours insérés (transaction annulée) pour mesurer le coût avec la base; 0 pour ignorer",
+        )
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat <= 0 or options['insert'] < 0:
+            raise CommandError("--repeat doit être strictement positif et --insert positif.")
+        random.seed(42)
+
+        catalogue = get_catalogue()
+        path = catalogue_loader.path()
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as f:
+            TemplateCatalogue.from_data(json.load(f))
+        self.stdout.write(
+            f"Chargement du catalogue v{catalogue.version} ({len(catalogue.subjects)} matières): "
+            f"{(time.perf_counter() - started) * 1000:.2f}ms"
+        )
+
+        pairs = [(subject, difficulty) for subject in catalogue.subjects
+                 for difficulty in ('beginner', 'intermediate', 'advanced')]
+        specs = [pairs[i % len(pairs)] for i in range(repeat)]
+
+        self._measure("Lecture (matière, difficulté)", repeat, lambda: [
+            get_catalogue().level(subject, difficulty) for subject, difficulty in specs
+        ])
+        self._measure("Construction d'un cours complet", repeat, lambda: [
+            self._build(subject, difficulty) for subject, difficulty in specs
+        ])
+
+        if options['insert']:
+            insert_specs = [{'subject': s, 'difficulty': d} for s, d in specs[:options['insert']]]
+            try:
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    AICourseGenerator.generate_courses(insert_specs)
+                    elapsed = time.perf_counter() - started
+                    raise _Rollback
+            except _Rollback:
+                pass
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Génération avec insertion':<34} {elapsed / len(insert_specs) * 1e6:8.1f}µs/cours "
+                f"({len(insert_specs) / elapsed:.0f} cours/s, annulée)"
+            ))
+
+    @staticmethod
+    def _build(subject, difficulty):
+        course = AICourseGenerator._build_course(None, difficulty, subject)
+        videos = AICourseGenerator._generate_videos(course, difficulty, subject)
+        quiz = AICourseGenerator._generate_quiz(course, difficulty)
+        exercises = AICourseGenerator._generate_exercises(course, difficulty)
+        return AICourseGenerator.content_hash(course, videos, [quiz], exercises)
+
+    def _measure(self, label, count, run, rounds=5):
+        durations = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            run()
+            durations.append((time.perf_counter() - started) / count * 1e6)
+        self.stdout.write(f"{label:<34} {statistics.median(durations):8.2f}µs/cours (médiane de {rounds})")
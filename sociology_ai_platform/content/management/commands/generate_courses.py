@@ -0,0 +1,86 @@
+import random
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from content.ai_course_generator import AICourseGenerator
+from content.models import Course
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère N cours (amorçage de la base, rafraîchissement nocturne) par lots "
+        "transactionnels et affiche le débit en cours par seconde"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100, help="Nombre de cours à générer")
+        parser.add_argument(
+            '--subject',
+            choices=[value for value, _ in Course.SUBJECT_CHOICES],
+            help="Matière des cours (par défaut, tirée au hasard pour chaque cours)",
+        )
+        parser.add_argument(
+            '--difficulty',
+            choices=[value for value, _ in Course.DIFFICULTY_CHOICES],
+            help="Difficulté des cours (par défaut, tirée au hasard pour chaque cours)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre de cours par transaction",
+        )
+        parser.add_argument('--seed', type=int, help="Graine du générateur aléatoire (résultats reproductibles)")
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Mesure le débit puis annule la génération",
+        )
+
+    def handle(self, *args, **options):
+        count, batch_size = options['count'], options['batch_size']
+        if count <= 0 or batch_size <= 0:
+            raise CommandError("--count et --batch-size doivent être strictement positifs.")
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+
+        subjects = [options['subject']] if options['subject'] else [value for value, _ in Course.SUBJECT_CHOICES]
+        difficulties = (
+            [options['difficulty']] if options['difficulty']
+            else [value for value, _ in Course.DIFFICULTY_CHOICES]
+        )
+
+        generated = 0
+        existing = Course.objects.count()
+        started = time.perf_counter()
+        try:
+            # Une transaction par lot; avec --dry-run, une transaction englobante annulée
+            with transaction.atomic() if options['dry_run'] else nullcontext():
+                while generated < count:
+                    specs = [
+                        {'subject': random.choice(subjects), 'difficulty': random.choice(difficulties)}
+                        for _ in range(min(batch_size, count - generated))
+                    ]
+                    generated += len(AICourseGenerator.generate_courses(specs))
+                    self.stdout.write(f"{generated}/{count} cours générés")
+                elapsed = time.perf_counter() - started
+                # Les cours dont le contenu existait déjà ne sont pas recréés
+                created = Course.objects.count() - existing
+                if options['dry_run']:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        rate = generated / elapsed if elapsed else float('inf')
+        suffix = " (annulés: --dry-run)" if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{generated} cours en {elapsed:.2f}s, soit {rate:.0f} cours/s "
+            f"({created} nouveaux, {generated - created} déjà existants){suffix}."
+        ))
@@ -0,0 +1,168 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+
+from accounts.models import Historique
+from analytics.cache import CompletedCourseCache
+from analytics.models import CoursePopularity, Recommendation
+from content.ai_course_generator import AICourseGenerator
+from content.models import Course, Document, Exercise, Quiz, Video
+
+RESOURCES = (
+    ('video', 'video_set', Video),
+    ('quiz', 'quiz_set', Quiz),
+    ('exercise', 'exercise_set', Exercise),
+    ('document', 'document_set', Document),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcule l'empreinte de contenu des cours, fusionne les cours identiques dans le plus "
+        "ancien et y reporte les recommandations et historiques des doublons"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Liste les doublons sans les fusionner (code de sortie non nul s'il en existe)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre de cours lus (avec leurs ressources) par lot",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size doit être strictement positif.")
+
+        courses = Course.objects.order_by('id').prefetch_related(*(
+            Prefetch(related, queryset=model.objects.order_by('id')) for _, related, model in RESOURCES
+        ))
+        by_hash = defaultdict(list)
+        resources = {}  # id de cours -> {type de ressource: [id dans l'ordre]}
+        stale = []
+        for course in courses.iterator(chunk_size=options['batch_size']):
+            content_hash = AICourseGenerator.content_hash(
+                course, course.video_set.all(), course.quiz_set.all(),
+                course.exercise_set.all(), course.document_set.all()
+            )
+            by_hash[content_hash].append(course.id)
+            if len(by_hash[content_hash]) == 1 and course.content_hash != content_hash:
+                course.content_hash = content_hash
+                stale.append(course)
+            resources[course.id] = {
+                kind: [resource.id for resource in getattr(course, related).all()]
+                for kind, related, _ in RESOURCES
+            }
+
+        # Doublon -> cours conservé (le plus ancien du groupe)
+        canonical = {
+            duplicate_id: course_ids[0]
+            for course_ids in by_hash.values() if len(course_ids) > 1
+            for duplicate_id in course_ids[1:]
+        }
+
+        if options['check']:
+            for course_ids in by_hash.values():
+                if len(course_ids) > 1:
+                    self.stdout.write(f"Cours #{course_ids[0]}: doublons {course_ids[1:]}")
+            if canonical:
+                raise CommandError(f"{len(canonical)} cours en double.")
+            self.stdout.write(self.style.SUCCESS(f"{len(resources)} cours, aucun doublon."))
+            return
+
+        with transaction.atomic():
+            moved_recommendations = self._merge_recommendations(canonical)
+            moved_learners = self._merge_historique('course', canonical)
+            moved_resources = 0
+            for kind, _, _ in RESOURCES:
+                mapping = {
+                    duplicate: kept
+                    for duplicate_id, kept_id in canonical.items()
+                    for duplicate, kept in zip(resources[duplicate_id][kind], resources[kept_id][kind])
+                }
+                moved_resources += sum(self._merge_historique(kind, mapping).values())
+            Course.objects.filter(id__in=canonical).delete()
+            # Les compteurs des doublons disparaissent avec eux: report sur les cours conservés
+            CoursePopularity.objects.apply_deltas('learner_count', moved_learners)
+            # Après suppression des doublons, qui ont pu porter l'empreinte
+            Course.objects.bulk_update(stale, ['content_hash'], batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(canonical)} cours en double fusionnés, "
+            f"{sum(moved_recommendations.values())} recommandations et "
+            f"{sum(moved_learners.values()) + moved_resources} historiques reportés, "
+            f"{len(stale)} empreintes mises à jour."
+        ))
+
+    @staticmethod
+    def _merge_recommendations(canonical):
+        """
+        Reporte les recommandations des doublons; si l'utilisateur en a déjà une pour le
+        cours conservé, garde le meilleur score. Retourne {cours conservé: recommandations reportées}.
+        """
+        duplicates = list(Recommendation.objects.filter(course_id__in=canonical))
+        kept = {
+            (rec.user_id, rec.course_id): rec for rec in Recommendation.objects.filter(
+                course_id__in=set(canonical.values()), user_id__in={rec.user_id for rec in duplicates}
+            )
+        }
+        moved, changed, removed = [], {}, []
+        for rec in duplicates:
+            key = (rec.user_id, canonical[rec.course_id])
+            keeper = kept.get(key)
+            if keeper is None:
+                rec.course_id = key[1]
+                kept[key] = changed[rec.pk] = rec
+                moved.append(rec)
+                continue
+            keeper.score = max(keeper.score, rec.score)
+            keeper.viewed = keeper.viewed or rec.viewed
+            changed[keeper.pk] = keeper
+            removed.append(rec.pk)
+        Recommendation.objects.filter(pk__in=removed).delete()
+        Recommendation.objects.bulk_update(changed.values(), ['course', 'score', 'viewed'])
+        return Counter(rec.course_id for rec in moved)
+
+    @staticmethod
+    def _merge_historique(content_type, mapping):
+        """
+        Reporte les historiques {id doublon: id conservé} d'un type de contenu; un historique
+        déjà présent sur le contenu conservé garde la plus forte progression.
+        Retourne {id conservé: historiques reportés}.
+        """
+        if not mapping:
+            return Counter()
+        duplicates = list(Historique.objects.filter(content_type=content_type, content_id__in=mapping))
+        kept = {
+            (row.user_id, row.content_id): row for row in Historique.objects.filter(
+                content_type=content_type, content_id__in=set(mapping.values()),
+                user_id__in={row.user_id for row in duplicates}
+            )
+        }
+        moved, changed, removed = [], {}, []
+        for row in duplicates:
+            key = (row.user_id, mapping[row.content_id])
+            keeper = kept.get(key)
+            if keeper is None:
+                row.content_id = key[1]
+                kept[key] = changed[row.pk] = row
+                moved.append(row)
+                continue
+            keeper.progress = max(keeper.progress, row.progress)
+            keeper.completed = keeper.completed or row.completed
+            changed[keeper.pk] = keeper
+            removed.append(row.pk)
+        Historique.objects.filter(pk__in=removed).delete()
+        Historique.objects.bulk_update(changed.values(), ['content_id', 'progress', 'completed'])
+        if content_type == 'course':
+            # bulk_update n'émet pas post_save: cours complétés à recharger
+            for user_id in {row.user_id for row in duplicates}:
+                CompletedCourseCache.invalidate(user_id)
+        return Counter(row.content_id for row in moved)
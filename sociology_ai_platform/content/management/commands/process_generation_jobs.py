@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from content.models import GenerationJob
+from content.worker import generation_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute les générations de cours restées en attente (redémarrage du serveur) "
+        "et marque en échec celles bloquées en cours d'exécution"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=10,
+            help="Durée (minutes) au-delà de laquelle une tâche en cours est considérée interrompue",
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help="Nombre maximal de tâches en attente exécutées",
+        )
+
+    def handle(self, *args, **options):
+        if options['stale_after'] <= 0 or options['limit'] <= 0:
+            raise CommandError("--stale-after et --limit doivent être strictement positifs.")
+
+        cutoff = timezone.now() - timedelta(minutes=options['stale_after'])
+        stale = GenerationJob.objects.filter(status='running', started_at__lt=cutoff).update(
+            status='failed', error="Génération interrompue", finished_at=timezone.now()
+        )
+
+        executed = 0
+        pending = GenerationJob.objects.filter(status='pending', created_at__lt=cutoff).order_by('created_at')
+        for job_id in pending.values_list('id', flat=True)[:options['limit']]:
+            # Une tâche prise entre-temps par le pool est ignorée
+            executed += generation_worker.run(job_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{executed} tâche(s) exécutée(s), {stale} tâche(s) interrompue(s) marquée(s) en échec."
+        ))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_course_subject'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['subject', '-id'], name='course_subject_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['difficulty', '-id'], name='course_difficulty_id_idx'),
+        ),
+    ]
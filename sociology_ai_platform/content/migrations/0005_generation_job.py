@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_catalogue_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('params', models.JSONField(default=dict)),
+                ('dedup_key', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('succeeded', 'Terminée'), ('failed', 'Échouée')], default='pending', max_length=20)),
+                ('course_ids', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='generation_job_status_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('dedup_key',), name='generation_job_active_dedup')],
+            },
+        ),
+    ]
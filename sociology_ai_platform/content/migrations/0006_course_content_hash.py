@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_generation_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
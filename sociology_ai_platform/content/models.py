@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import CourseContentCache, CourseFacetCache
+from .signals import courses_generated
 
 class Course(models.Model):
     DIFFICULTY_CHOICES = [
@@ -28,6 +32,16 @@ class Course(models.Model):
     difficulty = models.CharField(max_length=50, choices=DIFFICULTY_CHOICES, default='intermediate')
     subject = models.CharField(max_length=50, choices=SUBJECT_CHOICES, default='sociology', verbose_name='Matière')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Empreinte du contenu (AICourseGenerator.content_hash): un cours généré identique
+    # à un cours existant n'est pas recréé (commande merge_duplicate_courses pour l'existant)
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Catalogue filtré par matière ou par difficulté, du plus récent au plus ancien
+            models.Index(fields=['subject', '-id'], name='course_subject_id_idx'),
+            models.Index(fields=['difficulty', '-id'], name='course_difficulty_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -65,3 +79,83 @@ class Exercise(models.Model):
 
     def __str__(self):
         return self.title
+
+class GenerationJob(models.Model):
+    """Génération de cours exécutée hors de la requête par content.worker.generation_worker"""
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('succeeded', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+    ACTIVE_STATUSES = ('pending', 'running')
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generation_jobs')
+    params = models.JSONField(default=dict)
+    # Empreinte (utilisateur, paramètres) servant à regrouper les demandes identiques
+    dedup_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    course_ids = models.JSONField(default=list)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Une seule génération active par demande identique
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='generation_job_active_dedup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='generation_job_status_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status not in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        return f"Génération #{self.pk} ({self.status})"
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_save, sender=Document)
+@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Video)
+@receiver(post_delete, sender=Document)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_delete, sender=Exercise)
+def invalidate_course_content(sender, instance, **kwargs):
+    """Le fragment rendu du cours ne reflète plus ses ressources"""
+    CourseContentCache.invalidate(instance.course_id)
+
+
+@receiver(post_delete, sender=Course)
+def invalidate_deleted_course_content(sender, instance, **kwargs):
+    # SQLite peut réattribuer l'id d'un cours supprimé
+    CourseContentCache.invalidate(instance.id)
+    CourseFacetCache.apply({(instance.subject, instance.difficulty): -1})
+
+
+@receiver(post_save, sender=Course)
+def update_course_facets(sender, instance, created, **kwargs):
+    if created:
+        CourseFacetCache.apply({(instance.subject, instance.difficulty): 1})
+    else:
+        # La matière ou la difficulté a pu changer: recalcul à la prochaine lecture
+        transaction.on_commit(CourseFacetCache.invalidate)
+
+
+@receiver(courses_generated)
+def update_generated_course_facets(sender, courses, **kwargs):
+    """Compteurs du catalogue pour un lot inséré par bulk_create (sans post_save)"""
+    deltas = {}
+    for course in courses:
+        pair = (course.subject, course.difficulty)
+        deltas[pair] = deltas.get(pair, 0) + 1
+    CourseFacetCache.apply(deltas)
@@ -0,0 +1,9 @@
+"""
+Signaux propres au contenu
+- courses_generated: émis une fois par lot de cours insérés par bulk_create
+  (AICourseGenerator.generate_courses), qui n'émet pas post_save.
+  Argument: courses (liste des Course enregistrés, avec leur id)
+"""
+from django.dispatch import Signal
+
+courses_generated = Signal()
@@ -1,3 +1,510 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Historique
+from analytics.models import CoursePopularity, EmotionData, Recommendation
+from search.backends import get_backend
+from sociology_ai.testing import PerformanceTestCase
+from .ai_course_generator import AICourseGenerator
+from .cache import CourseContentCache, CourseFacetCache
+from .course_templates import DEFAULT_FILE, TemplateCatalogue, catalogue_loader, get_catalogue
+from .models import Course, Document, Exercise, GenerationJob, Quiz, Video
+from .views import COURSES_PER_PAGE
+from .worker import generation_worker
+
+
+class CourseContentCacheTests(TestCase):
+    """Le fragment mis en cache est invalidé dès qu'une ressource du cours change"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        self.client.force_login(self.user)
+        self.course = Course.objects.create(title='Sociologie urbaine', description='La ville')
+        self.other = Course.objects.create(title='Autre cours', description='Autre')
+        self.video = Video.objects.create(course=self.course, title='Introduction', url='https://example.com/v')
+
+    def detail(self, course=None):
+        return self.client.get(reverse('course_detail', args=[(course or self.course).id]))
+
+    def test_fragment_is_cached_per_course(self):
+        self.detail()
+        self.assertIsNotNone(CourseContentCache.get(self.course.id))
+        self.assertIsNone(CourseContentCache.get(self.other.id))
+
+    def test_resource_changes_invalidate_fragment(self):
+        changes = [
+            lambda: Quiz.objects.create(course=self.course, title='Quiz final', questions=[]),
+            lambda: Exercise.objects.create(
+                course=self.course, title='Enquête de terrain', difficulty='easy', content='Consigne'
+            ),
+            lambda: Document.objects.create(course=self.course, title='Lectures', file='documents/l.pdf'),
+            lambda: Video.objects.filter(pk=self.video.pk).first().save(update_fields=['title']),
+        ]
+        for change in changes:
+            self.detail()
+            change()
+            self.assertIsNone(CourseContentCache.get(self.course.id))
+        self.assertContains(self.detail(), 'Enquête de terrain')
+        self.video.delete()
+        self.assertNotContains(self.detail(), 'Introduction')
+
+    def test_other_course_fragment_is_kept(self):
+        self.detail(self.other)
+        Video.objects.create(course=self.course, title='Suite', url='https://example.com/s')
+        self.assertIsNotNone(CourseContentCache.get(self.other.id))
+
+
+class CourseCatalogueTests(TestCase):
+    """Filtres, pagination et compteurs de facettes du catalogue"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        self.client.force_login(self.user)
+        Course.objects.bulk_create(
+            [Course(title=f'Socio {i}', description='D', subject='sociology', difficulty='beginner') for i in range(30)]
+            + [Course(title=f'Histoire {i}', description='D', subject='history', difficulty='advanced') for i in range(5)]
+        )
+
+    def facets(self, response, name):
+        return {value: count for value, _, count in response.context[f'{name}_facets']}
+
+    def test_filters_and_pagination(self):
+        response = self.client.get(reverse('course_list'), {'subject': 'sociology', 'page': 2})
+        self.assertEqual(response.context['total'], 30)
+        self.assertEqual(len(response.context['courses']), 30 - COURSES_PER_PAGE)
+        self.assertTrue(all(course.subject == 'sociology' for course in response.context['courses']))
+
+        response = self.client.get(reverse('course_list'), {'subject': 'history', 'difficulty': 'beginner'})
+        self.assertEqual(response.context['total'], 0)
+        self.assertEqual(self.facets(response, 'subject')['sociology'], 30)
+        self.assertEqual(self.facets(response, 'difficulty')['advanced'], 5)
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN est spécifique à SQLite")
+    def test_filtered_pages_use_catalogue_indexes(self):
+        for field, index_name in (('subject', 'course_subject_id_idx'), ('difficulty', 'course_difficulty_id_idx')):
+            plan = Course.objects.filter(**{field: 'x'}).order_by('-id')[:24].explain()
+            self.assertIn(index_name, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_facets_follow_created_and_deleted_courses(self):
+        self.assertEqual(CourseFacetCache.get_counts()[('history', 'advanced')], 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(title='Histoire 5', description='D', subject='history', difficulty='advanced')
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(subject='sociology').first().delete()
+        # Mis à jour sans recalcul
+        with self.assertNumQueries(0):
+            counts = CourseFacetCache.get_counts()
+        self.assertEqual((counts[('history', 'advanced')], counts[('sociology', 'beginner')]), (6, 29))
+
+    def test_edited_course_invalidates_facets(self):
+        CourseFacetCache.get_counts()
+        course = Course.objects.filter(subject='history').first()
+        course.subject = 'arts'
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        counts = CourseFacetCache.get_counts()
+        self.assertEqual((counts[('history', 'advanced')], counts[('arts', 'advanced')]), (4, 1))
+
+
+class CourseGenerationTests(TestCase):
+    """Génération par lots: un INSERT par modèle, dans une seule transaction"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_batch_inserts_once_per_model(self):
+        specs = (
+            [{'topic': f'Histoire {i}', 'subject': 'history', 'difficulty': 'advanced'} for i in range(20)]
+            + [{'topic': f'Arts {i}', 'subject': 'arts'} for i in range(5)]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            courses = AICourseGenerator.generate_courses(specs)
+        inserts = [query['sql'].split('"')[1] for query in queries if query['sql'].startswith('INSERT INTO "')]
+        self.assertEqual(
+            sorted(inserts),
+            ['content_course', 'content_exercise', 'content_quiz', 'content_video']
+        )
+        self.assertEqual(len(courses), 25)
+        self.assertTrue(all(course.pk for course in courses))
+        self.assertEqual(Quiz.objects.filter(course__in=courses).count(), 25)
+        self.assertEqual(Video.objects.filter(course__subject='history').count(), 20 * 5)
+        self.assertEqual(Video.objects.filter(course__subject='arts').count(), 5 * 4)
+
+    def test_failure_rolls_back_whole_batch(self):
+        with mock.patch.object(Exercise.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                AICourseGenerator.generate_courses([{'subject': 'history'}] * 3)
+        self.assertFalse(Course.objects.exists())
+        self.assertFalse(Video.objects.exists())
+
+    def test_batch_updates_facets_and_search_index(self):
+        CourseFacetCache.get_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            courses = AICourseGenerator.generate_courses([
+                {'topic': f'Anomie durkheimienne {i}', 'subject': 'history', 'difficulty': 'beginner'}
+                for i in range(3)
+            ])
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseFacetCache.get_counts()[('history', 'beginner')], 3)
+        hits, _ = get_backend().search('anomie durkheimienne', kinds=['course'])
+        self.assertEqual({hit.object_id for hit in hits}, {course.id for course in courses})
+
+    def test_identical_content_returns_existing_course(self):
+        with mock.patch.multiple(
+            'content.ai_course_generator.random',
+            choice=lambda seq: seq[0], sample=lambda seq, k: list(seq)[:k], randint=lambda a, b: a,
+        ):
+            first = AICourseGenerator.generate_course(topic='Anomie', subject='history')
+            courses = AICourseGenerator.generate_courses([{'topic': 'Anomie', 'subject': 'history'}] * 3)
+            other = AICourseGenerator.generate_course(topic='Anomie', subject='arts')
+        self.assertEqual([course.pk for course in courses], [first.pk] * 3)
+        self.assertNotEqual(other.pk, first.pk)
+        self.assertEqual(Course.objects.count(), 2)
+        self.assertEqual(Quiz.objects.count(), 2)
+        self.assertEqual(len(first.content_hash), 64)
+
+    def test_generate_courses_command(self):
+        out = StringIO()
+        call_command('generate_courses', count=7, batch_size=3, subject='science', stdout=out)
+        created = Course.objects.filter(subject='science').count()
+        self.assertIn(f'cours/s ({created} nouveaux, {7 - created} déjà existants)', out.getvalue())
+        call_command('generate_courses', count=5, dry_run=True, stdout=StringIO())
+        self.assertEqual(Course.objects.count(), created)
+
+
+class CourseTemplateCatalogueTests(TestCase):
+    """Catalogue de templates: index (matière, difficulté), immuabilité, rechargement à chaud"""
+
+    def setUp(self):
+        with open(DEFAULT_FILE, encoding='utf-8') as f:
+            self.data = json.load(f)
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.write(self.data)
+        self.settings_override = override_settings(COURSE_TEMPLATES_FILE=self.path, COURSE_TEMPLATES_RELOAD_INTERVAL=0)
+        self.settings_override.enable()
+        catalogue_loader.reset()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        catalogue_loader.reset()
+        os.remove(self.path)
+
+    def write(self, data, mtime=None):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            if isinstance(data, dict):
+                json.dump(data, f)
+            else:
+                f.write(data)
+        if mtime:
+            os.utime(self.path, ns=(mtime, mtime))
+
+    def test_levels_are_indexed_and_immutable(self):
+        catalogue = get_catalogue()
+        self.assertIs(get_catalogue(), catalogue)
+        level = catalogue.level('history', 'advanced')
+        self.assertEqual(level.subject_label, 'histoire')
+        self.assertEqual(len(level.video_titles), 5)
+        self.assertIsInstance(level.quiz_questions[0].options, tuple)
+        with self.assertRaises(AttributeError):
+            catalogue.version = 2
+        with self.assertRaises(TypeError):
+            catalogue._levels[('history', 'advanced')] = None
+        # Matière inconnue: templates de la matière par défaut, libellé brut
+        unknown = catalogue.level('astronomy', 'expert')
+        self.assertEqual(unknown.subject_label, 'astronomy')
+        self.assertEqual(unknown.courses, catalogue.level('sociology', 'intermediate').courses)
+        self.assertEqual(catalogue.emotion('confused').difficulty, 'beginner')
+        self.assertEqual(catalogue.emotion('inconnue').subjects, ('sociology', 'history', 'literature'))
+
+    def test_changed_file_is_reloaded(self):
+        first = get_catalogue()
+        mtime = os.stat(self.path).st_mtime_ns
+        self.data['courses']['arts']['beginner'] = [{'topics': ['Le Bauhaus'], 'descriptions': ['Design.']}]
+        self.write(self.data, mtime + 10**9)
+        self.assertIsNot(get_catalogue(), first)
+        course = AICourseGenerator.generate_course(subject='arts', difficulty='beginner')
+        self.assertEqual(course.title, 'Le Bauhaus')
+
+        # Un fichier invalide ne remplace pas le catalogue en service
+        current = get_catalogue()
+        self.write('{"version": 1,', mtime + 2 * 10**9)
+        with self.assertLogs('content.course_templates', 'ERROR'):
+            self.assertIs(get_catalogue(), current)
+
+    def test_unsupported_version_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            TemplateCatalogue.from_data(dict(self.data, version=99))
+
+
+class MergeDuplicateCoursesTests(TestCase):
+    """Fusion des cours identiques et report des recommandations et historiques"""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='secret')
+        self.bob = User.objects.create_user('bob', password='secret')
+        self.kept, self.duplicate, self.other = [self.create_course('Anomie') for _ in range(2)] + [
+            self.create_course('Habitus')
+        ]
+
+    def create_course(self, title):
+        course = Course.objects.create(title=title, description='D', subject='sociology')
+        for n in range(2):
+            Video.objects.create(course=course, title=f'{title} {n}', url=f'https://example.com/{course.id}/{n}')
+        Quiz.objects.create(course=course, title=f'Quiz - {title}', questions=[{'question': 'Q ?'}])
+        return course
+
+    def test_check_reports_duplicates(self):
+        with self.assertRaises(CommandError):
+            call_command('merge_duplicate_courses', check=True, stdout=StringIO())
+
+    def test_merge_repoints_references(self):
+        Recommendation.objects.create(user=self.alice, course=self.kept, score=0.5)
+        Recommendation.objects.create(user=self.alice, course=self.duplicate, score=0.9, viewed=True)
+        Recommendation.objects.create(user=self.bob, course=self.duplicate, score=0.7)
+        Historique.objects.create(user=self.alice, content_type='course', content_id=self.kept.id, progress=30)
+        Historique.objects.create(
+            user=self.alice, content_type='course', content_id=self.duplicate.id, progress=80, completed=True
+        )
+        duplicate_video = self.duplicate.video_set.order_by('id').last()
+        Historique.objects.create(user=self.bob, content_type='video', content_id=duplicate_video.id, progress=10)
+
+        call_command('merge_duplicate_courses', stdout=StringIO())
+
+        self.assertFalse(Course.objects.filter(pk=self.duplicate.pk).exists())
+        self.assertEqual(Course.objects.count(), 2)
+        self.assertEqual(
+            dict(Recommendation.objects.values_list('user__username', 'score')), {'alice': 0.9, 'bob': 0.7}
+        )
+        self.assertEqual(set(Recommendation.objects.values_list('course_id', flat=True)), {self.kept.id})
+        self.assertTrue(Recommendation.objects.get(user=self.alice).viewed)
+        history = Historique.objects.get(user=self.alice)
+        self.assertEqual((history.content_id, history.progress, history.completed), (self.kept.id, 80, True))
+        self.assertEqual(
+            Historique.objects.get(user=self.bob).content_id, self.kept.video_set.order_by('id').last().id
+        )
+        popularity = CoursePopularity.objects.get(course=self.kept)
+        self.assertEqual(popularity.learner_count, 1)
+        self.assertEqual(Course.objects.exclude(content_hash=None).count(), 2)
+        call_command('merge_duplicate_courses', check=True, stdout=StringIO())
+
+
+class GenerationJobTests(TestCase):
+    """Tâches de génération: déduplication, exécution unique, suivi par l'API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        self.client.force_login(self.user)
+
+    def test_identical_requests_share_active_job(self):
+        data = {'generation_type': 'manual', 'subject': 'history', 'difficulty': 'advanced', 'topic': ' Révolutions '}
+        with self.captureOnCommitCallbacks() as callbacks:
+            job, created = generation_worker.submit(self.user, data)
+            same, created_again = generation_worker.submit(self.user, dict(data, topic='Révolutions'))
+            other, _ = generation_worker.submit(self.user, dict(data, subject='arts'))
+        self.assertEqual((created, created_again, same.pk), (True, False, job.pk))
+        self.assertNotEqual(other.pk, job.pk)
+        self.assertEqual(len(callbacks), 2)  # Une exécution programmée par tâche créée
+
+        # Une fois la tâche terminée, une nouvelle demande identique crée une nouvelle tâche
+        self.assertTrue(generation_worker.run(job.pk))
+        with self.captureOnCommitCallbacks():
+            retry, created = generation_worker.submit(self.user, data)
+        self.assertTrue(created)
+        self.assertNotEqual(retry.pk, job.pk)
+
+    def test_job_runs_once_and_records_courses(self):
+        with self.captureOnCommitCallbacks():
+            job, _ = generation_worker.submit(self.user, {'generation_type': 'manual', 'topic': 'Anomie'})
+        self.assertTrue(generation_worker.run(job.pk))
+        self.assertFalse(generation_worker.run(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual([course.title for course in generation_worker.courses(job)], ['Anomie'])
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_failure_is_recorded(self):
+        with self.captureOnCommitCallbacks():
+            job, _ = generation_worker.submit(self.user, {'generation_type': 'manual'})
+        with mock.patch.object(AICourseGenerator, 'generate_courses', side_effect=RuntimeError('modèle indisponible')):
+            with self.assertLogs('content.worker', 'ERROR'):
+                generation_worker.run(job.pk)
+        response = self.client.get(reverse('generation_job_status', args=[job.pk]))
+        self.assertEqual(response.json()['job']['status'], 'failed')
+        self.assertEqual(response.json()['error'], 'modèle indisponible')
+
+    def test_non_finite_wait_does_not_block(self):
+        job = GenerationJob.objects.create(user=self.user, params={'generation_type': 'profile'}, dedup_key='stuck')
+        status_url = reverse('generation_job_status', args=[job.pk])
+        for wait in ('nan', 'inf', '-inf'):
+            with self.subTest(wait=wait), mock.patch('content.worker.time.sleep') as sleep:
+                response = self.client.get(status_url, {'wait': wait})
+                self.assertEqual(response.json()['job']['status'], 'pending')
+                sleep.assert_not_called()
+        with mock.patch('content.worker.time.sleep') as sleep:
+            self.assertEqual(generation_worker.wait(job, float('nan')).status, 'pending')
+            sleep.assert_not_called()
+
+    def test_api_returns_job_and_status_reports_result(self):
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(
+                reverse('generate_course_api'),
+                data=json.dumps({'generation_type': 'emotion', 'generate_multiple': True}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual(job['status'], 'pending')
+
+        # Attente longue bornée sur une tâche qui ne se termine pas
+        status_url = job['status_url']
+        self.assertEqual(self.client.get(status_url, {'wait': '0.05'}).json()['job']['status'], 'pending')
+
+        generation_worker.run(job['id'])
+        data = self.client.get(status_url).json()
+        self.assertEqual(data['job']['status'], 'succeeded')
+        self.assertEqual(data['course']['title'], Course.objects.get().title)
+
+        other = User.objects.create_user('other', password='secret')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+    def test_invalid_json_is_rejected(self):
+        response = self.client.post(reverse('generate_course_api'), data='{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(COURSE_GENERATION_ASYNC=False)
+    def test_form_redirects_to_job_tracking(self):
+        response = self.client.post(reverse('generate_course'), {'generation_type': 'profile'})
+        job = GenerationJob.objects.get()
+        self.assertRedirects(response, f"{reverse('generate_course')}?job={job.pk}")
+        self.assertEqual(job.status, 'succeeded')
+        self.assertContains(self.client.get(response.url), reverse('generation_job_status', args=[job.pk]))
+
+    def test_process_command_recovers_stuck_jobs(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        with self.captureOnCommitCallbacks():
+            pending, _ = generation_worker.submit(self.user, {'topic': 'A'})
+            running, _ = generation_worker.submit(self.user, {'topic': 'B'})
+            recent, _ = generation_worker.submit(self.user, {'topic': 'C'})
+        GenerationJob.objects.filter(pk__in=[pending.pk, running.pk]).update(created_at=long_ago)
+        GenerationJob.objects.filter(pk=running.pk).update(status='running', started_at=long_ago)
+
+        call_command('process_generation_jobs', stdout=StringIO())
+        statuses = dict(GenerationJob.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[pending.pk], statuses[running.pk], statuses[recent.pk]],
+            ['succeeded', 'failed', 'pending']
+        )
+
+
+class ContentViewPerformanceTests(PerformanceTestCase):
+    """Budgets de requêtes des vues du catalogue et de la génération de cours"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+        cls.user.profile  # Profil créé au premier accès: mesures hors création
+        subjects = [choice for choice, _ in Course.SUBJECT_CHOICES]
+        difficulties = [choice for choice, _ in Course.DIFFICULTY_CHOICES]
+        courses = Course.objects.bulk_create([
+            Course(
+                title=f'Cours {i}',
+                description='Description du cours. ' * 10,
+                subject=subjects[i % len(subjects)],
+                difficulty=difficulties[i % len(difficulties)],
+            )
+            for i in range(2000)
+        ])
+        Video.objects.bulk_create([
+            Video(course=course, title=f'{course.title} - Vidéo {n}', url='https://example.com/v', duration='10:00')
+            for course in courses for n in range(3)
+        ])
+        Document.objects.bulk_create([
+            Document(course=course, title=f'{course.title} - Support', file='documents/support.pdf')
+            for course in courses[:200]
+        ])
+        Quiz.objects.bulk_create([
+            Quiz(course=course, title=f'Quiz - {course.title}', questions=[
+                {'question': 'Question ?', 'options': ['A', 'B', 'C', 'D'], 'correct': 0}
+            ])
+            for course in courses
+        ])
+        Exercise.objects.bulk_create([
+            Exercise(course=course, title=f'Exercice {n} - {course.title}', difficulty='medium', content='Consigne')
+            for course in courses for n in range(2)
+        ])
+        EmotionData.objects.create(user=cls.user, emotion_type='focused', intensity=0.8)
+        cls.course = courses[0]
+        cls.quiz = Quiz.objects.filter(course=cls.course).first()
+        cls.exercise = Exercise.objects.filter(course=cls.course).first()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_course_list(self):
+        url = reverse('course_list')
+        response = self.assertWithinBudget('get', url, max_queries=5)
+        self.assertEqual(len(response.context['courses']), COURSES_PER_PAGE)
+        # Compteurs de facettes en cache: ni GROUP BY ni COUNT
+        self.assertWithinBudget('get', url, max_queries=2, data={'difficulty': 'advanced', 'page': 20})
+
+    def test_course_detail(self):
+        url = reverse('course_detail', args=[self.course.id])
+        self.assertWithinBudget('get', url, max_queries=8)
+        # Affichages suivants: fragment des ressources servi par le cache
+        response = self.assertWithinBudget('get', url, max_queries=2)
+        self.assertContains(response, f'{self.course.title} - Vidéo 2')
+        self.assertContains(response, self.exercise.title)
+
+    def test_quiz_detail(self):
+        self.assertWithinBudget('get', reverse('quiz_detail', args=[self.quiz.id]), max_queries=4)
+
+    def test_exercise_detail(self):
+        self.assertWithinBudget('get', reverse('exercise_detail', args=[self.exercise.id]), max_queries=4)
+
+    def test_generate_course_page(self):
+        self.assertWithinBudget('get', reverse('generate_course'), max_queries=4)
+
+    @override_settings(COURSE_GENERATION_ASYNC=True)
+    def test_generate_course(self):
+        # La requête ne fait qu'enregistrer la tâche: la génération a lieu dans le pool
+        for generation_type in ('manual', 'emotion', 'profile'):
+            with self.subTest(generation_type=generation_type):
+                self.assertWithinBudget(
+                    'post', reverse('generate_course'), max_queries=6, status_code=302,
+                    data={'generation_type': generation_type, 'subject': 'history', 'difficulty': 'advanced'}
+                )
+
+    @override_settings(COURSE_GENERATION_ASYNC=True)
+    def test_generate_course_api(self):
+        self.assertWithinBudget(
+            'post', reverse('generate_course_api'), max_queries=6, status_code=202,
+            data=json.dumps({'generation_type': 'emotion', 'generate_multiple': True}),
+            content_type='application/json'
+        )
+
+    def test_generation_job_status(self):
+        job, _ = generation_worker.submit(self.user, {'generation_type': 'emotion', 'generate_multiple': True})
+        response = self.assertWithinBudget('get', reverse('generation_job_status', args=[job.id]), max_queries=4)
+        self.assertEqual(len(response.json()['courses']), 3)
@@ -1,32 +1,77 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
-from .models import Course, Video, Document, Quiz, Exercise
-from .ai_course_generator import AICourseGenerator
+import math
+from .models import Course, Video, Document, Quiz, Exercise, GenerationJob
+from .cache import CourseContentCache, CourseFacetCache
+from .worker import generation_worker
 from analytics.models import EmotionData
 
+COURSES_PER_PAGE = 24
+GENERATION_JOB_MAX_WAIT = 25  # secondes
+
 @login_required
 def course_list(request):
-    courses = Course.objects.all()
-    return render(request, 'content/course_list.html', {'courses': courses})
+    subjects = dict(Course.SUBJECT_CHOICES)
+    difficulties = dict(Course.DIFFICULTY_CHOICES)
+    subject = request.GET.get('subject', '')
+    difficulty = request.GET.get('difficulty', '')
+    subject = subject if subject in subjects else ''
+    difficulty = difficulty if difficulty in difficulties else ''
+
+    # Compteurs par matière et par difficulté, chacun tenant compte de l'autre filtre
+    counts = CourseFacetCache.get_counts()
+    subject_counts = dict.fromkeys(subjects, 0)
+    difficulty_counts = dict.fromkeys(difficulties, 0)
+    total = 0
+    for (course_subject, course_difficulty), count in counts.items():
+        if not difficulty or course_difficulty == difficulty:
+            subject_counts[course_subject] += count
+        if not subject or course_subject == subject:
+            difficulty_counts[course_difficulty] += count
+        if (not subject or course_subject == subject) and (not difficulty or course_difficulty == difficulty):
+            total += count
+
+    courses = Course.objects.order_by('-id')
+    if subject:
+        courses = courses.filter(subject=subject)
+    if difficulty:
+        courses = courses.filter(difficulty=difficulty)
+    paginator = Paginator(courses, COURSES_PER_PAGE)
+    paginator.count = total  # Total issu des compteurs en cache: pas de COUNT(*)
+    page = paginator.get_page(request.GET.get('page'))
+
+    return render(request, 'content/course_list.html', {
+        'courses': page,
+        'page': page,
+        'subject': subject,
+        'difficulty': difficulty,
+        'subject_facets': [(value, label, subject_counts[value]) for value, label in subjects.items()],
+        'difficulty_facets': [(value, label, difficulty_counts[value]) for value, label in difficulties.items()],
+        'total': total,
+    })
 
 @login_required
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    videos = course.video_set.all()
-    documents = course.document_set.all()
-    quizzes = course.quiz_set.all()
-    exercises = course.exercise_set.all()
+    content_html = CourseContentCache.get(course_id)
+    if content_html is not None:
+        course = get_object_or_404(Course, id=course_id)
+    else:
+        # Une requête pour le cours et une par type de ressource, puis fragment mis en cache
+        course = get_object_or_404(
+            Course.objects.prefetch_related('video_set', 'document_set', 'quiz_set', 'exercise_set'),
+            id=course_id
+        )
+        content_html = CourseContentCache.render(course, request)
     return render(request, 'content/course_detail.html', {
         'course': course,
-        'videos': videos,
-        'documents': documents,
-        'quizzes': quizzes,
-        'exercises': exercises
+        'content_html': content_html,
     })
 
 @login_required
@@ -43,140 +88,84 @@ def exercise_detail(request, exercise_id):
 def generate_course(request):
     """Page pour générer un cours avec l'IA"""
     if request.method == 'POST':
-        topic = request.POST.get('topic', '').strip()
-        difficulty = request.POST.get('difficulty', 'intermediate')
-        subject = request.POST.get('subject', 'sociology')
-        generation_type = request.POST.get('generation_type', 'manual')
-        generate_multiple = request.POST.get('generate_multiple', 'false') == 'true'
-        
-        try:
-            if generation_type == 'emotion':
-                # Générer basé sur l'émotion récente
-                recent_emotion = EmotionData.objects.filter(user=request.user).order_by('-recorded_at').first()
-                if recent_emotion:
-                    if generate_multiple:
-                        # Générer plusieurs cours dans différentes matières
-                        courses = AICourseGenerator.generate_multiple_courses_by_emotion(
-                            request.user,
-                            recent_emotion.emotion_type,
-                            count=3
-                        )
-                        messages.success(
-                            request, 
-                            f'{len(courses)} cours générés avec succès basés sur votre émotion "{recent_emotion.get_emotion_type_display()}" dans différentes matières !'
-                        )
-                        return redirect('course_list')
-                    else:
-                        course = AICourseGenerator.generate_course_based_on_emotion(
-                            request.user,
-                            recent_emotion.emotion_type
-                        )
-                        messages.success(
-                            request, 
-                            f'Cours généré avec succès basé sur votre émotion "{recent_emotion.get_emotion_type_display()}" !'
-                        )
-                        return redirect('course_detail', course_id=course.id)
-                else:
-                    course = AICourseGenerator.generate_course(
-                        topic=topic if topic else None,
-                        difficulty=difficulty,
-                        subject=subject
-                    )
-                    messages.success(request, 'Cours généré avec succès !')
-                    return redirect('course_detail', course_id=course.id)
-            elif generation_type == 'profile':
-                # Générer basé sur le profil
-                course = AICourseGenerator.generate_course_based_on_profile(request.user)
-                messages.success(request, f'Cours généré avec succès adapté à votre niveau "{request.user.profile.get_level_display()}" !')
-                return redirect('course_detail', course_id=course.id)
-            else:
-                # Génération manuelle
-                course = AICourseGenerator.generate_course(
-                    topic=topic if topic else None,
-                    difficulty=difficulty,
-                    subject=subject
-                )
-                messages.success(request, 'Cours généré avec succès !')
-                return redirect('course_detail', course_id=course.id)
-        except Exception as e:
-            messages.error(request, f'Erreur lors de la génération du cours: {str(e)}')
+        # Génération en arrière-plan: la page suit la tâche (voir generation_job_status)
+        job, _ = generation_worker.submit(request.user, request.POST)
+        messages.info(request, 'Génération du cours en cours...')
+        return redirect(f"{reverse('generate_course')}?job={job.id}")
     
     # Récupérer l'émotion récente pour suggestion
     recent_emotion = EmotionData.objects.filter(user=request.user).order_by('-recorded_at').first()
+    job_id = request.GET.get('job', '')
     
     return render(request, 'content/generate_course.html', {
         'recent_emotion': recent_emotion,
-        'subjects': Course.SUBJECT_CHOICES
+        'subjects': Course.SUBJECT_CHOICES,
+        'job_id': int(job_id) if job_id.isdigit() else None,
     })
 
+def _serialize_course(course):
+    return {
+        'id': course.id,
+        'title': course.title,
+        'description': course.description,
+        'difficulty': course.get_difficulty_display(),
+        'subject': course.get_subject_display(),
+        'url': f'/content/{course.id}/'
+    }
+
+def _job_payload(job):
+    """État d'une tâche de génération; les cours produits une fois la tâche terminée"""
+    payload = {
+        'success': job.status != 'failed',
+        'job': {
+            'id': job.id,
+            'status': job.status,
+            'status_url': reverse('generation_job_status', args=[job.id]),
+        },
+    }
+    if job.status == 'failed':
+        payload['error'] = job.error or 'Erreur lors de la génération du cours'
+    elif job.status == 'succeeded':
+        courses = generation_worker.courses(job)
+        if len(courses) > 1:
+            payload['courses'] = [_serialize_course(c) for c in courses]
+            payload['message'] = f'{len(courses)} cours générés dans différentes matières !'
+        elif courses:
+            payload['course'] = _serialize_course(courses[0])
+            payload['message'] = 'Cours généré avec succès !'
+    else:
+        payload['message'] = 'Génération du cours en cours...'
+    return payload
+
 @login_required
 @require_http_methods(["POST"])
 @csrf_exempt
 def generate_course_api(request):
-    """API pour générer un cours via AJAX"""
+    """API pour générer un cours via AJAX: retourne immédiatement la tâche de génération"""
     try:
         data = json.loads(request.body)
-        topic = data.get('topic', '').strip()
-        difficulty = data.get('difficulty', 'intermediate')
-        subject = data.get('subject', 'sociology')
-        generation_type = data.get('generation_type', 'manual')
-        generate_multiple = data.get('generate_multiple', False)
-        
-        if generation_type == 'emotion':
-            recent_emotion = EmotionData.objects.filter(user=request.user).order_by('-recorded_at').first()
-            if recent_emotion:
-                if generate_multiple:
-                    courses = AICourseGenerator.generate_multiple_courses_by_emotion(
-                        request.user,
-                        recent_emotion.emotion_type,
-                        count=3
-                    )
-                    return JsonResponse({
-                        'success': True,
-                        'courses': [{
-                            'id': c.id,
-                            'title': c.title,
-                            'description': c.description,
-                            'difficulty': c.get_difficulty_display(),
-                            'subject': c.get_subject_display(),
-                            'url': f'/content/{c.id}/'
-                        } for c in courses],
-                        'message': f'{len(courses)} cours générés dans différentes matières !'
-                    })
-                else:
-                    course = AICourseGenerator.generate_course_based_on_emotion(
-                        request.user,
-                        recent_emotion.emotion_type
-                    )
-            else:
-                course = AICourseGenerator.generate_course(
-                    topic=topic if topic else None,
-                    difficulty=difficulty,
-                    subject=subject
-                )
-        elif generation_type == 'profile':
-            course = AICourseGenerator.generate_course_based_on_profile(request.user)
-        else:
-            course = AICourseGenerator.generate_course(
-                topic=topic if topic else None,
-                difficulty=difficulty,
-                subject=subject
-            )
-        
-        return JsonResponse({
-            'success': True,
-            'course': {
-                'id': course.id,
-                'title': course.title,
-                'description': course.description,
-                'difficulty': course.get_difficulty_display(),
-                'subject': course.get_subject_display(),
-                'url': f'/content/{course.id}/'
-            },
-            'message': 'Cours généré avec succès !'
-        })
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'error': str(e)
-        }, status=400)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'JSON invalide'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'JSON invalide'}, status=400)
+    
+    job, _ = generation_worker.submit(request.user, data)
+    return JsonResponse(_job_payload(job), status=200 if job.is_finished else 202)
+
+@login_required
+@require_http_methods(["GET"])
+def generation_job_status(request, job_id):
+    """
+    État d'une tâche de génération. ?wait=N (secondes, au plus GENERATION_JOB_MAX_WAIT)
+    attend la fin de la tâche avant de répondre (attente longue).
+    """
+    job = get_object_or_404(GenerationJob, id=job_id, user=request.user)
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = 0
+    # NaN échappe aux comparaisons (et donc au plafond): valeurs non finies ignorées
+    wait = min(max(wait, 0), GENERATION_JOB_MAX_WAIT) if math.isfinite(wait) else 0
+    if wait and not job.is_finished:
+        generation_worker.wait(job, wait)
+    return JsonResponse(_job_payload(job))
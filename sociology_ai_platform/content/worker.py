@@ -0,0 +1,182 @@
+"""
+Génération de cours en arrière-plan
+- Tâches GenerationJob exécutées par un pool de threads local (aucun broker externe)
+- Demandes identiques en cours regroupées sur une seule tâche
+- Attente longue du résultat sans interroger la base en boucle (tâches de ce processus)
+"""
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from analytics.models import EmotionData
+from .ai_course_generator import AICourseGenerator
+from .models import Course, GenerationJob
+
+logger = logging.getLogger(__name__)
+
+
+class CourseGenerationWorker:
+    """
+    Enregistre les demandes de génération (GenerationJob) et les exécute hors de la requête.
+    Une tâche n'est exécutée qu'une fois: le passage pending -> running est une mise à jour
+    conditionnelle, que la tâche soit prise par le pool ou par process_generation_jobs.
+    """
+
+    GENERATION_TYPES = ('manual', 'emotion', 'profile')
+    POLL_INTERVAL = 0.5  # secondes, pour les tâches lancées par un autre processus
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._events = {}  # job id -> threading.Event, tâches en cours dans ce processus
+
+    @staticmethod
+    def normalize(data):
+        """Paramètres utiles selon le type de génération (base de la déduplication)"""
+        generation_type = data.get('generation_type')
+        if generation_type not in CourseGenerationWorker.GENERATION_TYPES:
+            generation_type = 'manual'
+        if generation_type == 'profile':
+            return {'generation_type': generation_type}
+        params = {
+            'generation_type': generation_type,
+            'topic': str(data.get('topic') or '').strip(),
+            'difficulty': data.get('difficulty') or 'intermediate',
+            'subject': data.get('subject') or 'sociology',
+        }
+        if generation_type == 'emotion':
+            params['generate_multiple'] = data.get('generate_multiple') in (True, 'true')
+        return params
+
+    @staticmethod
+    def dedup_key(user, params):
+        payload = json.dumps([user.pk, params], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def submit(self, user, data):
+        """
+        Enregistre une demande et programme son exécution après validation de la transaction.
+        Retourne (tâche, créée); une demande identique encore active est réutilisée.
+        """
+        params = self.normalize(data)
+        key = self.dedup_key(user, params)
+        active = GenerationJob.objects.filter(dedup_key=key, status__in=GenerationJob.ACTIVE_STATUSES)
+        job = active.first()
+        if job is not None:
+            return job, False
+        try:
+            with transaction.atomic():
+                job = GenerationJob.objects.create(user=user, params=params, dedup_key=key)
+        except IntegrityError:
+            # Demande identique enregistrée entre-temps par une requête concurrente
+            job = active.first()
+            if job is None:
+                raise
+            return job, False
+
+        if not getattr(settings, 'COURSE_GENERATION_ASYNC', True):
+            self.run(job.pk)
+            job.refresh_from_db()
+        else:
+            with self._lock:
+                self._events[job.pk] = threading.Event()
+            transaction.on_commit(lambda: self._get_executor().submit(self._run, job.pk))
+        return job, True
+
+    @staticmethod
+    def generate(user, params):
+        """Génère les cours demandés (liste de Course)"""
+        generation_type = params['generation_type']
+        if generation_type == 'profile':
+            return [AICourseGenerator.generate_course_based_on_profile(user)]
+        if generation_type == 'emotion':
+            recent_emotion = EmotionData.objects.filter(user=user).order_by('-recorded_at').first()
+            if recent_emotion:
+                if params.get('generate_multiple'):
+                    return AICourseGenerator.generate_multiple_courses_by_emotion(
+                        user, recent_emotion.emotion_type, count=3
+                    )
+                return [AICourseGenerator.generate_course_based_on_emotion(user, recent_emotion.emotion_type)]
+        return [AICourseGenerator.generate_course(
+            topic=params.get('topic') or None,
+            difficulty=params.get('difficulty', 'intermediate'),
+            subject=params.get('subject', 'sociology'),
+        )]
+
+    def run(self, job_id):
+        """Exécute une tâche en attente; retourne False si elle a déjà été prise en charge"""
+        claimed = GenerationJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', started_at=timezone.now()
+        )
+        if not claimed:
+            return False
+        job = GenerationJob.objects.select_related('user').get(pk=job_id)
+        try:
+            courses = self.generate(job.user, job.params)
+        except Exception as e:
+            logger.exception("Échec de la génération de cours (tâche %s)", job_id)
+            GenerationJob.objects.filter(pk=job_id).update(
+                status='failed', error=str(e), finished_at=timezone.now()
+            )
+        else:
+            GenerationJob.objects.filter(pk=job_id).update(
+                status='succeeded', course_ids=[course.id for course in courses], finished_at=timezone.now()
+            )
+        return True
+
+    def wait(self, job, timeout):
+        """Attend (au plus timeout secondes) la fin d'une tâche et retourne son état à jour"""
+        if not math.isfinite(timeout):
+            timeout = 0
+        deadline = time.monotonic() + timeout
+        while not job.is_finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._lock:
+                event = self._events.get(job.pk)
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(self.POLL_INTERVAL, remaining))
+            job.refresh_from_db(fields=['status', 'course_ids', 'error', 'started_at', 'finished_at'])
+        return job
+
+    @staticmethod
+    def courses(job):
+        """Cours produits par une tâche terminée, dans l'ordre de génération"""
+        by_id = Course.objects.in_bulk(job.course_ids)
+        return [by_id[course_id] for course_id in job.course_ids if course_id in by_id]
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'COURSE_GENERATION_WORKERS', 2),
+                    thread_name_prefix='course-generation'
+                )
+            return self._executor
+
+    def _run(self, job_id):
+        try:
+            self.run(job_id)
+        except Exception:
+            logger.exception("Échec de l'exécution de la tâche de génération %s", job_id)
+        finally:
+            with self._lock:
+                event = self._events.pop(job_id, None)
+            if event is not None:
+                event.set()
+            # Chaque thread du pool possède sa propre connexion
+            connection.close()
+
+
+generation_worker = CourseGenerationWorker()
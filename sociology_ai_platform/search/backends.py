@@ -0,0 +1,222 @@
+"""
+Moteurs de recherche plein texte
+- Interface commune (SearchBackend): le moteur est choisi par settings.SEARCH_BACKEND
+- SQLiteFTS5Backend: table virtuelle FTS5, résultats classés par bm25
+- LikeSearchBackend: repli sans index (LIKE '%...%'), sert aussi de référence de performance
+"""
+import re
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .documents import SEARCH_TYPES
+
+MAX_TERMS = 8
+SNIPPET_WORDS = 16
+WORD_RE = re.compile(r'\w+')
+
+
+class SearchHit(NamedTuple):
+    kind: str
+    object_id: int
+    title: str
+    snippet: str  # HTML échappé, termes trouvés entre <mark>
+    url: str
+    score: float
+
+
+def tokenize(query):
+    """Termes de la requête (mots), en nombre limité"""
+    return WORD_RE.findall(query.lower())[:MAX_TERMS]
+
+
+class SearchBackend:
+    """
+    Interface d'un moteur de recherche. index/remove/clear sont appelés par les
+    signaux et la commande rebuild_search_index; search retourne (résultats, total).
+    """
+
+    name = 'base'
+
+    def is_available(self):
+        return True
+
+    def index(self, documents, replace=True):
+        """Ajoute des SearchDocument; replace=False pour des contenus qui viennent d'être créés"""
+
+    def remove(self, kind, object_ids):
+        """Retire des contenus de l'index"""
+
+    def clear(self):
+        """Vide l'index"""
+
+    def optimize(self):
+        """Compacte l'index après une reconstruction"""
+
+    def search(self, query, kinds=None, offset=0, limit=20):
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Une table FTS5 pour tous les types. Le rowid est dérivé de (type, id) pour
+    que remplacer ou supprimer un contenu passe par la clé primaire de l'index.
+    """
+
+    name = 'fts5'
+    TABLE = 'search_index'
+    KIND_CODES = {'course': 1, 'post': 2, 'comment': 3}
+    # Poids bm25 par colonne (kind, object_id, url, title, body): le titre compte davantage
+    WEIGHTS = (0.0, 0.0, 0.0, 10.0, 1.0)
+
+    def __init__(self):
+        self._available = None
+
+    def is_available(self):
+        if self._available is None:
+            self._available = (
+                connection.vendor == 'sqlite'
+                and self.TABLE in connection.introspection.table_names()
+            )
+        return self._available
+
+    @classmethod
+    def rowid(cls, kind, object_id):
+        return object_id * 4 + cls.KIND_CODES[kind]
+
+    def index(self, documents, replace=True):
+        rows = [
+            (self.rowid(doc.kind, doc.object_id), doc.kind, doc.object_id, doc.url, doc.title, doc.body)
+            for doc in documents
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            if replace:
+                cursor.executemany(f'DELETE FROM {self.TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {self.TABLE} (rowid, kind, object_id, url, title, body) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                rows
+            )
+
+    def remove(self, kind, object_ids):
+        if not object_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.TABLE} WHERE rowid = %s',
+                [(self.rowid(kind, object_id),) for object_id in object_ids]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.TABLE}')
+
+    def optimize(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.TABLE} ({self.TABLE}) VALUES ('optimize')")
+
+    @staticmethod
+    def match_expression(terms):
+        """Chaque terme entre guillemets (aucune syntaxe FTS5 utilisateur), en préfixe, tous requis"""
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, query, kinds=None, offset=0, limit=20):
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+
+        where = f'{self.TABLE} MATCH %s'
+        params = [self.match_expression(terms)]
+        if kinds:
+            where += f" AND kind IN ({', '.join(['%s'] * len(kinds))})"
+            params += list(kinds)
+
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.TABLE} WHERE {where}', params)
+            total = cursor.fetchone()[0]
+            if not total or offset >= total:
+                return [], total
+            cursor.execute(
+                f"SELECT kind, object_id, title, "
+                f"snippet({self.TABLE}, 4, char(2), char(3), '…', {SNIPPET_WORDS}), url, "
+                f"bm25({self.TABLE}, {weights}) AS rank "
+                f"FROM {self.TABLE} WHERE {where} ORDER BY rank LIMIT %s OFFSET %s",
+                params + [limit, offset]
+            )
+            rows = cursor.fetchall()
+
+        return [
+            SearchHit(kind, object_id, title, self._highlight_markers(snippet), url, -rank)
+            for kind, object_id, title, snippet, url, rank in rows
+        ], total
+
+    @staticmethod
+    def _highlight_markers(snippet):
+        # Les marqueurs de snippet() ne sont pas touchés par l'échappement HTML
+        return mark_safe(escape(snippet).replace('\x02', '<mark>').replace('\x03', '</mark>'))
+
+
+class LikeSearchBackend(SearchBackend):
+    """
+    Recherche par LIKE '%terme%' sur les tables d'origine: aucun index à maintenir,
+    mais chaque requête parcourt les tables. Résultats par type puis du plus récent.
+    """
+
+    name = 'like'
+
+    def search(self, query, kinds=None, offset=0, limit=20):
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+
+        hits = []
+        total = 0
+        for kind in kinds or SEARCH_TYPES:
+            search_type = SEARCH_TYPES[kind]
+            queryset = search_type.queryset()
+            for term in terms:
+                condition = Q()
+                for field in search_type.fields:
+                    condition |= Q(**{f'{field}__icontains': term})
+                queryset = queryset.filter(condition)
+            count = queryset.count()
+            start, stop = max(offset - total, 0), min(offset + limit - total, count)
+            if start < stop:
+                for instance in queryset.order_by('-id')[start:stop]:
+                    document = search_type.to_document(instance)
+                    hits.append(SearchHit(
+                        kind, document.object_id, document.title,
+                        self._snippet(document.body, terms), document.url, 0.0
+                    ))
+            total += count
+        return hits, total
+
+    @staticmethod
+    def _snippet(body, terms):
+        words = body.split()
+        excerpt = ' '.join(words[:SNIPPET_WORDS]) + ('…' if len(words) > SNIPPET_WORDS else '')
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        return mark_safe(pattern.sub(lambda match: f'<mark>{match.group(0)}</mark>', escape(excerpt)))
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    Moteur configuré par settings.SEARCH_BACKEND (chemin de classe), remplacé par
+    LikeSearchBackend s'il n'est pas utilisable sur la base courante.
+    """
+    global _backend
+    if _backend is None:
+        backend = import_string(getattr(settings, 'SEARCH_BACKEND', 'search.backends.SQLiteFTS5Backend'))()
+        _backend = backend if backend.is_available() else LikeSearchBackend()
+    return _backend
@@ -0,0 +1,70 @@
+"""
+Contenus indexés par la recherche plein texte
+Chaque type (cours, post, commentaire) déclare son modèle, sa requête de
+réindexation et la conversion d'une instance en SearchDocument.
+"""
+from typing import NamedTuple
+
+from content.models import Course
+from social.models import Comment, Post
+
+
+class SearchDocument(NamedTuple):
+    kind: str
+    object_id: int
+    title: str
+    body: str
+    url: str
+
+
+def _course_document(course):
+    return SearchDocument('course', course.id, course.title, course.description, f'/content/{course.id}/')
+
+
+def _post_document(post):
+    return SearchDocument('post', post.id, post.title, post.content, f'/social/post/{post.id}/')
+
+
+def _comment_document(comment):
+    # Le titre du post situe le commentaire dans les résultats
+    return SearchDocument(
+        'comment', comment.id, comment.post.title, comment.content, f'/social/post/{comment.post_id}/'
+    )
+
+
+class SearchType(NamedTuple):
+    model: type
+    fields: tuple  # champs texte, utilisés par le moteur LIKE
+    queryset: object  # requête de (ré)indexation
+    to_document: object
+    label: str
+
+
+SEARCH_TYPES = {
+    'course': SearchType(
+        Course, ('title', 'description'),
+        lambda: Course.objects.only('id', 'title', 'description'),
+        _course_document, 'Cours',
+    ),
+    'post': SearchType(
+        Post, ('title', 'content'),
+        lambda: Post.objects.only('id', 'title', 'content'),
+        _post_document, 'Post',
+    ),
+    'comment': SearchType(
+        Comment, ('content',),
+        lambda: Comment.objects.select_related('post').only('id', 'content', 'post__id', 'post__title'),
+        _comment_document, 'Commentaire',
+    ),
+}
+
+
+def kind_for_model(model):
+    for kind, search_type in SEARCH_TYPES.items():
+        if model is search_type.model:
+            return kind
+    return None
+
+
+def to_document(instance):
+    return SEARCH_TYPES[kind_for_model(type(instance))].to_document(instance)
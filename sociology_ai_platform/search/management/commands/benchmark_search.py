@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from search.backends import LikeSearchBackend, SQLiteFTS5Backend
+from search.documents import SEARCH_TYPES
+from social.models import Post
+
+VOCABULARY = [
+    'société', 'culture', 'institution', 'classe', 'mobilité', 'famille', 'école', 'travail',
+    'religion', 'norme', 'déviance', 'socialisation', 'identité', 'réseau', 'inégalité', 'genre',
+    'migration', 'ville', 'pouvoir', 'état', 'marché', 'capital', 'habitus', 'champ', 'anomie',
+]
+DEFAULT_QUERIES = ['société', 'mobilité sociale', 'habitus capital', 'anom', 'durkheim']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la durée des recherches plein texte (FTS5) et de la recherche par LIKE "
+        "sur les données actuelles ou sur un jeu de données synthétique annulé en fin d'exécution"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--query',
+            action='append',
+            dest='queries',
+            help="Requête à mesurer (répétable)",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help="Nombre d'exécutions de chaque requête",
+        )
+        parser.add_argument(
+            '--seed-posts',
+            type=int,
+            default=0,
+            help="Nombre de posts synthétiques ajoutés (et indexés) le temps de la mesure",
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0 or options['seed_posts'] < 0:
+            raise CommandError("--repeat doit être strictement positif et --seed-posts positif.")
+
+        fts = SQLiteFTS5Backend()
+        if not fts.is_available():
+            raise CommandError("La table FTS5 search_index est absente (base non SQLite ou migrations non appliquées).")
+
+        try:
+            with transaction.atomic():
+                if options['seed_posts']:
+                    self._seed(fts, options['seed_posts'])
+                self._run(fts, LikeSearchBackend(), options['queries'] or DEFAULT_QUERIES, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, fts, count):
+        author, _ = User.objects.get_or_create(username='benchmark_search')
+        generator = random.Random(42)
+        # Vocabulaire thématique rare au milieu de mots de remplissage, comme un vrai corpus
+        filler = [f'mot{i}' for i in range(20000)]
+
+        def text(length):
+            return ' '.join(
+                generator.choice(VOCABULARY) if generator.random() < 0.02 else generator.choice(filler)
+                for _ in range(length)
+            )
+
+        posts = Post.objects.bulk_create([
+            Post(author=author, title=text(6), content=text(120))
+            for _ in range(count)
+        ], batch_size=1000)
+        # bulk_create n'émet pas post_save: indexation explicite
+        fts.index([SEARCH_TYPES['post'].to_document(post) for post in posts], replace=False)
+        self.stdout.write(f"{count} posts synthétiques ajoutés.")
+
+    def _run(self, fts, like, queries, repeat):
+        self.stdout.write(f"{'requête':<20} {'moteur':<6} {'résultats':>9} {'médiane':>10} {'p95':>10}")
+        for query in queries:
+            medians = {}
+            for backend in (fts, like):
+                durations = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    _, total = backend.search(query, limit=20)
+                    durations.append((time.perf_counter() - started) * 1000)
+                durations.sort()
+                medians[backend.name] = statistics.median(durations)
+                p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+                self.stdout.write(
+                    f"{query:<20} {backend.name:<6} {total:>9} "
+                    f"{medians[backend.name]:>8.2f}ms {p95:>8.2f}ms"
+                )
+            ratio = medians['like'] / medians['fts5'] if medians['fts5'] else float('inf')
+            self.stdout.write(self.style.SUCCESS(f"{query:<20} LIKE / FTS5 = {ratio:.1f}x"))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from search.backends import LikeSearchBackend, get_backend
+from search.documents import SEARCH_TYPES
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement l'index de recherche plein texte (cours, posts, commentaires)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Nombre de contenus indexés par lot",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size doit être strictement positif.")
+
+        backend = get_backend()
+        if isinstance(backend, LikeSearchBackend):
+            self.stdout.write("Le moteur LIKE interroge directement les tables: aucun index à reconstruire.")
+            return
+
+        started = time.monotonic()
+        counts = {}
+        with transaction.atomic():
+            backend.clear()
+            for kind, search_type in SEARCH_TYPES.items():
+                batch = []
+                counts[kind] = 0
+                for instance in search_type.queryset().iterator(chunk_size=options['batch_size']):
+                    batch.append(search_type.to_document(instance))
+                    if len(batch) >= options['batch_size']:
+                        backend.index(batch, replace=False)
+                        counts[kind] += len(batch)
+                        batch = []
+                if batch:
+                    backend.index(batch, replace=False)
+                    counts[kind] += len(batch)
+        backend.optimize()
+
+        summary = ', '.join(f"{SEARCH_TYPES[kind].label}: {count}" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Index {backend.name} reconstruit ({summary}) en {time.monotonic() - started:.2f}s."
+        ))
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    url UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # Table FTS5 propre à SQLite; ailleurs, le moteur LIKE est utilisé
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_course_subject'),
+        ('social', '0004_post_activity_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,42 @@
+"""
+L'index de recherche est une table virtuelle (migration 0001), sans modèle Django.
+Les signaux ci-dessous le tiennent à jour.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from content.models import Course
+from content.signals import courses_generated
+from social.models import Comment, Post
+from .backends import get_backend
+from .documents import kind_for_model, to_document
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_search_document(sender, instance, created, **kwargs):
+    if created:
+        get_backend().index([to_document(instance)], replace=False)
+        return
+    documents = [to_document(instance)]
+    if sender is Post:
+        # Les commentaires affichent le titre de leur post
+        documents += [
+            to_document(comment) for comment in
+            Comment.objects.filter(post=instance).select_related('post')
+        ]
+    get_backend().index(documents)
+
+
+@receiver(courses_generated)
+def index_generated_courses(sender, courses, **kwargs):
+    """Cours insérés par lot (bulk_create n'émet pas post_save): un seul INSERT groupé"""
+    get_backend().index([to_document(course) for course in courses], replace=False)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def remove_search_document(sender, instance, **kwargs):
+    get_backend().remove(kind_for_model(sender), [instance.pk])
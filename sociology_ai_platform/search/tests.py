@@ -0,0 +1,111 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from content.models import Course
+from social.models import Comment, Post
+from sociology_ai.testing import PerformanceTestCase
+from .backends import LikeSearchBackend, SQLiteFTS5Backend, get_backend
+
+
+@skipUnless(connection.vendor == 'sqlite', "FTS5 est spécifique à SQLite")
+class FTS5BackendTests(TestCase):
+    """L'index suit les contenus via les signaux et classe les résultats par pertinence"""
+
+    def setUp(self):
+        self.backend = SQLiteFTS5Backend()
+        self.author = User.objects.create_user('author', password='secret')
+        self.course = Course.objects.create(
+            title='Durkheim et le suicide',
+            description='Une étude des <b>faits sociaux</b> et de la société moderne.',
+        )
+        self.post = Post.objects.create(
+            author=self.author, title='Question sur Bourdieu', content='Le capital culturel selon Durkheim'
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.author, content="Voir aussi l'habitus et la société"
+        )
+
+    def ids(self, query, **kwargs):
+        return [(hit.kind, hit.object_id) for hit in self.backend.search(query, **kwargs)[0]]
+
+    def test_get_backend_uses_fts5(self):
+        self.assertEqual(get_backend().name, 'fts5')
+
+    def test_signals_keep_index_in_sync(self):
+        self.assertEqual(self.ids('habitus'), [('comment', self.comment.id)])
+        self.post.title = 'Question sur Weber'
+        self.post.save()
+        hits, _ = self.backend.search('habitus')
+        self.assertEqual(hits[0].title, 'Question sur Weber')
+        self.post.delete()
+        self.assertEqual(self.ids('habitus'), [])
+        self.assertEqual(self.ids('bourdieu'), [])
+
+    def test_title_matches_rank_first_and_kinds_filter(self):
+        self.assertEqual(self.ids('durkheim'), [('course', self.course.id), ('post', self.post.id)])
+        self.assertEqual(self.ids('durkheim', kinds=['post']), [('post', self.post.id)])
+
+    def test_prefix_accent_insensitive_search(self):
+        self.assertEqual(
+            sorted(self.ids('societe')), [('comment', self.comment.id), ('course', self.course.id)]
+        )
+        # Le commentaire porte le titre de son post
+        self.assertEqual(self.ids('bourd'), [('post', self.post.id), ('comment', self.comment.id)])
+
+    def test_user_input_is_not_fts_syntax_and_snippet_is_escaped(self):
+        self.assertEqual(self.ids('faits" OR NOT *'), [])
+        hits, total = self.backend.search('faits')
+        self.assertEqual(total, 1)
+        self.assertIn('&lt;b&gt;<mark>faits</mark>', hits[0].snippet)
+
+    def test_rebuild_command_restores_index(self):
+        self.backend.clear()
+        self.assertEqual(self.ids('durkheim'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.ids('durkheim')), 2)
+
+    def test_like_backend_finds_the_same_contents(self):
+        like = LikeSearchBackend()
+        for query in ('durkheim', 'habitus', 'capital culturel'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    sorted((hit.kind, hit.object_id) for hit in like.search(query)[0]),
+                    sorted(self.ids(query)),
+                )
+
+
+class SearchViewPerformanceTests(PerformanceTestCase):
+    """Page et API de recherche: coût constant, pagination des résultats classés"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+        Post.objects.bulk_create([
+            Post(author=cls.user, title=f'Sujet {i}', content='Mobilité sociale ' if i % 2 else 'Discussion')
+            for i in range(500)
+        ])
+        call_command('rebuild_search_index', stdout=StringIO())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_search_page(self):
+        response = self.assertWithinBudget('get', reverse('search'), max_queries=5, data={'q': 'mobilité'})
+        self.assertEqual(response.context['total'], 250)
+        self.assertContains(response, '<mark>')
+
+    def test_search_api_pages(self):
+        url = reverse('search_api')
+        data = self.assertWithinBudget('get', url, max_queries=4, data={'q': 'mobilite', 'page': 2}).json()
+        self.assertEqual((data['total'], len(data['results']), data['has_next']), (250, 20, True))
+        data = self.assertWithinBudget('get', url, max_queries=3, data={'q': 'mobilite', 'page': 13}).json()
+        self.assertEqual((len(data['results']), data['has_next']), (10, False))
+        data = self.assertWithinBudget('get', url, max_queries=1, data={'q': '  '}).json()
+        self.assertEqual(data['total'], 0)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.search, name='search'),
+    path('api/', views.search_api, name='search_api'),
+]
@@ -0,0 +1,62 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from .backends import get_backend
+from .documents import SEARCH_TYPES
+
+PAGE_SIZE = 20
+MAX_PAGE = 50  # au-delà, le classement n'apporte plus rien et l'OFFSET coûte cher
+
+
+def _run_search(request):
+    """Lit q/type/page et exécute la recherche; retourne le contexte commun"""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type', '')
+    kinds = [kind] if kind in SEARCH_TYPES else None
+    try:
+        page = min(max(int(request.GET.get('page', 1)), 1), MAX_PAGE)
+    except ValueError:
+        page = 1
+
+    hits, total = get_backend().search(query, kinds, offset=(page - 1) * PAGE_SIZE, limit=PAGE_SIZE)
+    return {
+        'query': query,
+        'type': kind if kinds else '',
+        'page': page,
+        'hits': hits,
+        'total': total,
+        'has_previous': page > 1,
+        'has_next': page < MAX_PAGE and page * PAGE_SIZE < total,
+    }
+
+
+@login_required
+def search(request):
+    context = _run_search(request)
+    context['types'] = [(kind, search_type.label) for kind, search_type in SEARCH_TYPES.items()]
+    return render(request, 'search/search.html', context)
+
+
+@login_required
+@require_http_methods(["GET"])
+def search_api(request):
+    """Recherche plein texte classée et paginée (cours, posts, commentaires)"""
+    context = _run_search(request)
+    return JsonResponse({
+        'success': True,
+        'query': context['query'],
+        'page': context['page'],
+        'total': context['total'],
+        'has_next': context['has_next'],
+        'backend': get_backend().name,
+        'results': [{
+            'type': hit.kind,
+            'id': hit.object_id,
+            'title': hit.title,
+            'snippet': hit.snippet,
+            'url': hit.url,
+            'score': round(hit.score, 4),
+        } for hit in context['hits']],
+    })
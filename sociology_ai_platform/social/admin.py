@@ -1,11 +1,12 @@
 from django.contrib import admin
-from .models import Post, Comment, Notification
+from .models import Post, Comment, Notification, NotificationCounter
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'created_at']
+    list_display = ['title', 'author', 'comment_count', 'last_activity_at', 'created_at']
     list_filter = ['created_at']
     search_fields = ['title', 'content', 'author__username']
+    readonly_fields = ['comment_count', 'last_activity_at']
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -18,3 +19,8 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user', 'is_read', 'created_at']
     list_filter = ['is_read', 'created_at']
     search_fields = ['user__username', 'message']
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'unread', 'updated_at']
+    search_fields = ['user__username']
@@ -0,0 +1,11 @@
+from .notifications import NotificationService
+
+
+def notifications(request):
+    """
+    Nombre de notifications non lues pour le badge de la barre de navigation.
+    Évalué seulement si le gabarit l'affiche (les variables appelables sont appelées au rendu).
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_notifications': lambda: NotificationService.unread_count(request.user.pk)}
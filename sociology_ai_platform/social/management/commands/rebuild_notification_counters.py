@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from social.models import Notification, NotificationCounter
+from social.notifications import NotificationService
+
+
+class Command(BaseCommand):
+    help = "Recalcule le nombre de notifications non lues de chaque utilisateur"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Vérifie la cohérence des compteurs sans les modifier (code de sortie non nul si écart)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre de compteurs écrits par requête",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size doit être strictement positif.")
+
+        expected = dict(
+            Notification.objects.filter(is_read=False).values('user_id')
+            .annotate(count=Count('id')).values_list('user_id', 'count')
+        )
+        current = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+
+        stale = {
+            user_id: expected.get(user_id, 0)
+            for user_id in expected.keys() | current.keys()
+            if current.get(user_id, 0) != expected.get(user_id, 0)
+        }
+
+        if options['check']:
+            for user_id, unread in stale.items():
+                self.stdout.write(f"Utilisateur #{user_id}: {current.get(user_id, 0)} au lieu de {unread}")
+            if stale:
+                raise CommandError(f"{len(stale)} compteurs de notifications incohérents.")
+            self.stdout.write(self.style.SUCCESS(f"{len(current)} compteurs cohérents."))
+            return
+
+        with transaction.atomic():
+            NotificationCounter.objects.bulk_create(
+                [NotificationCounter(user_id=user_id, unread=unread) for user_id, unread in stale.items()],
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['unread', 'updated_at'],
+            )
+        cache.delete_many([NotificationService.CACHE_KEY.format(user_id=user_id) for user_id in stale])
+        self.stdout.write(self.style.SUCCESS(f"{len(stale)} compteurs de notifications corrigés."))
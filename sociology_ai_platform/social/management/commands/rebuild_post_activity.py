@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max
+
+from social.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Recalcule le nombre de commentaires et la date de dernière activité de chaque post"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Vérifie la cohérence des compteurs sans les modifier (code de sortie non nul si écart)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre de posts écrits par requête",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size doit être strictement positif.")
+
+        activity = {
+            row['post_id']: (row['count'], row['last'])
+            for row in Comment.objects.values('post_id').annotate(count=Count('id'), last=Max('created_at'))
+        }
+
+        stale = []
+        checked = 0
+        for post in Post.objects.only('id', 'created_at', 'comment_count', 'last_activity_at').iterator():
+            checked += 1
+            count, last = activity.get(post.id, (0, None))
+            last_activity_at = max(post.created_at, last) if last else post.created_at
+            if (post.comment_count, post.last_activity_at) == (count, last_activity_at):
+                continue
+            if options['check']:
+                self.stdout.write(
+                    f"Post #{post.id}: {post.comment_count} commentaires / {post.last_activity_at:%Y-%m-%d %H:%M:%S} "
+                    f"au lieu de {count} / {last_activity_at:%Y-%m-%d %H:%M:%S}"
+                )
+            post.comment_count = count
+            post.last_activity_at = last_activity_at
+            stale.append(post)
+
+        if options['check']:
+            if stale:
+                raise CommandError(f"{len(stale)} posts avec des compteurs incohérents.")
+            self.stdout.write(self.style.SUCCESS(f"{checked} posts cohérents."))
+            return
+
+        with transaction.atomic():
+            Post.objects.bulk_update(
+                stale, ['comment_count', 'last_activity_at'], batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(f"{checked} posts vérifiés, {len(stale)} corrigés."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:32
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def populate_activity(apps, schema_editor):
+    Post = apps.get_model('social', 'Post')
+    Comment = apps.get_model('social', 'Comment')
+
+    activity = {
+        row['post_id']: (row['count'], row['last'])
+        for row in Comment.objects.values('post_id').annotate(count=Count('id'), last=Max('created_at'))
+    }
+    posts = []
+    for post in Post.objects.only('id', 'created_at'):
+        count, last = activity.get(post.id, (0, None))
+        post.comment_count = count
+        post.last_activity_at = max(post.created_at, last) if last else post.created_at
+        posts.append(post)
+    Post.objects.bulk_update(posts, ['comment_count', 'last_activity_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0003_post_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(populate_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-comment_count', '-id'], name='post_comment_count_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='post_activity_id_idx'),
+        ),
+    ]
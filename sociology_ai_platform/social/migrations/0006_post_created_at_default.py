@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0005_notificationcounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,15 +1,39 @@
 from django.db import models
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Valeur par défaut plutôt qu'auto_now_add: save() la reprend pour last_activity_at
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Compteurs dénormalisés, maintenus à chaque nouveau commentaire
+    # (commande rebuild_post_activity pour les recalculer)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Pagination par curseur du forum, un index par tri proposé
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['-comment_count', '-id'], name='post_comment_count_id_idx'),
+            models.Index(fields=['-last_activity_at', '-id'], name='post_activity_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # Sans commentaire, la dernière activité est la création (règle de rebuild_post_activity)
+            self.last_activity_at = self.created_at
+        super().save(*args, **kwargs)
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -25,5 +49,59 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Notifications d'un utilisateur, les plus récentes d'abord
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+            # Notifications non lues (index partiel, voir Recommendation.Meta.indexes)
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notif_user_unread_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user.username}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur, maintenu par NotificationService
+    (commande rebuild_notification_counters pour le recalculer)
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} non lues"
+
+
+@receiver(post_save, sender=Comment)
+def track_post_activity(sender, instance, created, **kwargs):
+    """Met à jour les compteurs du post commenté en une requête UPDATE"""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            last_activity_at=Greatest('last_activity_at', instance.created_at),
+        )
+
+
+@receiver(pre_delete, sender=User)
+def release_user_comments(sender, instance, **kwargs):
+    """
+    Retire les commentaires d'un utilisateur supprimé (suppression en cascade) des
+    compteurs, en une requête par valeur de décrément plutôt qu'une par commentaire.
+    last_activity_at n'est pas recalculé ici (voir rebuild_post_activity).
+    """
+    deltas = {}
+    for post_id, count in (
+        Comment.objects.filter(author=instance).exclude(post__author=instance)
+        .values('post_id').annotate(count=Count('id')).values_list('post_id', 'count')
+    ):
+        deltas.setdefault(count, []).append(post_id)
+    for count, post_ids in deltas.items():
+        Post.objects.filter(pk__in=post_ids).update(comment_count=F('comment_count') - count)
@@ -0,0 +1,122 @@
+"""
+Diffusion des notifications (fan-out à l'écriture)
+- Une ligne Notification par destinataire, insérées par lots (bulk_create)
+- Compteur de non lues par utilisateur (NotificationCounter), lu via le cache:
+  le badge de la barre de navigation ne fait ni COUNT ni requête en régime établi
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import Comment, Notification, NotificationCounter
+
+
+class NotificationService:
+    """Création, lecture et marquage des notifications"""
+
+    CACHE_KEY = 'notifications:unread:{user_id}'
+    PAGE_SIZE = 20
+
+    @staticmethod
+    def _batch_size():
+        return getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+
+    @staticmethod
+    def _invalidate(user_ids):
+        keys = [NotificationService.CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+        # Après validation: une lecture concurrente ne peut pas remettre en cache l'ancienne valeur
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def notify(user_ids, message):
+        """
+        Envoie `message` à chaque utilisateur de `user_ids`; par lot: un INSERT des
+        notifications, un INSERT des compteurs manquants et un UPDATE des compteurs.
+        Retourne le nombre de notifications créées.
+        """
+        recipients = sorted(set(user_ids))
+        batch_size = NotificationService._batch_size()
+        for start in range(0, len(recipients), batch_size):
+            batch = recipients[start:start + batch_size]
+            # Sans point de sauvegarde: dans une transaction appelante, un échec l'annule entièrement
+            with transaction.atomic(savepoint=False):
+                Notification.objects.bulk_create([
+                    Notification(user_id=user_id, message=message) for user_id in batch
+                ])
+                NotificationCounter.objects.bulk_create(
+                    [NotificationCounter(user_id=user_id) for user_id in batch],
+                    ignore_conflicts=True,
+                )
+                NotificationCounter.objects.filter(user_id__in=batch).update(unread=F('unread') + 1)
+                NotificationService._invalidate(batch)
+        return len(recipients)
+
+    @staticmethod
+    def notify_new_comment(comment):
+        """Prévient l'auteur du post et les autres participants de la discussion"""
+        post = comment.post
+        participants = set(
+            Comment.objects.filter(post_id=post.id).values_list('author_id', flat=True).distinct()
+        )
+        participants.add(post.author_id)
+        participants.discard(comment.author_id)
+        return NotificationService.notify(
+            participants, f"{comment.author.username} a commenté « {post.title} »"
+        )
+
+    @staticmethod
+    def notify_new_recommendations(user, recommendations):
+        """Une notification résumant les nouvelles recommandations d'un utilisateur"""
+        if not recommendations:
+            return 0
+        best = max(recommendations, key=lambda rec: rec.score)
+        message = f"Nouveau cours recommandé : « {best.course.title} »"
+        if len(recommendations) > 1:
+            others = len(recommendations) - 1
+            message += f" et {others} autre{'s' if others > 1 else ''}"
+        return NotificationService.notify([user.pk], message)
+
+    @staticmethod
+    def unread_count(user_id):
+        """Nombre de notifications non lues, depuis le cache ou le compteur"""
+        key = NotificationService.CACHE_KEY.format(user_id=user_id)
+        count = cache.get(key)
+        if count is None:
+            count = NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
+            cache.set(key, count, None)
+        return count
+
+    @staticmethod
+    def page(user, before=None):
+        """
+        Une page de notifications, des plus récentes aux plus anciennes, à partir de
+        la notification `before` exclue (id). Retourne (notifications, id de la suivante ou None).
+        """
+        notifications = Notification.objects.filter(user=user)
+        if before is not None:
+            anchor = notifications.filter(id=before).values_list('created_at', flat=True).first()
+            if anchor is not None:
+                notifications = notifications.filter(
+                    Q(created_at__lte=anchor),
+                    Q(created_at__lt=anchor) | Q(id__lt=before),
+                )
+        page = list(notifications.order_by('-created_at', '-id')[:NotificationService.PAGE_SIZE + 1])
+        if len(page) <= NotificationService.PAGE_SIZE:
+            return page, None
+        page = page[:NotificationService.PAGE_SIZE]
+        return page, page[-1].id
+
+    @staticmethod
+    def mark_read(user, notifications):
+        """Marque comme lues les notifications affichées (et elles seules)"""
+        unread_ids = [notification.id for notification in notifications if not notification.is_read]
+        if not unread_ids:
+            return 0
+        with transaction.atomic(savepoint=False):
+            marked = Notification.objects.filter(user=user, id__in=unread_ids, is_read=False).update(is_read=True)
+            if marked:
+                NotificationCounter.objects.filter(user=user).update(unread=Greatest(F('unread') - marked, 0))
+                NotificationService._invalidate([user.pk])
+        return marked
@@ -0,0 +1,110 @@
+"""
+Pagination par curseur (keyset) de la liste des posts du forum
+- Coût d'une page constant, quelle que soit sa position dans le forum
+- Recherche et tri exécutés par la base de données
+"""
+import base64
+import json
+
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou ne correspondant pas au tri demandé"""
+
+
+class PostKeysetPaginator:
+    """
+    Parcourt les posts page par page en filtrant sur la clé du dernier post
+    affiché (valeur du tri, id) au lieu d'un OFFSET.
+    """
+
+    PAGE_SIZE = 20
+
+    # tri -> (champ de tri, ordre décroissant)
+    SORTS = {
+        'recent': ('created_at', True),
+        'oldest': ('created_at', False),
+        'comments': ('comment_count', True),
+        'active': ('last_activity_at', True),
+    }
+    DEFAULT_SORT = 'recent'
+
+    @staticmethod
+    def queryset(query=''):
+        """Posts avec leur auteur, filtrés par la recherche"""
+        # comment_count est un compteur dénormalisé: aucun agrégat sur social_comment
+        posts = Post.objects.select_related('author')
+        if query:
+            posts = posts.filter(
+                Q(title__icontains=query)
+                | Q(content__icontains=query)
+                | Q(author__username__icontains=query)
+            )
+        return posts
+
+    @staticmethod
+    def _is_datetime(field):
+        return isinstance(Post._meta.get_field(field), DateTimeField)
+
+    @staticmethod
+    def encode_cursor(sort, post):
+        field, _ = PostKeysetPaginator.SORTS[sort]
+        value = getattr(post, field)
+        if PostKeysetPaginator._is_datetime(field):
+            value = value.isoformat()
+        payload = json.dumps([sort, value, post.id]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(sort, cursor):
+        """Retourne (valeur du tri, id) du dernier post de la page précédente"""
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            cursor_sort, value, post_id = json.loads(payload)
+            if cursor_sort != sort or not isinstance(post_id, int):
+                raise InvalidCursor("Curseur invalide pour ce tri")
+            if PostKeysetPaginator._is_datetime(PostKeysetPaginator.SORTS[sort][0]):
+                # parse_datetime lève ValueError pour une date impossible (ex. 30 février)
+                value = parse_datetime(value) if isinstance(value, str) else None
+            elif not isinstance(value, int):
+                value = None
+            if value is None:
+                raise InvalidCursor("Curseur invalide")
+        except InvalidCursor:
+            raise
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor("Curseur invalide") from e
+        return value, post_id
+
+    @staticmethod
+    def paginate(query='', sort=None, cursor=None, page_size=None):
+        """
+        Retourne (posts de la page, curseur de la page suivante ou None).
+        Lève InvalidCursor si le curseur ne peut pas être interprété.
+        """
+        sort = sort if sort in PostKeysetPaginator.SORTS else PostKeysetPaginator.DEFAULT_SORT
+        page_size = page_size or PostKeysetPaginator.PAGE_SIZE
+        field, descending = PostKeysetPaginator.SORTS[sort]
+
+        posts = PostKeysetPaginator.queryset(query)
+        if cursor:
+            value, post_id = PostKeysetPaginator.decode_cursor(sort, cursor)
+            lookup = 'lt' if descending else 'gt'
+            # Borne large sur le champ de tri pour que l'index serve une recherche par
+            # intervalle au lieu de parcourir les pages déjà affichées
+            posts = posts.filter(
+                Q(**{f'{field}__{lookup}e': value}),
+                Q(**{f'{field}__{lookup}': value}) | Q(**{f'id__{lookup}': post_id}),
+            )
+
+        prefix = '-' if descending else ''
+        # Une ligne de plus que la page pour savoir s'il reste des posts
+        page = list(posts.order_by(f'{prefix}{field}', f'{prefix}id')[:page_size + 1])
+        if len(page) <= page_size:
+            return page, None
+        page = page[:page_size]
+        return page, PostKeysetPaginator.encode_cursor(sort, page[-1])
@@ -1,3 +1,356 @@
-from django.test import TestCase
+import base64
+import json
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from sociology_ai.testing import PerformanceTestCase
+from .models import Comment, Notification, NotificationCounter, Post
+from .notifications import NotificationService
+from .pagination import InvalidCursor, PostKeysetPaginator
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN est spécifique à SQLite")
+class HotQueryIndexTests(TestCase):
+    """Les requêtes fréquentes doivent utiliser un index composite, pas un parcours de table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotRegex(plan, r'SCAN \w+\s*$')
+
+    def test_notifications_use_user_created_index(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user).order_by('-created_at')[:20],
+            'notif_user_created_idx',
+        )
+
+    def test_forum_page_uses_keyset_index(self):
+        cursor = PostKeysetPaginator.encode_cursor('recent', Post(id=10, created_at=timezone.now()))
+        value, post_id = PostKeysetPaginator.decode_cursor('recent', cursor)
+        queryset = PostKeysetPaginator.queryset().filter(
+            created_at__lte=value
+        ).order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'post_created_id_idx')
+
+    def test_forum_sorts_use_counter_indexes(self):
+        self.assertUsesIndex(
+            PostKeysetPaginator.queryset().order_by('-comment_count', '-id')[:21],
+            'post_comment_count_id_idx',
+        )
+        self.assertUsesIndex(
+            PostKeysetPaginator.queryset().order_by('-last_activity_at', '-id')[:21],
+            'post_activity_id_idx',
+        )
+
+    def test_unread_notifications_use_user_unread_index(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user, is_read=False).order_by('-created_at'),
+            'notif_user_unread_idx',
+        )
+
+
+class PostKeysetPaginatorTests(TestCase):
+    """Le parcours par curseur couvre chaque post exactement une fois, dans l'ordre du tri"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='secret')
+        cls.other = User.objects.create_user('sociologue', password='secret')
+        cls.posts = Post.objects.bulk_create([
+            Post(author=cls.other if i % 5 == 0 else cls.author, title=f'Sujet {i}',
+                 content='Durkheim' if i % 4 == 0 else 'Discussion')
+            for i in range(23)
+        ])
+        # Dates identiques pour une partie des posts: le départage se fait par id
+        Post.objects.filter(id__in=[post.id for post in cls.posts[:10]]).update(created_at=timezone.now())
+        cls.posts = list(Post.objects.all())
+        for i in range(15):
+            Comment.objects.create(post=cls.posts[i % 6], author=cls.author, content='Réponse')
+
+    def collect(self, sort, query='', page_size=4):
+        seen, cursor = [], None
+        while True:
+            page, cursor = PostKeysetPaginator.paginate(query, sort, cursor, page_size=page_size)
+            self.assertLessEqual(len(page), page_size)
+            seen.extend(page)
+            if cursor is None:
+                return seen
+
+    def test_each_sort_visits_every_post_once_in_order(self):
+        keys = {
+            'recent': lambda post: (post.created_at, post.id),
+            'oldest': lambda post: (post.created_at, post.id),
+            'comments': lambda post: (post.comment_count, post.id),
+            'active': lambda post: (post.last_activity_at, post.id),
+        }
+        for sort, key in keys.items():
+            with self.subTest(sort=sort):
+                seen = self.collect(sort)
+                self.assertEqual(len(seen), len(self.posts))
+                self.assertEqual({post.id for post in seen}, {post.id for post in self.posts})
+                self.assertEqual(seen, sorted(seen, key=key, reverse=sort != 'oldest'))
+
+    def test_most_active_posts_come_first(self):
+        seen = self.collect('active')
+        # Les six posts commentés, du dernier commenté au premier (commentaires 12, 13, 14 en dernier)
+        self.assertEqual([post.id for post in seen[:6]], [self.posts[i].id for i in (2, 1, 0, 5, 4, 3)])
+
+    def test_search_filters_title_content_and_author(self):
+        self.assertEqual({post.title for post in self.collect('recent', 'sujet 22')}, {'Sujet 22'})
+        self.assertEqual(len(self.collect('recent', 'durkheim')), 6)
+        self.assertEqual(len(self.collect('recent', 'sociologue')), 5)
+
+    def test_invalid_cursor(self):
+        cursor = PostKeysetPaginator.paginate(sort='recent', page_size=4)[1]
+        for bad in ('nimportequoi', cursor[:-3]):
+            with self.assertRaises(InvalidCursor):
+                PostKeysetPaginator.paginate(sort='recent', cursor=bad)
+        # Un curseur n'est valable que pour le tri qui l'a produit
+        with self.assertRaises(InvalidCursor):
+            PostKeysetPaginator.paginate(sort='comments', cursor=cursor)
+
+    def test_cursor_with_impossible_date(self):
+        cursor = base64.urlsafe_b64encode(json.dumps(['recent', '2024-02-30T00:00:00', 5]).encode()).decode()
+        with self.assertRaises(InvalidCursor):
+            PostKeysetPaginator.decode_cursor('recent', cursor)
+        self.client.force_login(User.objects.create_user('reader'))
+        self.assertEqual(self.client.get(reverse('forum'), {'cursor': cursor}).status_code, 200)
+        self.assertEqual(self.client.get(reverse('forum_posts_api'), {'cursor': cursor}).status_code, 400)
+
+
+class PostActivityCounterTests(TestCase):
+    """comment_count et last_activity_at suivent les commentaires sans agrégat"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.commenter = User.objects.create_user('commenter', password='secret')
+        self.post = Post.objects.create(author=self.author, title='Sujet', content='Contenu')
+
+    def test_comment_from_post_detail_updates_counters(self):
+        self.client.force_login(self.commenter)
+        for content in ('Premier', 'Second'):
+            self.client.post(reverse('post_detail', args=[self.post.id]), {'content': content})
+        self.post.refresh_from_db()
+        last_comment = Comment.objects.latest('created_at')
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_activity_at, last_comment.created_at)
+
+    def test_deleting_a_commenter_releases_its_comments(self):
+        Comment.objects.create(post=self.post, author=self.commenter, content='Réponse')
+        Comment.objects.create(post=self.post, author=self.author, content='Merci')
+        self.commenter.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_new_post_passes_check(self):
+        self.assertEqual(self.post.last_activity_at, self.post.created_at)
+        self.client.force_login(self.author)
+        self.client.post(reverse('create_post'), {'title': 'Autre sujet', 'content': 'Contenu'})
+        self.assertEqual(Post.objects.count(), 2)
+        call_command('rebuild_post_activity', '--check', stdout=StringIO())
+
+    def test_rebuild_command_repairs_drift(self):
+        Comment.objects.create(post=self.post, author=self.commenter, content='Réponse')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7, last_activity_at=self.post.created_at)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_post_activity', '--check', stdout=StringIO())
+        call_command('rebuild_post_activity', stdout=StringIO())
+        call_command('rebuild_post_activity', '--check', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_activity_at, Comment.objects.get().created_at)
+
+
+class NotificationServiceTests(TestCase):
+    """Diffusion par lots, compteur de non lues et marquage des seules notifications affichées"""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(f'user{i}', password='secret') for i in range(5)]
+
+    def unread(self, user):
+        return NotificationService.unread_count(user.pk)
+
+    @override_settings(NOTIFICATION_FANOUT_BATCH_SIZE=2)
+    def test_notify_inserts_in_batches_and_counts_unread(self):
+        ids = [user.pk for user in self.users]
+        # Trois requêtes par lot de deux destinataires, doublons ignorés
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(9):
+            self.assertEqual(NotificationService.notify(ids + ids[:2], 'Bienvenue'), 5)
+        NotificationService.notify(ids[:1], 'Rappel')
+        self.assertEqual(Notification.objects.count(), 6)
+        self.assertEqual(self.unread(self.users[0]), 2)
+        self.assertEqual(self.unread(self.users[1]), 1)
+        # Lectures suivantes servies par le cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread(self.users[1]), 1)
+
+    def test_new_comment_notifies_post_author_and_participants(self):
+        author, participant, commenter, _, bystander = self.users
+        post = Post.objects.create(author=author, title='Sujet', content='Contenu')
+        Comment.objects.create(post=post, author=participant, content='Premier')
+        comment = Comment.objects.create(post=post, author=commenter, content='Second')
+        self.assertEqual(NotificationService.notify_new_comment(comment), 2)
+        self.assertEqual(
+            set(Notification.objects.values_list('user__username', flat=True)),
+            {author.username, participant.username},
+        )
+        self.assertEqual(self.unread(bystander), 0)
+
+    def test_comment_from_post_detail_updates_badge(self):
+        author, commenter = self.users[:2]
+        post = Post.objects.create(author=author, title='Sujet', content='Contenu')
+        self.client.force_login(author)
+        self.assertNotContains(self.client.get(reverse('forum')), 'badge rounded-pill')
+        self.client.force_login(commenter)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post_detail', args=[post.id]), {'content': 'Réponse'})
+        self.client.force_login(author)
+        self.assertContains(self.client.get(reverse('forum')), '<span class="badge rounded-pill bg-danger">1</span>')
+
+    def test_mark_read_only_displayed_notifications(self):
+        user = self.users[0]
+        for i in range(NotificationService.PAGE_SIZE + 5):
+            NotificationService.notify([user.pk], f'Notification {i}')
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('notifications'))
+        self.assertTrue(all(not notification.is_read for notification in response.context['notifications']))
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 5)
+        self.assertEqual(self.unread(user), 5)
+        # Page suivante: les cinq plus anciennes
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('notifications'), {'before': response.context['next_before']})
+        self.assertEqual(
+            [notification.message for notification in response.context['notifications']],
+            [f'Notification {i}' for i in range(4, -1, -1)],
+        )
+        self.assertEqual(self.unread(user), 0)
+
+    def test_new_recommendations_notify_once(self):
+        from analytics.ai_service import AIRecommendationService
+        from content.models import Course
+
+        user = self.users[0]
+        Course.objects.bulk_create([Course(title=f'Cours {i}', description='Description') for i in range(3)])
+        AIRecommendationService.generate_recommendations(user)
+        AIRecommendationService.generate_recommendations(user)
+        message = Notification.objects.get(user=user).message
+        self.assertTrue(message.startswith('Nouveau cours recommandé'))
+        self.assertTrue(message.endswith('et 2 autres'))
+
+    def test_refreshes_without_new_courses_do_not_notify(self):
+        from analytics.ai_service import AIRecommendationService
+        from content.models import Course
+
+        user = self.users[0]
+        Course.objects.bulk_create([Course(title=f'Cours {i}', description='Description') for i in range(60)])
+        for _ in range(5):
+            # Le top-K change d'un rafraîchissement à l'autre (part aléatoire du score)
+            AIRecommendationService.generate_recommendations(user, top_k=5)
+        self.assertEqual(Notification.objects.filter(user=user).count(), 1)
+
+        course = Course.objects.create(title='Nouveau cours', description='Description')
+        with mock.patch.object(
+            AIRecommendationService, '_calculate_recommendation_score',
+            side_effect=lambda user, candidate, *args, **kwargs: 1.0 if candidate.id == course.id else 0.5,
+        ):
+            AIRecommendationService.generate_recommendations(user, top_k=5)
+        self.assertEqual(
+            Notification.objects.filter(user=user).latest('id').message, 'Nouveau cours recommandé : « Nouveau cours »'
+        )
+        self.assertEqual(self.unread(user), 2)
+
+    def test_rebuild_command_repairs_counters(self):
+        user = self.users[0]
+        NotificationService.notify([user.pk], 'Bienvenue')
+        NotificationCounter.objects.filter(user=user).update(unread=4)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_notification_counters', '--check', stdout=StringIO())
+        call_command('rebuild_notification_counters', stdout=StringIO())
+        self.assertEqual(self.unread(user), 1)
+
+
+class SocialViewPerformanceTests(PerformanceTestCase):
+    """Budgets de requêtes des vues du forum et des notifications"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret')
+        authors = [User.objects.create_user(f'author{i}', password='secret') for i in range(20)]
+        posts = Post.objects.bulk_create([
+            Post(author=authors[i % len(authors)], title=f'Sujet {i}', content='Discussion ' * 40)
+            for i in range(1000)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=posts[i % len(posts)], author=authors[i % 7], content='Réponse')
+            for i in range(5000)
+        ])
+        # bulk_create n'émet pas de signal: compteurs recalculés en une passe
+        call_command('rebuild_post_activity', stdout=StringIO())
+        Notification.objects.bulk_create([
+            Notification(user=cls.user, message=f'Notification {i}', is_read=i % 3 == 0)
+            for i in range(300)
+        ])
+        call_command('rebuild_notification_counters', stdout=StringIO())
+        cls.post = posts[0]
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_forum(self):
+        response = self.assertWithinBudget('get', reverse('forum'), max_queries=4)
+        self.assertEqual(len(response.context['posts']), PostKeysetPaginator.PAGE_SIZE)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_forum_posts_api(self):
+        url = reverse('forum_posts_api')
+        cursor, pages = None, 0
+        # Le coût d'une page ne dépend pas de sa position dans le forum
+        while pages < 5:
+            data = self.assertWithinBudget(
+                'get', url, max_queries=3 if cursor is None else 2, data={'cursor': cursor} if cursor else {}
+            ).json()
+            self.assertEqual(len(data['posts']), PostKeysetPaginator.PAGE_SIZE)
+            cursor, pages = data['next_cursor'], pages + 1
+        self.assertWithinBudget(
+            'get', url, max_queries=2, data={'q': 'Sujet 99', 'sort': 'comments'}
+        )
+        self.assertWithinBudget('get', url, max_queries=1, status_code=400, data={'cursor': 'invalide'})
+
+    def test_post_detail(self):
+        self.assertWithinBudget('get', reverse('post_detail', args=[self.post.id]), max_queries=6)
+
+    def test_post_detail_add_comment(self):
+        self.assertWithinBudget(
+            'post', reverse('post_detail', args=[self.post.id]), max_queries=12,
+            status_code=302, data={'content': 'Nouveau commentaire'}
+        )
+
+    def test_create_post(self):
+        self.assertWithinBudget('get', reverse('create_post'), max_queries=3)
+        self.assertWithinBudget(
+            'post', reverse('create_post'), max_queries=3,
+            status_code=302, data={'title': 'Question', 'content': 'Contenu'}
+        )
+
+    def test_notifications(self):
+        response = self.assertWithinBudget('get', reverse('notifications'), max_queries=6)
+        self.assertEqual(len(response.context['notifications']), NotificationService.PAGE_SIZE)
+        self.assertWithinBudget(
+            'get', reverse('notifications'), max_queries=5,
+            data={'before': response.context['next_before']}
+        )
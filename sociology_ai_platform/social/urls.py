@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('forum/', views.forum, name='forum'),
+    path('forum/api/posts/', views.forum_posts_api, name='forum_posts_api'),
     path('post/<int:post_id>/', views.post_detail, name='post_detail'),
     path('post/create/', views.create_post, name='create_post'),
     path('notifications/', views.notifications, name='notifications'),
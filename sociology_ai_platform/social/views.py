@@ -1,26 +1,78 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Post, Comment, Notification
+from django.db import transaction
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils.timesince import timesince
+from django.views.decorators.http import require_http_methods
+from .models import Post, Comment
+from .notifications import NotificationService
+from .pagination import InvalidCursor, PostKeysetPaginator
+
+def _forum_params(request):
+    return (
+        request.GET.get('q', '').strip(),
+        request.GET.get('sort', PostKeysetPaginator.DEFAULT_SORT),
+        request.GET.get('cursor') or None,
+    )
 
 @login_required
 def forum(request):
-    posts = Post.objects.all().order_by('-created_at')
-    return render(request, 'social/forum.html', {'posts': posts})
+    query, sort, cursor = _forum_params(request)
+    try:
+        posts, next_cursor = PostKeysetPaginator.paginate(query, sort, cursor)
+    except InvalidCursor:
+        # Lien périmé ou modifié: revenir à la première page
+        posts, next_cursor = PostKeysetPaginator.paginate(query, sort)
+    return render(request, 'social/forum.html', {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'query': query,
+        'sort': sort if sort in PostKeysetPaginator.SORTS else PostKeysetPaginator.DEFAULT_SORT,
+    })
+
+@login_required
+@require_http_methods(["GET"])
+def forum_posts_api(request):
+    """API de défilement infini et de recherche du forum (une page par appel)"""
+    query, sort, cursor = _forum_params(request)
+    try:
+        posts, next_cursor = PostKeysetPaginator.paginate(query, sort, cursor)
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'posts': [{
+            'id': post.id,
+            'title': post.title,
+            'author': post.author.username,
+            'created_at': post.created_at.isoformat(),
+            'created_since': timesince(post.created_at),
+            'comment_count': post.comment_count,
+            'url': f'/social/post/{post.id}/',
+        } for post in posts],
+        'html': render_to_string('social/_post_items.html', {'posts': posts}, request=request),
+        'next_cursor': next_cursor,
+    })
 
 @login_required
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.filter(post=post).order_by('created_at')
+    post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
+    comments = Comment.objects.filter(post=post).select_related('author').order_by('created_at')
     
     if request.method == 'POST':
         content = request.POST.get('content')
         if content:
-            Comment.objects.create(
-                post=post,
-                author=request.user,
-                content=content
-            )
+            # Commentaire, compteurs du post (signal) et notifications dans la même transaction
+            with transaction.atomic():
+                comment = Comment.objects.create(
+                    post=post,
+                    author=request.user,
+                    content=content
+                )
+                NotificationService.notify_new_comment(comment)
             messages.success(request, 'Commentaire ajouté!')
             return redirect('post_detail', post_id=post_id)
     
@@ -46,7 +98,14 @@ def create_post(request):
 
 @login_required
 def notifications(request):
-    notifications_list = Notification.objects.filter(user=request.user).order_by('-created_at')
-    # Marquer comme lues
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-    return render(request, 'social/notifications.html', {'notifications': notifications_list})
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        before = None
+    notifications_list, next_before = NotificationService.page(request.user, before)
+    # Marquer comme lues uniquement les notifications affichées
+    NotificationService.mark_read(request.user, notifications_list)
+    return render(request, 'social/notifications.html', {
+        'notifications': notifications_list,
+        'next_before': next_before,
+    })
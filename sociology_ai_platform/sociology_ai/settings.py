@@ -1,5 +1,6 @@
 
 import os
+import sys
 from pathlib import Path
 
 
@@ -33,6 +34,7 @@ INSTALLED_APPS = [
     'analytics',
     'content',
     'social',
+    'search',
 
 ]
 
@@ -58,6 +60,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'social.context_processors.notifications',
             ],
         },
     },
@@ -77,6 +80,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sociology-ai',
+    }
+}
+
+
+# Authentication
+# Utilisateur et profil chargés en une requête (et mis en cache) pour chaque requête authentifiée
+
+AUTHENTICATION_BACKENDS = ['accounts.backends.ProfileModelBackend']
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,6 +144,84 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Recommendations IA
+# Nombre maximal de recommandations non vues conservées par utilisateur
+# (None pour conserver une recommandation par cours disponible)
+RECOMMENDATION_TOP_K = 20
+
+# Durée de vie (secondes) de la fenêtre d'émotions récentes en cache
+LEARNING_STATE_CACHE_TIMEOUT = 3600
+
+# Durée de vie (secondes) de l'ensemble des cours complétés d'un utilisateur en cache
+COMPLETED_COURSES_CACHE_TIMEOUT = 3600
+
+# Rafraîchissement différé des recommandations après une émotion détectée.
+# Synchrone sous `manage.py test`: les minuteurs du worker survivraient au test qui
+# les a programmés et liraient la base d'un autre test.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+RECOMMENDATION_REFRESH_ASYNC = not TESTING
+RECOMMENDATION_REFRESH_DEBOUNCE = 5  # secondes
+RECOMMENDATION_REFRESH_WORKERS = 2
+
+# Nombre maximal d'échantillons d'émotion par envoi groupé
+EMOTION_BATCH_MAX_SAMPLES = 500
+# Âge maximal (secondes) de l'horodatage d'un échantillon envoyé par lot
+EMOTION_SAMPLE_MAX_AGE = 3600
+
+# Nombre maximal d'événements de progression par lot (API de progression)
+PROGRESS_BATCH_MAX_EVENTS = 500
+
+# Rétention des données émotionnelles (commande apply_emotion_retention):
+# les données brutes sont conservées N jours, puis seuls les agrégats subsistent
+EMOTION_RAW_RETENTION_DAYS = 30
+EMOTION_ROLLUP_RETENTION_DAYS = {
+    'minute': 30,
+    'hour': 365,
+    'day': None,  # Conservés indéfiniment
+}
+
+# Durée de vie (secondes) de l'utilisateur authentifié et de son profil en cache
+# (0 pour ne charger qu'en une jointure, sans cache partagé entre requêtes).
+# Les signaux n'invalident que le cache du processus qui modifie l'utilisateur: avec
+# un cache local à chaque processus (LocMemCache), les autres continueraient de servir
+# un utilisateur désactivé ou privé de permissions jusqu'à expiration. Le cache n'est
+# donc activé par défaut qu'avec un backend partagé (Redis, Memcached, base de données).
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+USER_PROFILE_CACHE_TIMEOUT = 0 if CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS else 300
+
+# Registre des points (PointsEvent): événements plus anciens regroupés par compact_points_ledger
+POINTS_LEDGER_COMPACT_AFTER_DAYS = 30
+# Points attribués à la complétion d'un contenu (Historique.objects.record_progress)
+POINTS_PER_COMPLETION = {
+    'quiz': 20,
+    'exercise': 10,
+    'course': 50,
+}
+# Taille du classement précalculé (rebuild_leaderboard, à lancer périodiquement)
+LEADERBOARD_SIZE = 100
+
+# Durée de vie (secondes) du fragment rendu des ressources d'un cours
+COURSE_CONTENT_CACHE_TIMEOUT = 86400
+
+# Génération de cours en arrière-plan (tâches GenerationJob, pool de threads local)
+COURSE_GENERATION_ASYNC = True
+COURSE_GENERATION_WORKERS = 2
+
+# Catalogue des templates de génération (fichier JSON versionné, rechargé à chaud
+# au plus toutes les N secondes quand il change)
+COURSE_TEMPLATES_FILE = BASE_DIR / 'content' / 'data' / 'course_templates.json'
+COURSE_TEMPLATES_RELOAD_INTERVAL = 2  # secondes
+
+# Nombre de notifications insérées par lot lors d'une diffusion
+NOTIFICATION_FANOUT_BATCH_SIZE = 500
+
+# Moteur de recherche plein texte (search.backends): FTS5 sur SQLite,
+# repli automatique sur search.backends.LikeSearchBackend sinon
+SEARCH_BACKEND = 'search.backends.SQLiteFTS5Backend'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
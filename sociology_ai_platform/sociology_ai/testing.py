@@ -0,0 +1,47 @@
+"""
+Outils communs aux tests de performance des applications
+"""
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+@override_settings(
+    RECOMMENDATION_REFRESH_ASYNC=False, COURSE_GENERATION_ASYNC=False, USER_PROFILE_CACHE_TIMEOUT=300
+)
+class PerformanceTestCase(TestCase):
+    """
+    Vérifie qu'une vue reste sous un budget de requêtes SQL et de temps de réponse.
+    Les budgets ne dépendent pas du volume de données: une régression N+1 les dépasse.
+    Ils sont mesurés avec le cache de l'utilisateur authentifié actif (cache partagé).
+    """
+
+    MAX_RESPONSE_TIME = 2.0  # secondes
+
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context)
+        self.assertLessEqual(
+            executed, max_queries,
+            f"{executed} requêtes exécutées (maximum {max_queries}):\n"
+            + "\n".join(query['sql'] for query in context.captured_queries)
+        )
+
+    def assertWithinBudget(self, method, url, max_queries, max_time=None, status_code=200, **kwargs):
+        """Exécute la requête HTTP et vérifie son nombre de requêtes SQL et sa durée"""
+        with self.assertMaxQueries(max_queries):
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, **kwargs)
+            elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, status_code)
+        self.assertLess(elapsed, max_time or self.MAX_RESPONSE_TIME, f"{url} a répondu en {elapsed:.3f}s")
+        return response
@@ -14,6 +14,7 @@ urlpatterns = [
     path('content/', include('content.urls')),
     path('analytics/', include('analytics.urls')),
     path('social/', include('social.urls')),
+    path('search/', include('search.urls')),
 ]
 
 # Serve media files in development
@@ -11,6 +11,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initSmoothScroll();
     initLoadingStates();
     initConfirmations();
+    initProgressTracking();
 });
 
 // ========== ANIMATIONS ==========
@@ -250,6 +251,60 @@ function makeAjaxRequest(url, method = 'GET', data = null, csrfToken = null) {
         });
 }
 
+// ========== SUIVI DE PROGRESSION ==========
+// Événements regroupés puis envoyés par lot à l'API de progression (URL portée par <body>)
+const progressBuffer = [];
+const PROGRESS_FLUSH_INTERVAL_MS = 10000;
+const PROGRESS_MAX_BUFFER_SIZE = 50;
+
+function initProgressTracking() {
+    if (!document.body.dataset.progressUrl) {
+        return;
+    }
+    // Liens et boutons marqués data-progress-type / data-progress-id: contenu consulté
+    document.querySelectorAll('[data-progress-type]').forEach(element => {
+        element.addEventListener('click', function() {
+            trackProgress(this.dataset.progressType, this.dataset.progressId, 100, true);
+        });
+    });
+    setInterval(flushProgress, PROGRESS_FLUSH_INTERVAL_MS);
+    window.addEventListener('pagehide', () => flushProgress(true));
+}
+
+function trackProgress(contentType, contentId, progress, completed = false) {
+    if (!document.body.dataset.progressUrl) {
+        return;
+    }
+    progressBuffer.push({
+        content_type: contentType,
+        content_id: Number(contentId),
+        progress: Math.round(progress),
+        completed: completed
+    });
+    if (progressBuffer.length >= PROGRESS_MAX_BUFFER_SIZE) {
+        flushProgress();
+    }
+}
+
+function flushProgress(keepalive = false) {
+    if (progressBuffer.length === 0) {
+        return;
+    }
+    const events = progressBuffer.splice(0, progressBuffer.length);
+    const csrfCookie = document.cookie.split('; ').find(cookie => cookie.startsWith('csrftoken='));
+    fetch(document.body.dataset.progressUrl, {
+        method: 'POST',
+        keepalive: keepalive,
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfCookie ? decodeURIComponent(csrfCookie.split('=')[1]) : ''
+        },
+        body: JSON.stringify({ events: events })
+    }).catch(error => {
+        console.error('Erreur:', error);
+    });
+}
+
 // ========== UTILITAIRES ==========
 function formatDate(dateString) {
     const date = new Date(dateString);